@@ -0,0 +1,91 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from candle_cache import CandleCache, CANDLE_DTYPE, merge_ranges
+
+MARCH_1 = 1740787200  # 2025-03-01T00:00:00Z
+
+
+def candles(start, count, price=1.08):
+    close_time = start + np.arange(count, dtype=np.int64) * 60
+    return {'closeTime': close_time, 'open': np.full(count, price), 'high': np.full(count, price + 0.001),
+            'low': np.full(count, price - 0.001), 'close': np.full(count, price)}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CandleCache(str(tmp_path))
+
+
+def test_range_read_is_a_view_of_the_mapping(cache):
+    cache.build('EURUSD', candles(MARCH_1, 1000))
+    result = cache.read('EURUSD', MARCH_1 + 90, MARCH_1 + 600)
+    assert result.dtype == CANDLE_DTYPE
+    assert list(result['closeTime']) == list(range(MARCH_1 + 120, MARCH_1 + 601, 60))
+    assert isinstance(result, np.memmap) and not result.flags.owndata
+
+
+def test_append_skips_cached_candles_and_remaps(cache):
+    cache.build('EURUSD', candles(MARCH_1, 100))
+    assert cache.bounds('EURUSD') == (MARCH_1, MARCH_1 + 99 * 60)
+    assert cache.append('EURUSD', candles(MARCH_1 + 50 * 60, 100, price=1.09)) == 50
+    result = cache.read('EURUSD', MARCH_1, MARCH_1 + 1000 * 60)
+    assert len(result) == 150
+    assert np.all(np.diff(result['closeTime']) == 60)
+    assert result['open'][99] == 1.08 and result['open'][100] == 1.09
+
+
+def test_build_sorts_and_dedups(cache):
+    data = candles(MARCH_1, 10)
+    shuffled = {k: np.concatenate((v[::-1], v[:3])) for k, v in data.items()}
+    assert cache.build('EURUSD', shuffled) == 10
+    assert list(cache.read('EURUSD', 0, 2 ** 62)['closeTime']) == list(data['closeTime'])
+
+
+def test_covers_and_missing_symbol(cache):
+    assert cache.read('GBPUSD', MARCH_1, MARCH_1 + 60).size == 0
+    assert not cache.covers('GBPUSD', MARCH_1, MARCH_1)
+    cache.build('GBPUSD', candles(MARCH_1, 10))
+    assert cache.covers('GBPUSD', MARCH_1, MARCH_1 + 540)
+    assert not cache.covers('GBPUSD', MARCH_1, MARCH_1 + 600)
+    assert cache.symbols() == ['GBPUSD']
+
+
+def test_covers_only_complete_ranges(cache):
+    cache.build('EURUSD', candles(MARCH_1, 10))
+    # Appended without `since`: the gap between the two spans is not known to be empty
+    cache.append('EURUSD', candles(MARCH_1 + 100 * 60, 10))
+    assert cache.filled('EURUSD') == [(MARCH_1, MARCH_1 + 9 * 60), (MARCH_1 + 100 * 60, MARCH_1 + 109 * 60)]
+    assert cache.covers('EURUSD', MARCH_1 + 100 * 60, MARCH_1 + 105 * 60)
+    assert not cache.covers('EURUSD', MARCH_1, MARCH_1 + 105 * 60)
+
+
+def test_append_since_extends_the_complete_range(cache):
+    cache.build('EURUSD', candles(MARCH_1, 10))
+    # Every source candle after the last cached one, with a weekend-like gap in it
+    cache.append('EURUSD', candles(MARCH_1 + 100 * 60, 10), since=MARCH_1 + 9 * 60)
+    assert cache.filled('EURUSD') == [(MARCH_1, MARCH_1 + 109 * 60)]
+    assert cache.covers('EURUSD', MARCH_1, MARCH_1 + 105 * 60)
+
+
+def test_file_without_ranges_is_never_covered(cache):
+    cache.build('EURUSD', candles(MARCH_1, 10))
+    Path(cache.ranges_path('EURUSD')).unlink()
+    assert cache.bounds('EURUSD') == (MARCH_1, MARCH_1 + 9 * 60)
+    assert not cache.covers('EURUSD', MARCH_1, MARCH_1 + 60)
+    assert cache.symbols() == ['EURUSD']
+
+
+def test_adjacent_ranges_are_joined():
+    assert merge_ranges([(600, 900), (0, 540)], step=60) == [[0, 900]]
+    assert merge_ranges([(0, 540), (660, 900)], step=60) == [[0, 540], [660, 900]]  # the 600 bar is unknown
+
+
+def test_appends_of_consecutive_bars_cover_the_whole_span(cache):
+    cache.build('EURUSD', candles(MARCH_1, 10))
+    cache.append('EURUSD', candles(MARCH_1 + 10 * 60, 10))  # no `since`, but it starts at the next bar
+    assert cache.filled('EURUSD') == [(MARCH_1, MARCH_1 + 19 * 60)]
+    assert cache.covers('EURUSD', MARCH_1, MARCH_1 + 19 * 60)
@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from candle_store import CandleStore
+
+MARCH_1 = 1740787200  # 2025-03-01T00:00:00Z
+
+
+def candles(start, count, name='EURUSD', price=1.08):
+    close_time = start + np.arange(count, dtype=np.int64) * 60
+    return pd.DataFrame({
+        'name': name, 'period': 'PERIOD_M1',
+        'open': price, 'high': price + 0.001, 'low': price - 0.001, 'close': price,
+        'closeTime': close_time, 'time': '',
+    })
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CandleStore(str(tmp_path))
+
+
+def test_range_read_spans_month_partitions(store):
+    store.write(candles(MARCH_1 - 3600, 120))
+    result = store.read('EURUSD', MARCH_1 - 600, MARCH_1 + 600)
+    assert result['closeTime'].dtype == np.int64
+    assert list(result['closeTime']) == list(range(MARCH_1 - 600, MARCH_1 + 601, 60))
+    assert store.bounds('EURUSD') == (MARCH_1 - 3600, MARCH_1 + 3600 - 60)
+
+
+def test_rewrite_replaces_overlapping_candles(store):
+    store.write(candles(MARCH_1, 100, price=1.08))
+    store.write(candles(MARCH_1 + 50 * 60, 100, price=1.09))
+    result = store.read('EURUSD', MARCH_1, MARCH_1 + 200 * 60)
+    assert len(result['closeTime']) == 150
+    assert np.all(np.diff(result['closeTime']) == 60)
+    assert result['open'][49] == 1.08 and result['open'][50] == 1.09
+
+
+def test_symbols_are_isolated(store):
+    store.write(pd.concat([candles(MARCH_1, 10), candles(MARCH_1, 5, name='GBPUSD')]))
+    assert store.symbols() == ['EURUSD', 'GBPUSD']
+    assert len(store.read('GBPUSD', MARCH_1, MARCH_1 + 3600)['close']) == 5
+
+
+def test_missing_range_returns_empty_arrays(store):
+    result = store.read('EURUSD', MARCH_1, MARCH_1 + 60)
+    assert len(result['closeTime']) == 0
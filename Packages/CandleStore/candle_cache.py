@@ -0,0 +1,203 @@
+import bisect
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+
+# Seconds between closeTimes of consecutive bars, for joining adjacent complete ranges
+PERIOD_SECONDS = {
+    'PERIOD_M1': 60, 'PERIOD_M5': 300, 'PERIOD_M15': 900, 'PERIOD_M30': 1800,
+    'PERIOD_H1': 3600, 'PERIOD_H4': 14400, 'PERIOD_D1': 86400,
+}
+
+# Fixed-width record: 40 bytes per candle, native little-endian, no header
+CANDLE_DTYPE = np.dtype([
+    ('closeTime', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+])
+
+
+def to_records(data):
+    """Candles frame / dict of arrays / record array -> CANDLE_DTYPE array"""
+    if isinstance(data, np.ndarray) and data.dtype == CANDLE_DTYPE:
+        return data
+    records = np.empty(len(data['closeTime']), dtype=CANDLE_DTYPE)
+    for name in CANDLE_DTYPE.names:
+        records[name] = np.asarray(data[name])
+    return records
+
+
+def sort_unique(records):
+    """Sort by closeTime, keeping the last occurrence of duplicated closeTimes"""
+    order = np.lexsort((np.arange(len(records)), records['closeTime']))
+    records = records[order]
+    keep = np.append(records['closeTime'][1:] != records['closeTime'][:-1], True)
+    return records[keep]
+
+
+def merge_ranges(ranges, step=0):
+    """Sorted, non-overlapping union of (from, to) ranges.
+
+    Ranges that overlap or touch are joined, and so are ranges only one bar
+    `step` apart: no candle can close between them.
+    """
+    merged = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1] + step:
+            merged[-1] = [merged[-1][0], max(merged[-1][1], hi)]
+        else:
+            merged.append([lo, hi])
+    return merged
+
+
+class CandleCache:
+    """Memory-mapped binary candle files for repeated backtest range reads.
+
+    One file per symbol/period (<root>/EURUSD.PERIOD_M1.bin) of CANDLE_DTYPE
+    records sorted by closeTime. Range reads binary-search closeTime on the
+    mapping and return a zero-copy slice, so only the pages actually used are
+    read from disk (and stay in the OS page cache between sweeps).
+    Files are rebuilt atomically with build() and grown with append().
+
+    A sidecar <file>.ranges.json lists the closeTime ranges known to hold
+    every candle of the source they were built from. covers() only answers
+    for those, so a gap left by an append of unknown extent is never served
+    as if it were complete.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._maps = {}
+        self._ranges = {}
+        self._lock = threading.Lock()
+
+    def path(self, symbol, period='PERIOD_M1'):
+        return os.path.join(self.root, f"{symbol}.{period}.bin")
+
+    def open(self, symbol, period='PERIOD_M1'):
+        """Read-only record memmap of symbol/period, None when there is no cache file"""
+        path = self.path(symbol, period)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+        key = (symbol, period)
+        with self._lock:
+            cached = self._maps.get(key)
+            if cached is not None and cached[0] == size:
+                return cached[1]
+            # New file or appended to since it was mapped: remap at the new size
+            count = size // CANDLE_DTYPE.itemsize
+            records = np.memmap(path, dtype=CANDLE_DTYPE, mode='r', shape=(count,)) if count \
+                else np.empty(0, dtype=CANDLE_DTYPE)
+            self._maps[key] = (size, records)
+            return records
+
+    def bounds(self, symbol, period='PERIOD_M1'):
+        """(first, last) cached closeTime, None when empty"""
+        records = self.open(symbol, period)
+        if records is None or len(records) == 0:
+            return None
+        return int(records['closeTime'][0]), int(records['closeTime'][-1])
+
+    def ranges_path(self, symbol, period='PERIOD_M1'):
+        return self.path(symbol, period) + '.ranges.json'
+
+    def filled(self, symbol, period='PERIOD_M1'):
+        """Complete closeTime ranges [(from, to), ...] of symbol/period; [] when unknown"""
+        path = self.ranges_path(symbol, period)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return []
+        key = (symbol, period)
+        with self._lock:
+            cached = self._ranges.get(key)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        try:
+            with open(path, encoding='utf-8') as f:
+                ranges = [tuple(r) for r in json.load(f)]
+        except (OSError, ValueError):
+            return []
+        with self._lock:
+            self._ranges[key] = (mtime, ranges)
+        return ranges
+
+    def _write_ranges(self, symbol, ranges, period='PERIOD_M1'):
+        path = self.ranges_path(symbol, period)
+        tmp_path = os.path.join(self.root, f".{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(merge_ranges(ranges, PERIOD_SECONDS.get(period, 0)), f)
+        with self._lock:
+            os.replace(tmp_path, path)
+            self._ranges.pop((symbol, period), None)
+
+    def covers(self, symbol, start, end, period='PERIOD_M1'):
+        """Whether start..end lies inside one complete range, so read() misses nothing the source has"""
+        return any(lo <= start and end <= hi for lo, hi in self.filled(symbol, period))
+
+    def read(self, symbol, start, end, period='PERIOD_M1'):
+        """Records with start <= closeTime <= end as a zero-copy view of the mapping"""
+        records = self.open(symbol, period)
+        if records is None:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        # bisect touches ~log2(n) records; np.searchsorted would first copy the
+        # strided closeTime field of the whole file into a contiguous array
+        close_times = records['closeTime']
+        lo = bisect.bisect_left(close_times, start)
+        hi = bisect.bisect_right(close_times, end, lo)
+        return records[lo:hi]
+
+    def build(self, symbol, data, period='PERIOD_M1', filled=None):
+        """Replace the cache file of symbol/period with data; returns the record count.
+
+        data is taken to be all the source has from its first to its last
+        candle, or over `filled` (from, to) when given.
+        """
+        records = sort_unique(to_records(data))
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(symbol, period)
+        tmp_path = os.path.join(self.root, f".{uuid.uuid4().hex}.tmp")
+        records.tofile(tmp_path)
+        # Ranges go first, so a crash in between never vouches for the old file's gaps
+        self._write_ranges(symbol, [], period)
+        with self._lock:
+            os.replace(tmp_path, path)
+            self._maps.pop((symbol, period), None)
+        if filled is None and len(records):
+            filled = (int(records['closeTime'][0]), int(records['closeTime'][-1]))
+        self._write_ranges(symbol, [filled] if filled else [], period)
+        return len(records)
+
+    def append(self, symbol, data, period='PERIOD_M1', since=None):
+        """Append candles newer than the last cached one; returns the number appended.
+
+        Older or already cached closeTimes are dropped, so feeding overlapping
+        batches is safe. Backfilled history needs a build() instead. Pass
+        `since` when data is every source candle with closeTime > since;
+        without it only the appended span itself is marked complete.
+        """
+        records = sort_unique(to_records(data))
+        bounds = self.bounds(symbol, period)
+        if bounds is not None:
+            records = records[records['closeTime'] > bounds[1]]
+        if len(records) == 0:
+            return 0
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.path(symbol, period), 'ab') as f:
+            f.write(records.tobytes())
+        first = int(records['closeTime'][0]) if since is None else since
+        self._write_ranges(symbol, self.filled(symbol, period) + [(first, int(records['closeTime'][-1]))], period)
+        return len(records)
+
+    def symbols(self, period='PERIOD_M1'):
+        if not os.path.isdir(self.root):
+            return []
+        suffix = f".{period}.bin"
+        return sorted(f[:-len(suffix)] for f in os.listdir(self.root) if f.endswith(suffix))
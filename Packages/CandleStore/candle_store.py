@@ -0,0 +1,133 @@
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+VALUE_COLUMNS = ['closeTime', 'open', 'high', 'low', 'close']
+SCHEMA = pa.schema([
+    ('closeTime', pa.int64()),
+    ('open', pa.float64()),
+    ('high', pa.float64()),
+    ('low', pa.float64()),
+    ('close', pa.float64()),
+])
+ROW_GROUP_SIZE = 10080  # one week of M1 candles, the unit of min/max pruning
+COMPRESSION = 'none'    # decoding dominates range reads; a year of M1 is ~15 MB uncompressed
+FILE_NAME = 'candles.parquet'
+
+
+def months_of(close_times):
+    """Vectorized unix seconds -> 'YYYY-MM' (UTC) partition keys"""
+    months = np.asarray(close_times, dtype=np.int64).astype('datetime64[s]').astype('datetime64[M]')
+    return np.datetime_as_string(months, unit='M')
+
+
+def month_range(start, end):
+    """'YYYY-MM' keys of every month touched by [start, end]"""
+    first = datetime.fromtimestamp(int(start), tz=timezone.utc)
+    last = datetime.fromtimestamp(int(end), tz=timezone.utc)
+    year, month = first.year, first.month
+    while (year, month) <= (last.year, last.month):
+        yield f"{year:04d}-{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+class CandleStore:
+    """Columnar on-disk candle store: one Parquet file per symbol/period/month.
+
+    Layout: <root>/symbol=EURUSD/period=PERIOD_M1/month=2025-03/candles.parquet
+    (hive-style). Each file is sorted by closeTime with one row group per week,
+    so a range read opens only the months it overlaps, reads fully covered
+    months whole and pushes the closeTime predicate down to the row groups of
+    the two boundary months.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _dir(self, symbol, period, month=None):
+        path = os.path.join(self.root, f"symbol={symbol}", f"period={period}")
+        return os.path.join(path, f"month={month}") if month else path
+
+    def write(self, frame):
+        """Merge a candles frame (name, period, closeTime, OHLC columns) into the store.
+
+        Rows are upserted per month: existing candles with the same closeTime
+        are replaced by the new ones. Returns the number of rows written.
+        """
+        if len(frame) == 0:
+            return 0
+        months = months_of(frame['closeTime'].to_numpy())
+        for (symbol, period, month), part in frame.groupby([frame['name'], frame['period'], months]):
+            table = pa.Table.from_pandas(part[VALUE_COLUMNS], schema=SCHEMA, preserve_index=False)
+            self._merge_month(symbol, period, month, table)
+        return len(frame)
+
+    def write_arrays(self, symbol, period, arrays):
+        """Same as write() for a dict of numpy arrays keyed by VALUE_COLUMNS"""
+        table = pa.Table.from_pydict({c: arrays[c] for c in VALUE_COLUMNS}, schema=SCHEMA)
+        months = months_of(arrays['closeTime'])
+        for month in np.unique(months):
+            self._merge_month(symbol, period, month, table.filter(pa.array(months == month)))
+        return table.num_rows
+
+    def _merge_month(self, symbol, period, month, table):
+        directory = self._dir(symbol, period, month)
+        path = os.path.join(directory, FILE_NAME)
+        with self._lock:
+            os.makedirs(directory, exist_ok=True)
+            if os.path.exists(path):
+                table = pa.concat_tables([pq.read_table(path, schema=SCHEMA), table])
+            table = self._dedup_sorted(table)
+            tmp_path = os.path.join(directory, f".{uuid.uuid4().hex}.tmp")
+            pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, compression=COMPRESSION)
+            os.replace(tmp_path, path)
+
+    @staticmethod
+    def _dedup_sorted(table):
+        """Sort by closeTime, keeping the last written row for duplicated closeTimes"""
+        order = np.lexsort((np.arange(table.num_rows), table['closeTime'].to_numpy()))
+        table = table.take(order)
+        close_times = table['closeTime'].to_numpy()
+        keep = np.append(close_times[1:] != close_times[:-1], True)
+        return table.filter(pa.array(keep))
+
+    def read(self, symbol, start, end, period='PERIOD_M1', columns=VALUE_COLUMNS):
+        """Candles with start <= closeTime <= end as a dict of numpy arrays"""
+        months = list(month_range(start, end))
+        tables = []
+        for i, month in enumerate(months):
+            path = os.path.join(self._dir(symbol, period, month), FILE_NAME)
+            if not os.path.exists(path):
+                continue
+            boundary = i == 0 or i == len(months) - 1
+            filters = [('closeTime', '>=', start), ('closeTime', '<=', end)] if boundary else None
+            tables.append(pq.read_table(path, columns=list(columns), filters=filters, schema=SCHEMA))
+        if not tables:
+            return {c: np.array([], dtype=SCHEMA.field(c).type.to_pandas_dtype()) for c in columns}
+
+        table = pa.concat_tables(tables)
+        return {c: table[c].to_numpy() for c in columns}
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d.split('=', 1)[1] for d in os.listdir(self.root) if d.startswith('symbol='))
+
+    def bounds(self, symbol, period='PERIOD_M1'):
+        """(first, last) closeTime stored for symbol/period, None when empty"""
+        directory = self._dir(symbol, period)
+        if not os.path.isdir(directory):
+            return None
+        months = sorted(d for d in os.listdir(directory) if d.startswith('month='))
+        if not months:
+            return None
+        first = pq.read_table(os.path.join(directory, months[0], FILE_NAME), columns=['closeTime'])
+        last = pq.read_table(os.path.join(directory, months[-1], FILE_NAME), columns=['closeTime'])
+        return int(pc.min(first['closeTime']).as_py()), int(pc.max(last['closeTime']).as_py())
@@ -0,0 +1,119 @@
+import sys
+from pathlib import Path
+import mysql.connector
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from bulk_loader import BulkLoader, insert_statement
+from candle_reader import CANDLE_COLUMNS
+
+ROWS = [('EURUSD', 'PERIOD_M1', 1.1, 1.2, 1.0, 1.15, 1741556580, '2025-03-10T00:43'),
+        ('EURUSD', 'PERIOD_M1', 1.15, 1.2, 1.1, 1.12, 1741556640, '2025-03-10T00:44')]
+
+
+class StubCursor:
+    """Records executed SQL; raises `errors[fragment]` for statements containing fragment"""
+
+    def __init__(self, local_infile=1, errors=None):
+        self.local_infile = local_infile
+        self.errors = errors or {}
+        self.executed = []
+        self.many = []
+        self.loaded_files = []
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        self.executed.append(' '.join(sql.split()))
+        for fragment, error in self.errors.items():
+            if fragment in sql:
+                raise error
+        if 'LOAD DATA' in sql:
+            self.loaded_files.append(Path(params[0]).read_text())
+            self.rowcount = self.loaded_files[-1].count('\n')
+
+    def fetchone(self):
+        return (self.local_infile,)
+
+    def executemany(self, sql, rows):
+        self.many.append((sql, list(rows)))
+
+
+class StubConnection:
+    def __init__(self):
+        self.commits = self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def loader(on_duplicate=None, **cursor_kwargs):
+    return BulkLoader(StubConnection(), StubCursor(**cursor_kwargs), on_duplicate=on_duplicate)
+
+
+def test_insert_statement_modes():
+    assert insert_statement('candles').startswith('INSERT INTO candles (name, period,')
+    assert 'ON DUPLICATE' not in insert_statement('candles')
+    assert insert_statement('candles', 'ignore').startswith('INSERT IGNORE INTO candles')
+    update = insert_statement('candles', 'update')
+    assert update.startswith('INSERT INTO') and update.endswith('time = VALUES(time)')
+    assert update.count('%s') == len(CANDLE_COLUMNS)
+
+
+def test_unknown_on_duplicate_is_rejected():
+    with pytest.raises(ValueError):
+        loader('replace')
+
+
+def test_ignore_loads_straight_into_the_table():
+    bulk = loader('ignore')
+    assert bulk.use_infile
+    assert bulk.load(ROWS) == 2
+    load = bulk.cursor.executed[-1]
+    assert 'LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE candles' in load
+    assert bulk.cursor.loaded_files[0].splitlines()[0].split('\t')[:2] == ['EURUSD', 'PERIOD_M1']
+    assert bulk.cnx.commits == 1
+
+
+@pytest.mark.parametrize('on_duplicate, suffix', [(None, 'FROM candles_staging'),
+                                                  ('update', 'time = VALUES(time)')])
+def test_other_modes_merge_through_a_keyless_staging_table(on_duplicate, suffix):
+    bulk = loader(on_duplicate)
+    frame = pd.DataFrame(ROWS, columns=CANDLE_COLUMNS)
+    bulk.load(frame)
+    bulk.load(frame)
+    create, clear, load, merge = bulk.cursor.executed[1:5]
+    assert create.startswith('CREATE TEMPORARY TABLE IF NOT EXISTS candles_staging AS SELECT')
+    assert clear == 'DELETE FROM candles_staging'
+    assert 'INFILE %s INTO TABLE candles_staging' in load  # no IGNORE: nothing is dropped on the way
+    assert merge.startswith('INSERT INTO candles (') and merge.endswith(suffix)
+    assert sum('CREATE' in sql for sql in bulk.cursor.executed) == 1
+
+
+def test_disabled_local_infile_uses_executemany():
+    bulk = loader(local_infile=0)
+    assert not bulk.use_infile
+    assert bulk.load(ROWS) == 2
+    assert bulk.cursor.many == [(insert_statement('candles'), ROWS)]
+
+
+def test_refused_infile_falls_back_to_executemany_for_good():
+    refused = mysql.connector.Error(msg='Loading local data is disabled', errno=3948)
+    bulk = loader('ignore', errors={'LOAD DATA': refused})
+    bulk.chunk_size = 1
+    assert bulk.load(pd.DataFrame(ROWS, columns=CANDLE_COLUMNS)) == 2
+    assert not bulk.use_infile
+    assert [rows for _, rows in bulk.cursor.many] == [ROWS[:1], ROWS[1:]]
+    bulk.load(ROWS)
+    assert sum('LOAD DATA' in sql for sql in bulk.cursor.executed) == 1
+
+
+def test_other_infile_errors_are_raised():
+    duplicate = mysql.connector.Error(msg='Duplicate entry', errno=1062)
+    bulk = loader(errors={'INSERT INTO candles': duplicate})
+    with pytest.raises(mysql.connector.Error):
+        bulk.load(ROWS)
+    assert bulk.use_infile and bulk.cnx.rollbacks == 1 and bulk.cursor.many == []
@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from candle_reader import local_time_strings, read_mt5_blocks
+from inserter import convert_to_utc_unix
+from refetch_gaps import to_rows
+
+# Tehran wall-clock minutes around the 2021 DST switches (+03:30 <-> +04:30) and after DST was abolished
+MINUTES = [
+    ('2021.03.21', '23:59'), ('2021.03.22', '01:00'),  # clocks went 00:00 -> 01:00
+    ('2021.06.01', '12:00'),
+    ('2021.09.21', '22:59'), ('2021.09.21', '23:30'), ('2021.09.22', '00:00'),  # 23:00-24:00 happened twice
+    ('2025.03.10', '00:43'),
+]
+
+
+def write_export(path, minutes, bad_rows=()):
+    lines = [f"{date},{clock},1.1,1.2,1.0,1.15,0" for date, clock in minutes]
+    path.write_text('\n'.join(lines + list(bad_rows)) + '\n')
+    return path
+
+
+def test_vectorized_tehran_conversion_matches_the_row_parser(tmp_path):
+    path = write_export(tmp_path / 'EURUSD.csv', MINUTES)
+    frame = next(read_mt5_blocks(path, 'EURUSD'))
+    assert frame['closeTime'].tolist() == [convert_to_utc_unix(d, c) for d, c in MINUTES]
+    assert frame['closeTime'].tolist()[-1] == 1741554780  # 2025-03-09T21:13Z, +03:30
+    assert frame['time'].tolist()[-1] == '2025-03-10T00:43'
+
+
+def test_blocks_are_bounded_and_invalid_rows_skipped(tmp_path, capsys):
+    path = write_export(tmp_path / 'EURUSD.csv', MINUTES, bad_rows=['2021.13.01,10:00,1,1,1,1,0',
+                                                                    '2021.06.01,10:00,x,1,1,1,0'])
+    frames = list(read_mt5_blocks(path, 'EURUSD', block_size=3))
+    assert [len(frame) for frame in frames] == [3, 3, 1]
+    assert 'Skipping 2 invalid rows in EURUSD' in capsys.readouterr().out
+    assert frames[0]['name'].tolist() == ['EURUSD'] * 3
+
+
+def test_local_time_strings_invert_the_tehran_conversion(tmp_path):
+    frame = next(read_mt5_blocks(write_export(tmp_path / 'EURUSD.csv', MINUTES), 'EURUSD'))
+    assert local_time_strings(frame['closeTime']) == frame['time'].tolist()
+    assert local_time_strings([]) == []
+
+
+def test_refetched_rows_use_the_import_time_format():
+    candle = {'name': 'EURUSD', 'open': 1.1, 'high': 1.2, 'low': 1.0, 'close': 1.15, 'closeTime': 1741554780}
+    rows = to_rows([candle, dict(candle, closeTime=1741554840)], 0, 1741554780)
+    assert rows == [('EURUSD', 'PERIOD_M1', 1.1, 1.2, 1.0, 1.15, 1741554780, '2025-03-10T00:43')]
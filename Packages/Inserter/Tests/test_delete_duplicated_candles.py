@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from delete_duplicated_candles import collect_duplicates
+
+
+class StubCursor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql, params=()):
+        self.executed.append((' '.join(sql.split()), params))
+
+    def fetchall(self):
+        return [('GBPUSD', 3)]
+
+
+def test_duplicates_are_grouped_by_the_unique_key():
+    cursor = StubCursor()
+    assert collect_duplicates(cursor, 'GBPUSD') == [('GBPUSD', 3)]
+    create, params = cursor.executed[1]
+    # Different periods may share a closeTime (M1 and H1 at the top of the hour)
+    assert 'PARTITION BY name, period, closeTime ORDER BY id' in create
+    assert 'WHERE name = %s' in create and params == ('GBPUSD',)
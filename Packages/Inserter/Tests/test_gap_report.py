@@ -0,0 +1,74 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timezone
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from gap_report import FxCalendar, GapReport, find_gaps, find_irregular, load_gaps
+
+
+def ts(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+@pytest.fixture
+def calendar():
+    return FxCalendar(holidays=['2025-01-01'])
+
+
+@pytest.fixture
+def open_minutes(calendar):
+    """Every open-market M1 closeTime from 2024-12-23 to 2025-01-08"""
+    t = np.arange(ts(2024, 12, 23), ts(2025, 1, 8), 60)
+    starts, ends = calendar.closures(int(t[0]), int(t[-1]))
+    closed = np.zeros(len(t), dtype=bool)
+    for start, end in zip(starts, ends):
+        closed |= (t >= start) & (t < end)
+    return t[~closed]
+
+
+def test_weekend_and_holiday_closures_are_not_gaps(calendar, open_minutes):
+    starts, _, _ = find_gaps(open_minutes, calendar)
+    assert len(starts) == 0
+
+
+def test_missing_minutes_are_reported_as_ranges(calendar, open_minutes):
+    t = np.delete(open_minutes, list(range(100, 110)) + [5000])
+    starts, ends, missing = find_gaps(t, calendar)
+    assert list(missing) == [10, 1]
+    assert starts[0] == open_minutes[100]
+    assert ends[0] == open_minutes[109]
+    assert starts[1] == ends[1] == open_minutes[5000]
+
+
+def test_gap_across_weekend_counts_only_open_minutes(calendar, open_minutes):
+    friday_close = ts(2024, 12, 27, 22)
+    i = int(np.searchsorted(open_minutes, friday_close))
+    t = np.delete(open_minutes, list(range(i - 5, i + 3)))
+    starts, ends, missing = find_gaps(t, calendar)
+    assert list(missing) == [8]
+    assert starts[0] == open_minutes[i - 5]
+    assert ends[0] == open_minutes[i + 2]
+
+
+def test_irregular_candles_are_flagged():
+    t = np.array([0, 60, 60, 120, 150])
+    ids, close_times, diffs = find_irregular(np.arange(5), t, None, 55)
+    assert list(ids) == [2, 4]
+    assert list(diffs) == [0, 30]
+
+
+def test_report_carries_state_across_chunks(tmp_path, calendar, open_minutes):
+    t = np.delete(open_minutes, [2999, 3000])
+    ids = np.arange(len(t))
+    report = GapReport(calendar)
+    report.add_chunk('EURUSD', ids[:2999], t[:2999])
+    report.add_chunk('EURUSD', ids[2999:], t[2999:])
+
+    path = tmp_path / 'gaps.json'
+    report.write_json(path)
+    report.write_csv(tmp_path / 'gaps.csv')
+    gaps = load_gaps(path)['EURUSD']
+    assert [g['missing'] for g in gaps] == [2]
+    assert gaps[0]['start'] == open_minutes[2999]
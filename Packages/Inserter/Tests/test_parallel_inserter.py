@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from parallel_tradingview_inserter import completed_files, plan_lanes, unloaded
+from candle_reader import extract_symbol_and_number
+
+FILES = [extract_symbol_and_number(f"FOREXCOM_{symbol}, 1 ({n}).csv")
+         for symbol in ('EURUSD', 'GBPUSD', 'USDJPY') for n in (2, 1, 3)]
+
+
+class StubCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, sql):
+        self.sql = sql
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_checkpointed_files_are_skipped():
+    cursor = StubCursor([('FOREXCOM_EURUSD, 1 (1).csv',), ('FOREXCOM_EURUSD, 1 (2).csv',)])
+    done = completed_files(cursor)
+    assert 'ingest_checkpoints' in cursor.sql
+    remaining = unloaded(FILES, done)
+    assert len(remaining) == len(FILES) - 2
+    assert ('EURUSD', 3, 'FOREXCOM_EURUSD, 1 (3).csv') in remaining
+    assert unloaded(FILES, {f[2] for f in FILES}) == []
+
+
+def test_ordered_lanes_keep_each_symbol_on_one_writer_in_file_order():
+    lanes = plan_lanes(unloaded(FILES, {'FOREXCOM_GBPUSD, 1 (1).csv'}), 2, ordered=True)
+    assert [[(s, n) for s, n, _ in lane] for lane in lanes] == [
+        [('EURUSD', 1), ('EURUSD', 2), ('EURUSD', 3), ('USDJPY', 1), ('USDJPY', 2), ('USDJPY', 3)],
+        [('GBPUSD', 2), ('GBPUSD', 3)],
+    ]
+
+
+def test_unordered_lanes_are_balanced_and_empty_lanes_dropped():
+    lanes = plan_lanes(FILES, 4, ordered=False)
+    assert sorted(len(lane) for lane in lanes) == [2, 2, 2, 3]
+    assert plan_lanes(FILES[:1], 3, ordered=True) == [FILES[:1]]
@@ -0,0 +1,56 @@
+import os
+import time
+import mysql.connector
+from candle_reader import read_mt5_blocks, frame_rows
+from bulk_loader import BulkLoader
+
+# Insert throughput against a local MySQL/MariaDB: executemany vs LOAD DATA LOCAL INFILE.
+# Rows go to a scratch copy of `candles` that is dropped afterwards.
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': "root",
+    'password': "",
+    'database': 'trading_view_candles',
+    'allow_local_infile': True
+}
+
+CSV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'csv_files', 'EURUSD.csv')
+PAIR = 'EURUSD'
+BENCH_TABLE = 'candles_bench'
+EXECUTEMANY_CHUNK = 1000  # same as inserter.CHUNK_SIZE
+
+
+def run(cnx, cursor, frames, use_infile):
+    cursor.execute(f"TRUNCATE TABLE {BENCH_TABLE}")
+    loader = BulkLoader(cnx, cursor, BENCH_TABLE, chunk_size=EXECUTEMANY_CHUNK)
+    if not use_infile:
+        loader.use_infile = False
+    elif not loader.use_infile:
+        return None
+
+    start = time.perf_counter()
+    rows = sum(loader.load(frame) for frame in frames)
+    return rows, time.perf_counter() - start
+
+
+def main():
+    frames = list(read_mt5_blocks(CSV_FILE, PAIR))
+    cnx = mysql.connector.connect(**DB_CONFIG)
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {BENCH_TABLE} LIKE candles")
+        for label, use_infile in (('executemany', False), ('infile', True)):
+            result = run(cnx, cursor, frames, use_infile)
+            if result is None:
+                print(f"{label:>12}: skipped, local_infile is disabled on the server")
+                continue
+            rows, elapsed = result
+            print(f"{label:>12}: {rows} rows in {elapsed:.2f}s  {rows / elapsed:,.0f} rows/s")
+    finally:
+        cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+        cursor.close()
+        cnx.close()
+
+
+if __name__ == '__main__':
+    main()
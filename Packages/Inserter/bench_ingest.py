@@ -0,0 +1,57 @@
+import os
+import time
+import tracemalloc
+from inserter import parse_file
+from candle_reader import read_mt5_blocks, frame_rows
+
+# Parse-only benchmark (no database): legacy row-by-row parser vs block-wise vectorized reader
+CSV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'csv_files', 'EURUSD.csv')
+PAIR = 'EURUSD'
+REPEATS = 3
+BLOCK_SIZE = 10_000
+
+
+def parse_legacy():
+    return parse_file(CSV_FILE, PAIR)
+
+
+def parse_streaming():
+    rows = 0
+    for frame in read_mt5_blocks(CSV_FILE, PAIR, BLOCK_SIZE):
+        rows += len(frame_rows(frame))
+    return rows
+
+
+def best_of(fn):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    legacy_rows = parse_legacy()
+    streamed = [row for frame in read_mt5_blocks(CSV_FILE, PAIR, BLOCK_SIZE) for row in frame_rows(frame)]
+    if streamed != legacy_rows:
+        print("WARNING: streaming parser output differs from legacy parser")
+    rows = len(legacy_rows)
+    print(f"{CSV_FILE}: {rows} rows, best of {REPEATS}")
+
+    for label, fn in (('legacy', parse_legacy), ('stream', parse_streaming)):
+        elapsed = best_of(fn)
+        peak = peak_memory(fn) / 1024 / 1024
+        print(f"{label:>7}: {elapsed:.3f}s  {rows / elapsed:,.0f} rows/s  peak {peak:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import os
+import sys
+import numpy as np
+import mysql.connector
+from candle_reader import read_mt5_blocks, read_tradingview_file, extract_symbol_and_number
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'CandleStore'))
+from candle_cache import CandleCache, CANDLE_DTYPE, sort_unique, to_records
+
+# Build or extend the memory-mapped candle cache read by the MtDriver's /get_candles_in
+# (fromdb=1). Without `rebuild`, only candles newer than the last cached one are fetched
+# and appended, so this can be re-run after every import.
+
+db_config = {
+    'user': 'root',
+    'password': '',
+    'host': 'localhost',
+    'database': 'trading_view_candles'
+}
+
+cache_dir = 'Data/candle_cache'  # must match CANDLE_CACHE_DIR in MtDriver/shared.py
+source = 'db'           # 'db': candles table | 'mt5_csv': MT5 exports | 'tradingview_csv': TradingView exports
+symbols = None          # Restrict to these symbols, None for every symbol in the source
+rebuild = False         # Rewrite the cache files instead of appending new candles
+chunk_size = 200000     # Rows fetched per query
+mt5_csv_dir = 'csv_files'
+tradingview_csv_dir = 'trading-view_candles_csv'
+
+
+def db_chunks(cursor, name, after):
+    """Yield CANDLE_DTYPE chunks of name with closeTime > after, by keyset on (name, closeTime)"""
+    while True:
+        cursor.execute("""
+            SELECT closeTime, open, high, low, close
+            FROM candles
+            WHERE name = %s AND period = 'PERIOD_M1' AND closeTime > %s
+            ORDER BY closeTime ASC
+            LIMIT %s
+        """, (name, after, chunk_size))
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        yield np.array(rows, dtype=CANDLE_DTYPE)
+        after = rows[-1][0]
+        if len(rows) < chunk_size:
+            return
+
+
+def from_db(cache):
+    conn = mysql.connector.connect(**db_config)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT DISTINCT name FROM candles ORDER BY name")
+        names = [row[0] for row in cursor.fetchall()]
+        for name in names:
+            if symbols and name not in symbols:
+                continue
+            bounds = None if rebuild else cache.bounds(name)
+            after = bounds[1] if bounds else -1
+            chunks = db_chunks(cursor, name, after)
+            if rebuild:
+                count = cache.build(name, np.concatenate(list(chunks) or [np.empty(0, dtype=CANDLE_DTYPE)]))
+            else:
+                # Keyset chunks hold every row after `after`, so each one extends the complete range
+                count = 0
+                for chunk in chunks:
+                    count += cache.append(name, chunk, since=after)
+                    after = int(chunk['closeTime'][-1])
+            print(f"{name}: {count} candles {'cached' if rebuild else 'appended'}")
+    finally:
+        cursor.close()
+        conn.close()
+        print("Database connection closed")
+
+
+def csv_frames():
+    """Yield (symbol, candles frame) from the configured CSV source, oldest first per symbol"""
+    if source == 'mt5_csv':
+        for fname in sorted(os.listdir(mt5_csv_dir)):
+            if fname.lower().endswith('.csv'):
+                pair = os.path.splitext(fname)[0].upper()
+                for frame in read_mt5_blocks(os.path.join(mt5_csv_dir, fname), pair):
+                    yield pair, frame
+    else:
+        files = [extract_symbol_and_number(f) for f in os.listdir(tradingview_csv_dir) if f.endswith('.csv')]
+        for symbol, _, filename in sorted(f for f in files if f is not None):
+            yield symbol, read_tradingview_file(os.path.join(tradingview_csv_dir, filename), symbol)
+
+
+def from_csv(cache):
+    collected = {}
+    for symbol, frame in csv_frames():
+        if symbols and symbol not in symbols:
+            continue
+        collected.setdefault(symbol, []).append(to_records(frame))
+    for symbol, parts in collected.items():
+        records = sort_unique(np.concatenate(parts))
+        if rebuild:
+            count = cache.build(symbol, records)
+        else:
+            bounds = cache.bounds(symbol)
+            count = cache.append(symbol, records, since=bounds[1] if bounds else None)
+        print(f"{symbol}: {count} candles {'cached' if rebuild else 'appended'}")
+
+
+def main():
+    cache = CandleCache(cache_dir)
+    if source == 'db':
+        from_db(cache)
+    else:
+        from_csv(cache)
+
+
+if __name__ == '__main__':
+    main()
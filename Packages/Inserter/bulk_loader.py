@@ -0,0 +1,154 @@
+import csv
+import os
+import tempfile
+import mysql.connector
+from candle_reader import CANDLE_COLUMNS, PRICE_COLUMNS, frame_rows
+
+ON_DUPLICATE_MODES = (None, 'ignore', 'update')
+UPDATE_ASSIGNMENTS = ', '.join(f"{column} = VALUES({column})" for column in PRICE_COLUMNS + ['time'])
+
+# mysql.connector error numbers raised when LOCAL INFILE is refused
+LOCAL_INFILE_ERRORS = {
+    1148,  # ER_NOT_ALLOWED_COMMAND (older servers)
+    2068,  # CR_LOAD_DATA_LOCAL_INFILE_REJECTED (client side)
+    3948,  # ER_CLIENT_LOCAL_FILES_DISABLED
+}
+
+
+def write_tsv(data, fh):
+    """Write a candles frame or a list of row tuples as tab-separated lines"""
+    if hasattr(data, 'to_csv'):
+        data.to_csv(fh, sep='\t', header=False, index=False, columns=CANDLE_COLUMNS, lineterminator='\n')
+    else:
+        csv.writer(fh, delimiter='\t', lineterminator='\n').writerows(data)
+
+
+def insert_statement(table='candles', on_duplicate=None):
+    """Parameterized candles INSERT for executemany().
+
+    on_duplicate decides what happens to rows that hit the unique
+    (name, period, closeTime) key: None raises, 'ignore' keeps the stored
+    candle, 'update' overwrites its OHLC with the imported values.
+    """
+    columns = ', '.join(CANDLE_COLUMNS)
+    values = ', '.join(['%s'] * len(CANDLE_COLUMNS))
+    verb = 'INSERT IGNORE' if on_duplicate == 'ignore' else 'INSERT'
+    sql = f"{verb} INTO {table} ({columns}) VALUES ({values})"
+    if on_duplicate == 'update':
+        sql += f" ON DUPLICATE KEY UPDATE {UPDATE_ASSIGNMENTS}"
+    return sql
+
+
+def as_rows(data):
+    return frame_rows(data) if hasattr(data, 'to_csv') else data
+
+
+class BulkLoader:
+    """Loads candles with LOAD DATA LOCAL INFILE via a temporary TSV file.
+
+    The connection must be opened with allow_local_infile=True. When the
+    server has local_infile disabled (or refuses the request) the loader
+    falls back to chunked executemany() for the rest of its lifetime.
+
+    LOAD DATA LOCAL turns duplicate-key errors into warnings (as if IGNORE
+    were given), so only on_duplicate='ignore' loads into the table
+    directly. Otherwise the file is loaded into a key-less temporary staging
+    table and copied over with INSERT ... SELECT: plain for None, so a
+    duplicate raises as it does with executemany, and with ON DUPLICATE KEY
+    UPDATE for 'update', so existing rows keep their ids (LOAD DATA ...
+    REPLACE would delete and re-insert them).
+    """
+
+    def __init__(self, cnx, cursor, table='candles', chunk_size=10000, tmp_dir=None, on_duplicate=None):
+        if on_duplicate not in ON_DUPLICATE_MODES:
+            raise ValueError(f"on_duplicate must be one of {ON_DUPLICATE_MODES}")
+        self.cnx = cnx
+        self.cursor = cursor
+        self.table = table
+        self.on_duplicate = on_duplicate
+        self.staging_table = f"{table}_staging"
+        self._staging_ready = False
+        self.chunk_size = chunk_size
+        self.tmp_dir = tmp_dir
+        self.use_infile = self.local_infile_enabled()
+        if not self.use_infile:
+            print("local_infile is disabled on the server, using executemany")
+
+    def local_infile_enabled(self) -> bool:
+        try:
+            self.cursor.execute("SELECT @@GLOBAL.local_infile")
+            return bool(int(self.cursor.fetchone()[0]))
+        except mysql.connector.Error as err:
+            print(f"Could not read local_infile: {err}")
+            return False
+
+    def load_sql(self, table, ignore=False):
+        return f"""
+        LOAD DATA LOCAL INFILE %s {'IGNORE ' if ignore else ''}INTO TABLE {table}
+        FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n'
+        ({', '.join(CANDLE_COLUMNS)})"""
+
+    @property
+    def insert_sql(self):
+        return insert_statement(self.table, self.on_duplicate)
+
+    def _prepare_staging(self):
+        if not self._staging_ready:
+            # Same columns without the keys: every row of the file reaches the merge
+            columns = ', '.join(CANDLE_COLUMNS)
+            self.cursor.execute(f"""
+            CREATE TEMPORARY TABLE IF NOT EXISTS {self.staging_table}
+            AS SELECT {columns} FROM {self.table} LIMIT 0""")
+            self._staging_ready = True
+        self.cursor.execute(f"DELETE FROM {self.staging_table}")
+
+    def _merge_staging(self) -> int:
+        columns = ', '.join(CANDLE_COLUMNS)
+        sql = f"INSERT INTO {self.table} ({columns}) SELECT {columns} FROM {self.staging_table}"
+        if self.on_duplicate == 'update':
+            sql += f" ON DUPLICATE KEY UPDATE {UPDATE_ASSIGNMENTS}"
+        self.cursor.execute(sql)
+        return self.cursor.rowcount
+
+    def load(self, data, commit=True) -> int:
+        """Load a candles frame or list of row tuples; returns rows written"""
+        if self.use_infile:
+            try:
+                return self._load_infile(data, commit)
+            except mysql.connector.Error as err:
+                if err.errno not in LOCAL_INFILE_ERRORS:
+                    raise
+                print(f"LOAD DATA LOCAL INFILE refused ({err}), falling back to executemany")
+                self.use_infile = False
+        return self._load_executemany(as_rows(data), commit)
+
+    def _load_infile(self, data, commit) -> int:
+        fd, path = tempfile.mkstemp(suffix='.tsv', dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as fh:
+                write_tsv(data, fh)
+            # Forward slashes keep Windows paths valid inside the SQL string
+            path_arg = (path.replace('\\', '/'),)
+            if self.on_duplicate == 'ignore':
+                self.cursor.execute(self.load_sql(self.table, ignore=True), path_arg)
+                loaded = self.cursor.rowcount
+            else:
+                self._prepare_staging()
+                self.cursor.execute(self.load_sql(self.staging_table), path_arg)
+                loaded = self._merge_staging()
+            if commit:
+                self.cnx.commit()
+            return loaded
+        except mysql.connector.Error:
+            if commit:
+                self.cnx.rollback()
+            raise
+        finally:
+            os.remove(path)
+
+    def _load_executemany(self, rows, commit) -> int:
+        for i in range(0, len(rows), self.chunk_size):
+            self.cursor.executemany(self.insert_sql, rows[i:i+self.chunk_size])
+        if commit:
+            self.cnx.commit()
+        return len(rows)
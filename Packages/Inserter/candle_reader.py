@@ -0,0 +1,105 @@
+import re
+from functools import lru_cache
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytz
+
+# Column order of the `candles` insert statements
+CANDLE_COLUMNS = ['name', 'period', 'open', 'high', 'low', 'close', 'closeTime', 'time']
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+MT5_CSV_COLUMNS = ['date', 'clock', 'open', 'high', 'low', 'close', 'volume']
+TRADINGVIEW_CSV_COLUMNS = ['time', 'open', 'high', 'low', 'close']
+
+BLOCK_SIZE = 100_000
+SOURCE_TZ = pytz.timezone('Asia/Tehran')
+EPOCH = datetime(1970, 1, 1)
+
+
+@lru_cache(maxsize=None)
+def hour_offset(naive_hour_epoch):
+    """UTC offset in seconds of SOURCE_TZ for the naive wall-clock hour.
+
+    Tehran DST switches happen on the hour, so one offset per hour is exact.
+    Uses the same pytz.localize() rule as inserter.convert_to_utc_unix.
+    """
+    naive_dt = EPOCH + timedelta(seconds=naive_hour_epoch)
+    return int(SOURCE_TZ.localize(naive_dt).utcoffset().total_seconds())
+
+
+def local_to_utc_unix(naive_seconds):
+    """Vectorized SOURCE_TZ wall-clock seconds -> UTC unix seconds"""
+    hours, inverse = np.unique(naive_seconds // 3600 * 3600, return_inverse=True)
+    offsets = np.fromiter((hour_offset(int(h)) for h in hours), dtype=np.int64, count=len(hours))
+    return naive_seconds - offsets[inverse]
+
+
+def local_time_strings(close_times):
+    """Vectorized UTC unix seconds -> SOURCE_TZ wall-clock 'YYYY-MM-DDTHH:MM', the `time` column of MT5 imports"""
+    utc = pd.to_datetime(np.asarray(close_times, dtype=np.int64), unit='s', utc=True)
+    return utc.tz_convert(SOURCE_TZ).strftime('%Y-%m-%dT%H:%M').tolist()
+
+
+def parse_mt5_block(block, pair_name):
+    """Turn a raw MT5 export block into a candles frame; returns (frame, skipped)"""
+    naive = pd.to_datetime(block['date'] + ' ' + block['clock'], format='%Y.%m.%d %H:%M', errors='coerce')
+    prices = block[PRICE_COLUMNS].apply(pd.to_numeric, errors='coerce')
+    valid = naive.notna().to_numpy() & prices.notna().all(axis=1).to_numpy()
+    skipped = int(len(block) - valid.sum())
+
+    naive_seconds = naive[valid].to_numpy(dtype='datetime64[s]').astype(np.int64)
+    frame = prices[valid].astype(np.float64)
+    frame.insert(0, 'name', pair_name)
+    frame.insert(1, 'period', 'PERIOD_M1')
+    frame['closeTime'] = local_to_utc_unix(naive_seconds)
+    frame['time'] = block['date'][valid].str.replace('.', '-', regex=False) + 'T' + block['clock'][valid]
+    return frame.sort_values('closeTime', kind='stable'), skipped
+
+
+def read_mt5_blocks(file_path, pair_name, block_size=BLOCK_SIZE):
+    """Yield candles frames of at most block_size rows from an MT5 M1 export.
+
+    The file is read block by block, so memory is bounded by block_size
+    regardless of the file length. Rows are sorted within each block; MT5
+    exports are already chronological across blocks.
+    """
+    reader = pd.read_csv(
+        file_path, header=None, names=MT5_CSV_COLUMNS, usecols=range(6),
+        dtype=str, chunksize=block_size, on_bad_lines='skip',
+    )
+    with reader:
+        for block in reader:
+            frame, skipped = parse_mt5_block(block, pair_name)
+            if skipped:
+                print(f"Skipping {skipped} invalid rows in {pair_name}")
+            yield frame
+
+
+def frame_rows(frame):
+    """Candles frame -> list of DB-ready tuples of native Python values"""
+    return list(zip(*(frame[column].tolist() for column in CANDLE_COLUMNS)))
+
+
+def extract_symbol_and_number(filename):
+    """'FOREXCOM_EURUSD, 1 (12).csv' -> ('EURUSD', 12, filename), None if unmatched"""
+    parts = filename.split('_')
+    if len(parts) == 2:
+        symbol_part = parts[1].split(',')[0]
+        match = re.search(r'\((\d+)\)\.csv', filename)
+        if match:
+            number = int(match.group(1))
+            return symbol_part, number, filename
+    return None
+
+
+def read_tradingview_file(file_path, symbol):
+    """Parse a TradingView M1 export (ISO-8601 UTC times) into a candles frame"""
+    raw = pd.read_csv(file_path, usecols=TRADINGVIEW_CSV_COLUMNS, dtype={'time': str})
+    close_time = pd.to_datetime(raw['time'], utc=True, format='ISO8601')
+    frame = raw[PRICE_COLUMNS].astype(np.float64)
+    frame.insert(0, 'name', symbol)
+    frame.insert(1, 'period', 'PERIOD_M1')
+    frame['closeTime'] = close_time.to_numpy(dtype='datetime64[s]').astype(np.int64)
+    frame['time'] = raw['time']
+    return frame
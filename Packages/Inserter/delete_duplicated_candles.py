@@ -10,104 +10,124 @@ db_config = {
 }
 
 # Parameters
-symbol_name = 'GBPUSD'  # Replace with the specific name (e.g., 'EURUSD', 'GBPUSD', 'DXY')
-batch_size = 10000       # Number of rows to process per batch
-index_name = 'idx_name_closeTime'
+symbol_name = 'GBPUSD'  # Replace with the specific name (e.g., 'EURUSD', 'GBPUSD', 'DXY'), None for all symbols
+batch_size = 10000       # Number of duplicate ids deleted per transaction
+dry_run = False          # Only report duplicates, delete nothing
+index_name = 'idx_name_period_closeTime'  # same columns as migrate_unique_candles' unique key
 
-try:
-    # Validate batch size
-    if batch_size < 1 or batch_size > 100000:
-        raise ValueError("batch_size must be between 1 and 100000")
 
-    # Connect to the database with buffered cursor
-    conn = mysql.connector.connect(**db_config, buffered=True)
-    cursor = conn.cursor()
-
-    # Check if index exists; create if not
+def ensure_index(conn, cursor):
     cursor.execute("""
-        SELECT COUNT(*) 
-        FROM information_schema.statistics 
-        WHERE table_name = 'candles' 
+        SELECT COUNT(*)
+        FROM information_schema.statistics
+        WHERE table_name = 'candles'
         AND index_name = %s
     """, (index_name,))
     if cursor.fetchone()[0] == 0:
         print(f"Creating index {index_name} for performance...")
-        cursor.execute(f"CREATE INDEX {index_name} ON candles (name, closeTime)")
+        cursor.execute(f"CREATE INDEX {index_name} ON candles (name, period, closeTime)")
         conn.commit()
 
-    # Get total number of duplicate candles for the specific name
-    cursor.execute("""
-        SELECT COUNT(*) 
+
+def collect_duplicates(cursor, name):
+    """Find every duplicate in one ordered scan of the (name, period, closeTime) index.
+
+    ROW_NUMBER() numbers the rows of each (name, period, closeTime) group by
+    id, so an M1 and an H1 bar closing together are not duplicates; all
+    but the first (lowest id) go into a temp table of ids to delete.
+    Requires MySQL 8.0+ / MariaDB 10.2+.
+    """
+    where = "WHERE name = %s" if name else ""
+    cursor.execute("DROP TEMPORARY TABLE IF EXISTS duplicate_candles")
+    cursor.execute(f"""
+        CREATE TEMPORARY TABLE duplicate_candles (PRIMARY KEY (id))
+        SELECT id, name
         FROM (
-            SELECT id
-            FROM candles c1
-            WHERE name = %s
-            AND EXISTS (
-                SELECT 1 
-                FROM candles c2 
-                WHERE c2.name = c1.name 
-                AND c2.closeTime = c1.closeTime 
-                AND c2.id < c1.id
-            )
-        ) AS duplicates
-    """, (symbol_name,))
-    total_duplicates = cursor.fetchone()[0]
-
-    if total_duplicates == 0:
-        print(f"No duplicate candles found for name '{symbol_name}'")
-        exit()
-
-    print(f"Found {total_duplicates} duplicate candles for '{symbol_name}' to delete in batches of {batch_size}")
-
-    # Delete duplicates in batches by selecting IDs first
+            SELECT id, name,
+                   ROW_NUMBER() OVER (PARTITION BY name, period, closeTime ORDER BY id) AS rn
+            FROM candles
+            {where}
+        ) AS ranked
+        WHERE rn > 1
+    """, (name,) if name else ())
+    cursor.execute("SELECT name, COUNT(*) FROM duplicate_candles GROUP BY name ORDER BY name")
+    return cursor.fetchall()
+
+
+def delete_duplicates(conn, cursor, total):
+    """Delete the collected ids in ascending id-range batches"""
     processed_duplicates = 0
+    last_id = 0
     while True:
-        # Step 1: Select IDs of duplicates to delete
         cursor.execute("""
-            SELECT c1.id
-            FROM candles c1
-            WHERE name = %s
-            AND EXISTS (
-                SELECT 1 
-                FROM candles c2 
-                WHERE c2.name = c1.name 
-                AND c2.closeTime = c1.closeTime 
-                AND c2.id < c1.id
-            )
-            LIMIT %s
-        """, (symbol_name, batch_size))
-
-        ids_to_delete = [row[0] for row in cursor.fetchall()]
-        if not ids_to_delete:
+            SELECT MAX(id) FROM (
+                SELECT id FROM duplicate_candles WHERE id > %s ORDER BY id LIMIT %s
+            ) AS batch
+        """, (last_id, batch_size))
+        upper_id = cursor.fetchone()[0]
+        if upper_id is None:
             break
 
-        # Step 2: Delete the selected IDs
-        placeholders = ','.join(['%s'] * len(ids_to_delete))
-        cursor.execute(f"""
-            DELETE FROM candles
-            WHERE id IN ({placeholders})
-        """, ids_to_delete)
-
+        cursor.execute("""
+            DELETE c FROM candles c
+            JOIN duplicate_candles d ON d.id = c.id
+            WHERE d.id > %s AND d.id <= %s
+        """, (last_id, upper_id))
         affected_rows = cursor.rowcount
         conn.commit()
+        last_id = upper_id
 
         processed_duplicates += affected_rows
-        percentage = (processed_duplicates / total_duplicates) * 100 if total_duplicates > 0 else 100
-        print(f"Progress: Deleted {processed_duplicates}/{total_duplicates} duplicates ({percentage:.2f}% complete)")
+        percentage = (processed_duplicates / total) * 100 if total > 0 else 100
+        print(f"Progress: Deleted {processed_duplicates}/{total} duplicates ({percentage:.2f}% complete)")
+    return processed_duplicates
 
-except mysql.connector.Error as e:
-    print(f"Database error: {e}")
-except ValueError as ve:
-    print(f"Configuration error: {ve}")
-except Exception as e:
-    print(f"Unexpected error: {e}")
 
-finally:
+def main():
+    conn = None
+    cursor = None
     try:
-        if 'cursor' in locals() and cursor is not None:
-            cursor.close()
-        if 'conn' in locals() and conn is not None and conn.is_connected():
-            conn.close()
-        print("Database connection closed")
+        # Validate batch size
+        if batch_size < 1 or batch_size > 100000:
+            raise ValueError("batch_size must be between 1 and 100000")
+
+        conn = mysql.connector.connect(**db_config, buffered=True)
+        cursor = conn.cursor()
+        ensure_index(conn, cursor)
+
+        scope = f"name '{symbol_name}'" if symbol_name else "all symbols"
+        per_symbol = collect_duplicates(cursor, symbol_name)
+        total_duplicates = sum(count for _, count in per_symbol)
+        if total_duplicates == 0:
+            print(f"No duplicate candles found for {scope}")
+            return
+
+        for name, count in per_symbol:
+            print(f"{name}: {count} duplicate candles")
+        if dry_run:
+            print(f"Dry run: {total_duplicates} duplicate candles for {scope} would be deleted")
+            return
+
+        print(f"Deleting {total_duplicates} duplicate candles for {scope} in batches of {batch_size}")
+        delete_duplicates(conn, cursor, total_duplicates)
+
+    except mysql.connector.Error as e:
+        print(f"Database error: {e}")
+    except ValueError as ve:
+        print(f"Configuration error: {ve}")
     except Exception as e:
-        print(f"Error closing connection: {e}")
\ No newline at end of file
+        print(f"Unexpected error: {e}")
+
+    finally:
+        try:
+            if cursor is not None:
+                cursor.close()
+            if conn is not None and conn.is_connected():
+                conn.close()
+            print("Database connection closed")
+        except Exception as e:
+            print(f"Error closing connection: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+import csv
+import json
+from datetime import datetime, date, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+M1_SECONDS = 60
+
+
+def to_iso(ts):
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class FxCalendar:
+    """Weekly FX session plus holiday closures, expressed in one timezone.
+
+    Defaults follow the usual FX convention: the week closes Friday 17:00 and
+    reopens Sunday 17:00 New York time, and a trading day D runs from 17:00 on
+    D-1 to 17:00 on D, so a holiday closes exactly that window. Extra
+    closures can be given as (start, end) ISO strings.
+    """
+
+    def __init__(self, tz='America/New_York', week_close=(4, '17:00'), week_open=(6, '17:00'),
+                 holidays=(), closures=()):
+        self.tz = ZoneInfo(tz)
+        self.close_weekday, self.close_time = week_close[0], time.fromisoformat(week_close[1])
+        self.open_weekday, self.open_time = week_open[0], time.fromisoformat(week_open[1])
+        self.holidays = [date.fromisoformat(d) if isinstance(d, str) else d for d in holidays]
+        self.extra = [(self._parse(start), self._parse(end)) for start, end in closures]
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(**config)
+
+    def _parse(self, value):
+        dt = datetime.fromisoformat(value)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=self.tz)
+        return int(dt.timestamp())
+
+    def _at(self, day, at):
+        return int(datetime.combine(day, at, tzinfo=self.tz).timestamp())
+
+    def closures(self, start, end):
+        """Merged, sorted [start, end) closed intervals overlapping start..end (unix seconds)"""
+        first = datetime.fromtimestamp(start, tz=self.tz).date() - timedelta(days=7)
+        last = datetime.fromtimestamp(end, tz=self.tz).date() + timedelta(days=7)
+        intervals = []
+
+        day = first + timedelta(days=(self.close_weekday - first.weekday()) % 7)
+        while day <= last:
+            reopen = day + timedelta(days=(self.open_weekday - day.weekday()) % 7 or 7)
+            intervals.append((self._at(day, self.close_time), self._at(reopen, self.open_time)))
+            day += timedelta(days=7)
+
+        for holiday in self.holidays:
+            if first <= holiday <= last:
+                intervals.append((self._at(holiday - timedelta(days=1), self.open_time),
+                                  self._at(holiday, self.open_time)))
+        intervals.extend(i for i in self.extra if i[1] >= start and i[0] <= end)
+
+        merged = []
+        for s, e in sorted(intervals):
+            if merged and s <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], e)
+            else:
+                merged.append([s, e])
+        arr = np.array(merged, dtype=np.int64).reshape(-1, 2)
+        return arr[:, 0], arr[:, 1]
+
+
+def closed_seconds_before(x, starts, ends):
+    """Vectorized total closed time in (-inf, x) for each x"""
+    if len(starts) == 0:
+        return np.zeros_like(x)
+    lengths = ends - starts
+    before = np.concatenate(([0], np.cumsum(lengths)))
+    k = np.searchsorted(starts, x, side='right')
+    partial = np.clip(x - starts[np.maximum(k - 1, 0)], 0, lengths[np.maximum(k - 1, 0)])
+    return before[np.maximum(k - 1, 0)] + np.where(k > 0, partial, 0)
+
+
+def find_gaps(close_times, calendar, step=M1_SECONDS):
+    """Missing-candle ranges in a sorted closeTime array, ignoring closures.
+
+    Returns (first_missing, last_missing, missing_count) arrays. Ranges are
+    trimmed so they start and end on open-market minutes; the count only
+    includes minutes when the market was open.
+    """
+    t = np.asarray(close_times, dtype=np.int64)
+    empty = np.array([], dtype=np.int64)
+    if len(t) < 2:
+        return empty, empty, empty
+    idx = np.flatnonzero(np.diff(t) > step)
+    if len(idx) == 0:
+        return empty, empty, empty
+
+    starts, ends = calendar.closures(int(t[0]), int(t[-1]))
+    gap_from = t[idx] + step       # first expected candle
+    gap_to = t[idx + 1]            # next candle actually present (exclusive)
+    closed = closed_seconds_before(gap_to, starts, ends) - closed_seconds_before(gap_from, starts, ends)
+    missing = (gap_to - gap_from - closed) // step
+
+    # Trim range ends that fall inside a closure to the closure boundary
+    if len(starts):
+        k = np.searchsorted(starts, gap_from, side='right') - 1
+        inside = (k >= 0) & (gap_from < ends[np.maximum(k, 0)])
+        gap_from = np.where(inside, -(-ends[np.maximum(k, 0)] // step) * step, gap_from)
+        last = gap_to - step
+        k = np.searchsorted(starts, last, side='right') - 1
+        inside = (k >= 0) & (last < ends[np.maximum(k, 0)])
+        gap_to = np.where(inside, (starts[np.maximum(k, 0)] - 1) // step * step + step, gap_to)
+
+    keep = missing > 0
+    return gap_from[keep], gap_to[keep] - step, missing[keep]
+
+
+def find_irregular(ids, close_times, previous, min_diff):
+    """Candles closer than min_diff seconds to their predecessor (duplicates, misaligned bars)"""
+    t = np.asarray(close_times, dtype=np.int64)
+    ids = np.asarray(ids)
+    if previous is not None:
+        diffs = np.diff(t, prepend=previous)
+    else:
+        diffs, t, ids = np.diff(t), t[1:], ids[1:]
+    bad = np.flatnonzero(diffs < min_diff)
+    return ids[bad], t[bad], diffs[bad]
+
+
+class GapReport:
+    """Accumulates gaps per symbol from closeTime chunks and writes JSON/CSV"""
+
+    def __init__(self, calendar=None, step=M1_SECONDS, min_diff=55):
+        self.calendar = calendar or FxCalendar()
+        self.step = step
+        self.min_diff = min_diff
+        self.symbols = {}
+        self._last = {}
+
+    def add_chunk(self, symbol, ids, close_times):
+        """Feed the next ordered chunk; the previous chunk's last candle is carried over"""
+        t = np.asarray(close_times, dtype=np.int64)
+        if len(t) == 0:
+            return
+        entry = self.symbols.setdefault(symbol, {'candles': 0, 'gaps': [], 'irregular': []})
+        previous = self._last.get(symbol)
+        entry['candles'] += len(t)
+
+        for id_, ts, diff in zip(*find_irregular(ids, t, previous, self.min_diff)):
+            entry['irregular'].append({'id': int(id_), 'closeTime': int(ts), 'diff': int(diff)})
+
+        series = t if previous is None else np.concatenate(([previous], t))
+        for start, end, missing in zip(*find_gaps(series, self.calendar, self.step)):
+            entry['gaps'].append({
+                'start': int(start), 'end': int(end),
+                'start_iso': to_iso(start), 'end_iso': to_iso(end),
+                'missing': int(missing),
+            })
+        self._last[symbol] = int(t[-1])
+
+    def summary(self, symbol):
+        entry = self.symbols.get(symbol, {'candles': 0, 'gaps': [], 'irregular': []})
+        missing = sum(g['missing'] for g in entry['gaps'])
+        return f"{symbol}: {entry['candles']} candles, {len(entry['gaps'])} gaps, " \
+               f"{missing} missing minutes, {len(entry['irregular'])} irregular candles"
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'generated_at': to_iso(datetime.now(timezone.utc).timestamp()),
+                'step': self.step,
+                'symbols': self.symbols,
+            }, f, indent=2)
+
+    def write_csv(self, path):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['symbol', 'start', 'end', 'start_iso', 'end_iso', 'missing'])
+            for symbol, entry in self.symbols.items():
+                for g in entry['gaps']:
+                    writer.writerow([symbol, g['start'], g['end'], g['start_iso'], g['end_iso'], g['missing']])
+
+
+def load_gaps(path):
+    """Read a JSON gap report back as {symbol: [gap, ...]}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    return {symbol: entry['gaps'] for symbol, entry in report['symbols'].items()}
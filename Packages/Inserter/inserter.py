@@ -2,19 +2,31 @@ import csv
 import mysql.connector
 import pytz
 import os
+import sys
 from datetime import datetime
+from candle_reader import read_mt5_blocks, frame_rows, BLOCK_SIZE
+from bulk_loader import BulkLoader, insert_statement
 
 # Configuration
+# Rows hitting the unique (name, period, closeTime) key created by migrate_unique_candles.py:
+# None: fail | 'ignore': keep the stored candle | 'update': overwrite it with the imported one
+ON_DUPLICATE = 'ignore'
+
 DB_CONFIG = {
     'host': 'localhost',
     'user': "root",
     'password': "",
     'database': 'trading_view_candles',
-    'raise_on_warnings': True
+    'raise_on_warnings': ON_DUPLICATE is None,  # skipped duplicates are reported as warnings
+
+    'allow_local_infile': True
 }
 
 CHUNK_SIZE = 1000
+INGEST_MODE = 'stream'  # 'stream': block-wise vectorized parsing | 'legacy': whole file, row by row
+LOAD_METHOD = 'infile'  # 'infile': LOAD DATA LOCAL INFILE (falls back to executemany) | 'executemany'
 TABLE_NAME = 'candles'
+STORE_DIR = None  # Also write streamed candles to the Parquet CandleStore here, e.g. 'Data/candle_store'
 CSV_DIRECTORY = 'Packages/Inserter/csv_files' # Hardcoded directory name
 
 def convert_to_utc_unix(date_str, time_str):
@@ -23,7 +35,7 @@ def convert_to_utc_unix(date_str, time_str):
     tehran_dt = tehran_tz.localize(naive_dt)
     return int(tehran_dt.astimezone(pytz.utc).timestamp())
 
-def process_file(cnx, cursor, file_path, pair_name):
+def parse_file(file_path, pair_name):
     data = []
     with open(file_path, 'r') as f:
         reader = csv.reader(f)
@@ -46,7 +58,11 @@ def process_file(cnx, cursor, file_path, pair_name):
 
     # Sort by closeTime ascending
     data.sort(key=lambda x: x[6])
-    
+    return data
+
+def process_file(cnx, cursor, file_path, pair_name):
+    data = parse_file(file_path, pair_name)
+
     # Insert in chunks
     total = len(data)
     for i in range(0, total, CHUNK_SIZE):
@@ -54,12 +70,24 @@ def process_file(cnx, cursor, file_path, pair_name):
         insert_chunk(cnx, cursor, chunk)
         print(f"{pair_name}: Inserted {min(i+CHUNK_SIZE, total)}/{total}")
 
+def process_file_streaming(cnx, cursor, file_path, pair_name, block_size=BLOCK_SIZE, loader=None, store=None):
+    """Parse and insert the file block by block, never holding it all in memory"""
+    total = 0
+    for frame in read_mt5_blocks(file_path, pair_name, block_size):
+        if store:
+            store.write(frame)
+        if loader:
+            loader.load(frame)
+        else:
+            rows = frame_rows(frame)
+            for i in range(0, len(rows), CHUNK_SIZE):
+                insert_chunk(cnx, cursor, rows[i:i+CHUNK_SIZE])
+        total += len(frame)
+        print(f"{pair_name}: Inserted {total}")
+
 def insert_chunk(cnx, cursor, chunk):
-    sql = f"""
-    INSERT INTO {TABLE_NAME} 
-        (name, period, open, high, low, close, closeTime, time)
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"""
-    
+    sql = insert_statement(TABLE_NAME, ON_DUPLICATE)
+
     try:
         cursor.executemany(sql, chunk)
         cnx.commit()
@@ -95,14 +123,24 @@ def main():
         cnx = mysql.connector.connect(**DB_CONFIG)
         cursor = cnx.cursor()
         
-        # Optimize for bulk inserts
+        # Optimize for bulk inserts. unique_checks stays on: the (name, period, closeTime)
+        # key is what makes ON_DUPLICATE work, and InnoDB may skip it when the checks are off
         cursor.execute("SET autocommit = 0")
-        cursor.execute("SET unique_checks = 0")
         cursor.execute("SET foreign_key_checks = 0")
 
+        store = None
+        if STORE_DIR:  # the Parquet store needs pyarrow; plain MySQL imports do not
+            sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'CandleStore'))
+            from candle_store import CandleStore
+            store = CandleStore(STORE_DIR)
+        loader = BulkLoader(cnx, cursor, TABLE_NAME, on_duplicate=ON_DUPLICATE) if LOAD_METHOD == 'infile' else None
+
         for path, pair in csv_files:
             print(f"\nProcessing {pair} ({path})")
-            process_file(cnx, cursor, path, pair)
+            if INGEST_MODE == 'stream':
+                process_file_streaming(cnx, cursor, path, pair, loader=loader, store=store)
+            else:
+                process_file(cnx, cursor, path, pair)
 
         print("\nAll files processed successfully!")
 
@@ -110,7 +148,6 @@ def main():
         print(f"Database error: {err}")
     finally:
         if cnx.is_connected():
-            cursor.execute("SET unique_checks = 1")
             cursor.execute("SET foreign_key_checks = 1")
             cursor.close()
             cnx.close()
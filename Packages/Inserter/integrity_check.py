@@ -1,5 +1,6 @@
 import mysql.connector
 from mysql.connector import Error
+from gap_report import FxCalendar, GapReport
 
 # Database connection parameters (replace with your credentials)
 db_config = {
@@ -10,25 +11,19 @@ db_config = {
 }
 
 # Parameters
-symbol_name = 'EURUSD'  # Replace with the specific name (e.g., 'EURUSD', 'GBPUSD', 'DXY')
-chunk_size = 1000000      # Number of rows per chunk
+symbol_name = 'EURUSD'  # Replace with the specific name (e.g., 'EURUSD', 'GBPUSD', 'DXY'), None for all symbols
+chunk_size = 100000      # Number of rows per chunk
 min_time_diff = 55      # Minimum allowed time difference in seconds
-max_time_diff = 173000   # Maximum allowed time difference in seconds
+calendar_file = None     # JSON file with FxCalendar arguments (timezone, week_close/week_open, holidays, closures)
+report_json = 'gap_report.json'  # Missing-minute ranges per symbol, input for refetch_gaps.py
+report_csv = 'gap_report.csv'
 
-try:
-    # Validate chunk size
-    if chunk_size < 1 or chunk_size > 1000000:
-        raise ValueError("chunk_size must be between 1 and 100000")
 
-    # Connect to the database with buffered cursor
-    conn = mysql.connector.connect(**db_config, buffered=True)
-    cursor = conn.cursor()
-
-    # Check if index exists; create if not
+def ensure_index(conn, cursor):
     cursor.execute("""
-        SELECT COUNT(*) 
-        FROM information_schema.statistics 
-        WHERE table_name = 'candles' 
+        SELECT COUNT(*)
+        FROM information_schema.statistics
+        WHERE table_name = 'candles'
         AND index_name = 'idx_name_closeTime'
     """)
     if cursor.fetchone()[0] == 0:
@@ -36,69 +31,110 @@ try:
         cursor.execute("CREATE INDEX idx_name_closeTime ON candles (name, closeTime)")
         conn.commit()
 
-    # Get total number of candles for the specific name
-    cursor.execute("SELECT COUNT(*) FROM candles WHERE name = %s ORDER BY closeTime ASC", (symbol_name,))
-    total_candles = cursor.fetchone()[0]
-    if total_candles == 0:
-        print(f"No candles found for name '{symbol_name}'")
-        exit()
 
-    print(f"Processing {total_candles} candles for '{symbol_name}' in chunks of {chunk_size}")
+def list_symbols(cursor):
+    cursor.execute("SELECT DISTINCT name FROM candles ORDER BY name")
+    return [row[0] for row in cursor.fetchall()]
 
-    # Fetch candles in chunks, ordered by closeTime
-    offset = 0
-    processed_candles = 0
-    previous_close_time = None
 
-    while offset < total_candles:
+def iter_chunks(cursor, name, size):
+    """Yield (id, closeTime) chunks ordered by (closeTime, id).
+
+    Keyset pagination: each chunk seeks past the last (closeTime, id) seen on
+    the (name, closeTime) index, so every chunk costs the same no matter how
+    deep into the history it is (LIMIT/OFFSET re-reads all earlier rows).
+    """
+    last_close_time, last_id = -1, -1
+    while True:
         cursor.execute("""
             SELECT id, closeTime
             FROM candles
             WHERE name = %s
-            ORDER BY closeTime ASC
-            LIMIT %s OFFSET %s
-        """, (symbol_name, chunk_size, offset))
-
+            AND (closeTime > %s OR (closeTime = %s AND id > %s))
+            ORDER BY closeTime ASC, id ASC
+            LIMIT %s
+        """, (name, last_close_time, last_close_time, last_id, size))
         candles = cursor.fetchall()
         if not candles:
-            break
-
-        for i, (current_id, current_close_time) in enumerate(candles):
-            # Validate closeTime
-            if current_close_time is None:
-                print(f"Warning: Candle ID {current_id} has NULL closeTime, skipping")
-                continue
-
-            if previous_close_time is not None:
-                try:
-                    time_diff = current_close_time - previous_close_time
-                    if time_diff < min_time_diff or time_diff > max_time_diff:
-                        print(f"Candle ID {current_id} has invalid time difference: {time_diff} seconds")
-                except TypeError:
-                    print(f"Error: Candle ID {current_id} has invalid closeTime value: {current_close_time}")
-            previous_close_time = current_close_time
+            return
+        yield candles
+        last_id, last_close_time = candles[-1]
+        if len(candles) < size:
+            return
+
+
+def check_symbol(cursor, name, report):
+    cursor.execute("SELECT COUNT(*) FROM candles WHERE name = %s", (name,))
+    total_candles = cursor.fetchone()[0]
+    if total_candles == 0:
+        print(f"No candles found for name '{name}'")
+        return
+
+    print(f"Processing {total_candles} candles for '{name}' in chunks of {chunk_size}")
+
+    # NULL closeTimes never match the keyset predicate, report them up front
+    cursor.execute("SELECT COUNT(*) FROM candles WHERE name = %s AND closeTime IS NULL", (name,))
+    null_candles = cursor.fetchone()[0]
+    if null_candles:
+        print(f"Warning: {null_candles} candles of '{name}' have NULL closeTime, skipping them")
+
+    processed_candles = 0
+    reported = 0
+    for candles in iter_chunks(cursor, name, chunk_size):
+        ids, close_times = zip(*candles)
+        report.add_chunk(name, ids, close_times)
+        for irregular in report.symbols[name]['irregular'][reported:]:
+            print(f"Candle ID {irregular['id']} has invalid time difference: {irregular['diff']} seconds")
+        reported = len(report.symbols[name]['irregular'])
 
         # Update progress
         processed_candles += len(candles)
         percentage = (processed_candles / total_candles) * 100
         print(f"Progress: {processed_candles}/{total_candles} candles ({percentage:.2f}% complete)")
 
-        offset += chunk_size
+    print(report.summary(name))
 
-except mysql.connector.Error as e:
-    print(f"Database error: {e}")
-except ValueError as ve:
-    print(f"Configuration error: {ve}")
-except Exception as e:
-    print(f"Unexpected error: {e}")
 
-finally:
-    # Close cursor and connection safely
+def main():
+    conn = None
+    cursor = None
     try:
-        if 'cursor' in locals() and cursor is not None:
-            cursor.close()
-        if 'conn' in locals() and conn is not None and conn.is_connected():
-            conn.close()
-        print("Database connection closed")
+        # Validate chunk size
+        if chunk_size < 1 or chunk_size > 1000000:
+            raise ValueError("chunk_size must be between 1 and 1000000")
+
+        conn = mysql.connector.connect(**db_config)
+        cursor = conn.cursor(buffered=True)
+        ensure_index(conn, cursor)
+
+        calendar = FxCalendar.from_json(calendar_file) if calendar_file else FxCalendar()
+        report = GapReport(calendar, min_diff=min_time_diff)
+        symbols = [symbol_name] if symbol_name else list_symbols(cursor)
+        for name in symbols:
+            check_symbol(cursor, name, report)
+
+        report.write_json(report_json)
+        report.write_csv(report_csv)
+        print(f"Gap report written to {report_json} and {report_csv}")
+
+    except mysql.connector.Error as e:
+        print(f"Database error: {e}")
+    except ValueError as ve:
+        print(f"Configuration error: {ve}")
     except Exception as e:
-        print(f"Error closing connection: {e}")
\ No newline at end of file
+        print(f"Unexpected error: {e}")
+
+    finally:
+        # Close cursor and connection safely
+        try:
+            if cursor is not None:
+                cursor.close()
+            if conn is not None and conn.is_connected():
+                conn.close()
+            print("Database connection closed")
+        except Exception as e:
+            print(f"Error closing connection: {e}")
+
+
+if __name__ == '__main__':
+    main()
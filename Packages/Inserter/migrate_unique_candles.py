@@ -0,0 +1,89 @@
+import mysql.connector
+
+# One-off migration: remove existing (name, period, closeTime) duplicates,
+# keeping the lowest id of each group, then add the unique key the inserters'
+# 'ignore' / 'update' modes rely on. Safe to re-run; it stops once the key exists.
+
+db_config = {
+    'user': 'root',
+    'password': '',
+    'host': 'localhost',
+    'database': 'trading_view_candles'
+}
+
+TABLE_NAME = 'candles'
+UNIQUE_KEY = 'uq_candles_name_period_closeTime'
+batch_size = 50000  # id range deleted per transaction
+
+
+def unique_key_exists(cursor):
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE()
+        AND table_name = %s
+        AND index_name = %s
+    """, (TABLE_NAME, UNIQUE_KEY))
+    return cursor.fetchone()[0] > 0
+
+
+def collect_keepers(cursor):
+    """Temp table with the id to keep for every duplicated candle"""
+    cursor.execute("DROP TEMPORARY TABLE IF EXISTS candle_keepers")
+    cursor.execute(f"""
+        CREATE TEMPORARY TABLE candle_keepers (PRIMARY KEY (name, period, closeTime))
+        SELECT name, period, closeTime, MIN(id) AS keepId, COUNT(*) - 1 AS extra
+        FROM {TABLE_NAME}
+        GROUP BY name, period, closeTime
+        HAVING COUNT(*) > 1
+    """)
+    cursor.execute("SELECT COUNT(*), COALESCE(SUM(extra), 0) FROM candle_keepers")
+    groups, duplicates = cursor.fetchone()
+    return int(groups), int(duplicates)
+
+
+def delete_duplicates(conn, cursor, total):
+    """Delete non-keeper rows in id-range batches so each transaction stays small"""
+    cursor.execute(f"SELECT MIN(id), MAX(id) FROM {TABLE_NAME}")
+    low, high = cursor.fetchone()
+    deleted = 0
+    for start in range(low, high + 1, batch_size):
+        cursor.execute(f"""
+            DELETE c FROM {TABLE_NAME} c
+            JOIN candle_keepers k
+              ON c.name = k.name AND c.period = k.period AND c.closeTime = k.closeTime
+            WHERE c.id BETWEEN %s AND %s AND c.id <> k.keepId
+        """, (start, start + batch_size - 1))
+        deleted += cursor.rowcount
+        conn.commit()
+        if cursor.rowcount:
+            print(f"Progress: Deleted {deleted}/{total} duplicates ({deleted / total * 100:.2f}% complete)")
+    return deleted
+
+
+def main():
+    conn = mysql.connector.connect(**db_config)
+    cursor = conn.cursor()
+    try:
+        if unique_key_exists(cursor):
+            print(f"Unique key {UNIQUE_KEY} already exists, nothing to do")
+            return
+
+        groups, duplicates = collect_keepers(cursor)
+        print(f"Found {duplicates} duplicate candles in {groups} (name, period, closeTime) groups")
+        if duplicates:
+            delete_duplicates(conn, cursor, duplicates)
+
+        print(f"Creating unique key {UNIQUE_KEY}...")
+        cursor.execute(f"ALTER TABLE {TABLE_NAME} ADD UNIQUE KEY {UNIQUE_KEY} (name, period, closeTime)")
+        print("Migration complete")
+    except mysql.connector.Error as e:
+        print(f"Database error: {e}")
+    finally:
+        cursor.close()
+        conn.close()
+        print("Database connection closed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+import os
+import sys
+import threading
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+import mysql.connector
+from bulk_loader import BulkLoader
+from candle_reader import extract_symbol_and_number, read_tradingview_file
+
+# Parallel, restartable version of tradingview_candles_inserter.py:
+# a process pool parses export files, a bounded set of writer connections
+# loads them, and every loaded file is recorded in a checkpoint table in the
+# same transaction as its candles so a crash resumes at the first unloaded file.
+
+db_config = {
+    'user': 'root',
+    'password': '',
+    'host': 'localhost',
+    'database': 'trading_view_candles',
+    'allow_local_infile': True
+}
+
+csv_dir = 'trading-view_candles_csv'
+parse_workers = os.cpu_count() or 2   # processes parsing CSV files
+writer_connections = 2                # concurrent DB writers
+prefetch = 2                          # parsed files buffered ahead per writer
+preserve_order = True                 # load each symbol's files in file-number order on one writer
+on_duplicate = 'ignore'               # rows hitting the unique (name, period, closeTime) key: None | 'ignore' | 'update'
+store_dir = None                      # also write candles to the Parquet CandleStore here, e.g. 'Data/candle_store'
+
+CHECKPOINT_TABLE = 'ingest_checkpoints'
+
+
+def ensure_checkpoint_table(cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+            filename VARCHAR(255) NOT NULL PRIMARY KEY,
+            symbol VARCHAR(32) NOT NULL,
+            fileNumber INT NOT NULL,
+            rowsLoaded INT NOT NULL,
+            completedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )""")
+
+
+def completed_files(cursor):
+    cursor.execute(f"SELECT filename FROM {CHECKPOINT_TABLE}")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def unloaded(files, done):
+    """(symbol, number, filename) tuples whose file has no checkpoint yet"""
+    return [f for f in files if f[2] not in done]
+
+
+def plan_lanes(files, lanes, ordered):
+    """Split (symbol, number, filename) tuples into one work list per writer.
+
+    Ordered: every symbol stays on a single writer, sorted by file number.
+    Unordered: files are dealt round-robin for the best balance.
+    """
+    files = sorted(files, key=lambda x: (x[0], x[1]))
+    plan = [[] for _ in range(lanes)]
+    if ordered:
+        symbols = sorted({f[0] for f in files})
+        lane_of = {symbol: i % lanes for i, symbol in enumerate(symbols)}
+        for f in files:
+            plan[lane_of[f[0]]].append(f)
+    else:
+        for i, f in enumerate(files):
+            plan[i % lanes].append(f)
+    return [lane for lane in plan if lane]
+
+
+def run_writer(pool, lane, errors, store=None):
+    """Load one lane's files in order, keeping `prefetch` parses in flight"""
+    conn = mysql.connector.connect(**db_config)
+    cursor = conn.cursor()
+    loader = BulkLoader(conn, cursor, on_duplicate=on_duplicate)
+    pending = deque()
+    todo = iter(lane)
+
+    def submit(item):
+        return item, pool.submit(read_tradingview_file, os.path.join(csv_dir, item[2]), item[0])
+
+    try:
+        pending.extend(submit(item) for item in islice(todo, prefetch + 1))
+        while pending:
+            (symbol, number, filename), future = pending.popleft()
+            next_item = next(todo, None)
+            if next_item:
+                pending.append(submit(next_item))
+
+            frame = future.result()
+            try:
+                rows = loader.load(frame, commit=False)
+                cursor.execute(
+                    f"INSERT INTO {CHECKPOINT_TABLE} (filename, symbol, fileNumber, rowsLoaded) VALUES (%s, %s, %s, %s)",
+                    (filename, symbol, number, rows))
+                conn.commit()
+            except mysql.connector.Error:
+                conn.rollback()
+                raise
+            if store:
+                store.write(frame)
+            print(f"Completed {filename}: {rows} rows")
+    except Exception as e:
+        print(f"Writer stopped: {e}")
+        errors.append(e)
+    finally:
+        for _, future in pending:
+            future.cancel()
+        cursor.close()
+        conn.close()
+
+
+def main():
+    files = [extract_symbol_and_number(f) for f in os.listdir(csv_dir) if f.endswith('.csv')]
+    files = [f for f in files if f is not None]
+
+    conn = mysql.connector.connect(**db_config)
+    cursor = conn.cursor()
+    try:
+        ensure_checkpoint_table(cursor)
+        conn.commit()
+        done = completed_files(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+    remaining = unloaded(files, done)
+    print(f"{len(files)} files found, {len(files) - len(remaining)} already loaded, {len(remaining)} to go")
+    if not remaining:
+        return
+
+    lanes = plan_lanes(remaining, writer_connections, preserve_order)
+    errors = []
+    store = None
+    if store_dir:  # the Parquet store needs pyarrow; plain MySQL imports do not
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'CandleStore'))
+        from candle_store import CandleStore
+        store = CandleStore(store_dir)
+    with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+        writers = [threading.Thread(target=run_writer, args=(pool, lane, errors, store)) for lane in lanes]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+
+    if errors:
+        print(f"{len(errors)} writer(s) failed; re-run to resume from the checkpoints")
+    else:
+        print("All files loaded")
+
+
+if __name__ == '__main__':
+    main()
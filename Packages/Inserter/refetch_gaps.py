@@ -0,0 +1,78 @@
+import requests
+import mysql.connector
+from bulk_loader import BulkLoader
+from candle_reader import local_time_strings
+from gap_report import load_gaps, to_iso
+
+# Re-fetch only the missing ranges listed in a gap report (written by integrity_check.py)
+# from the MtDriver's /get_candles_in endpoint and load them with INSERT IGNORE semantics,
+# so candles that already exist are left untouched.
+
+db_config = {
+    'user': 'root',
+    'password': '',
+    'host': 'localhost',
+    'database': 'trading_view_candles',
+    'allow_local_infile': True
+}
+
+report_json = 'gap_report.json'
+mt_driver_url = 'http://127.0.0.1:5000'
+symbols = None          # Restrict to these symbols, None for every symbol in the report
+min_missing = 1         # Skip gaps with fewer missing minutes
+
+
+def fetch_range(symbol, start, end):
+    """Closed M1 candles of [start, end] (unix seconds, UTC) from the MtDriver"""
+    response = requests.post(f"{mt_driver_url}/get_candles_in", json={
+        'symbol': symbol,
+        'start': to_iso(start).replace('Z', '+00:00'),
+        'end': to_iso(end).replace('Z', '+00:00'),
+        'fromdb': 0,
+    }, timeout=60)
+    response.raise_for_status()
+    return response.json()['candles']
+
+
+def to_rows(candles, start, end):
+    """DB rows of the candles inside [start, end], `time` in the Tehran wall clock like inserter.py writes it"""
+    candles = [c for c in candles if start <= c['closeTime'] <= end]
+    times = local_time_strings([c['closeTime'] for c in candles])
+    return [
+        (c['name'], 'PERIOD_M1', c['open'], c['high'], c['low'], c['close'], c['closeTime'], time)
+        for c, time in zip(candles, times)
+    ]
+
+
+def main():
+    gaps = load_gaps(report_json)
+    conn = mysql.connector.connect(**db_config)
+    cursor = conn.cursor()
+    loader = BulkLoader(conn, cursor, on_duplicate='ignore')
+    try:
+        for symbol, symbol_gaps in gaps.items():
+            if symbols and symbol not in symbols:
+                continue
+            repaired = 0
+            for gap in symbol_gaps:
+                if gap['missing'] < min_missing:
+                    continue
+                try:
+                    candles = fetch_range(symbol, gap['start'], gap['end'])
+                except requests.RequestException as e:
+                    print(f"{symbol} {gap['start_iso']} - {gap['end_iso']}: fetch failed: {e}")
+                    continue
+                rows = to_rows(candles, gap['start'], gap['end'])
+                if rows:
+                    loader.load(rows)
+                repaired += len(rows)
+                print(f"{symbol} {gap['start_iso']} - {gap['end_iso']}: {len(rows)}/{gap['missing']} candles recovered")
+            print(f"{symbol}: {repaired} candles recovered")
+    finally:
+        cursor.close()
+        conn.close()
+        print("Database connection closed")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,28 +1,28 @@
 import os
+import sys
 import csv
-import re
 from datetime import datetime
 import mysql.connector
-
-# Function to extract symbol and number from filename
-def extract_symbol_and_number(filename):
-    parts = filename.split('_')
-    if len(parts) == 2:
-        symbol_part = parts[1].split(',')[0]
-        match = re.search(r'\((\d+)\)\.csv', filename)
-        if match:
-            number = int(match.group(1))
-            return symbol_part, number, filename
-    return None
+from bulk_loader import BulkLoader, insert_statement
+import pandas as pd
+from candle_reader import extract_symbol_and_number, CANDLE_COLUMNS
 
 # Database connection parameters (replace with your actual credentials)
 db_config = {
     'user': 'root',
     'password': '',
     'host': 'localhost',
-    'database': 'trading_view_candles'
+    'database': 'trading_view_candles',
+    'allow_local_infile': True
 }
 
+# 'infile': LOAD DATA LOCAL INFILE (falls back to executemany) | 'executemany'
+load_method = 'infile'
+# Rows hitting the unique (name, period, closeTime) key: None: fail | 'ignore' | 'update'
+on_duplicate = 'ignore'
+# Also write candles to the Parquet CandleStore here, e.g. 'Data/candle_store'
+store_dir = None
+
 # Directory containing CSV files
 csv_dir = 'trading-view_candles_csv'
 
@@ -35,12 +35,23 @@ data.sort(key=lambda x: (x[0], x[1]))
 # Connect to the database
 conn = mysql.connector.connect(**db_config)
 cursor = conn.cursor()
+loader = BulkLoader(conn, cursor, on_duplicate=on_duplicate) if load_method == 'infile' else None
+store = None
+if store_dir:  # the Parquet store needs pyarrow; plain MySQL imports do not
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'CandleStore'))
+    from candle_store import CandleStore
+    store = CandleStore(store_dir)
 
 # SQL insert statement
-insert_sql = """
-INSERT INTO candles (name, period, open, high, low, close, closeTime, time)
-VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-"""
+insert_sql = insert_statement('candles', on_duplicate)
+
+def write_chunk(chunk, store_rows):
+    if store:
+        store_rows.extend(chunk)  # written once per file: the store rewrites a month file per write
+    if loader:
+        loader.load(chunk, commit=False)
+    else:
+        cursor.executemany(insert_sql, chunk)
 
 try:
     for symbol, number, filename in data:
@@ -50,6 +61,7 @@ try:
             reader = csv.reader(f)
             next(reader)  # Skip header
             chunk = []
+            store_rows = []
             row_count = 0
             for row in reader:
                 time_str = row[0]
@@ -64,12 +76,14 @@ try:
                 chunk.append(data_tuple)
                 row_count += 1
                 if len(chunk) == 10000:
-                    cursor.executemany(insert_sql, chunk)
+                    write_chunk(chunk, store_rows)
                     print(f"Inserted {len(chunk)} rows from {filename}")
                     chunk = []
             if chunk:
-                cursor.executemany(insert_sql, chunk)
+                write_chunk(chunk, store_rows)
                 print(f"Inserted {len(chunk)} rows from {filename}")
+        if store:
+            store.write(pd.DataFrame(store_rows, columns=CANDLE_COLUMNS))
         conn.commit()
         print(f"Completed processing {filename} with {row_count} rows")
 finally:
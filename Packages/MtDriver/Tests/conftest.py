@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from mt5_session import Mt5Session
+
+
+class Clock:
+    """Settable time source for the `clock` parameters of the MtDriver classes"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class SocketIOStub:
+    """Records rooms and emits (event, data, room) the way flask_socketio.SocketIO would deliver them"""
+
+    def __init__(self):
+        self.server = self
+        self.rooms = {}
+        self.emits = []
+        self.tasks = []
+
+    def enter_room(self, sid, room, namespace=None):
+        self.rooms.setdefault(room, set()).add(sid)
+
+    def leave_room(self, sid, room, namespace=None):
+        self.rooms.get(room, set()).discard(sid)
+
+    def emit(self, event, data, room=None, namespace=None):
+        self.emits.append((event, data, room))
+
+    def start_background_task(self, target, *args):
+        self.tasks.append((target, args))
+
+
+def connected_session(backend, **kwargs):
+    """An Mt5Session already connected to backend, without the health check thread"""
+    session = Mt5Session(backend=backend, **kwargs)
+    session.reconnect(1)
+    return session
@@ -0,0 +1,112 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from conftest import Clock
+from bar_scheduler import BarScheduler
+
+DAY = 86400
+MIDNIGHT = 1760054400  # 2025-10-10 00:00 UTC
+
+
+def test_boundaries_align_to_server_time():
+    scheduler = BarScheduler(offset_seconds=3 * 3600, clock=Clock(MIDNIGHT))
+    assert scheduler.next_boundary(60) == MIDNIGHT + 60
+    assert scheduler.next_boundary(3600) == MIDNIGHT + 3600
+    # Server midnight is 21:00 UTC for a +03:00 broker
+    assert scheduler.next_boundary(DAY) == MIDNIGHT + DAY - 3 * 3600
+    assert scheduler.next_boundary(DAY, MIDNIGHT - 3 * 3600) == MIDNIGHT + DAY - 3 * 3600
+
+
+def test_timeframes_share_one_wheel():
+    clock = Clock(MIDNIGHT + 10)
+    scheduler = BarScheduler(delay=0.5, clock=clock)
+    fired = []
+    for step in (60, 300, 3600):
+        scheduler.add(step, step, lambda boundary, step=step: fired.append((step, boundary)) or True)
+
+    for _ in range(3600 * 2):
+        clock.now += 1
+        due = scheduler.next_due()
+        if due is not None and due <= clock.now:
+            scheduler.run_pending()
+
+    assert sum(1 for step, _ in fired if step == 60) == 120
+    assert sum(1 for step, _ in fired if step == 300) == 24
+    assert [b for step, b in fired if step == 3600] == [MIDNIGHT + 3600, MIDNIGHT + 7200]
+    assert all(b % step == 0 for step, b in fired)
+
+
+def test_retries_until_published_then_waits_for_next_boundary():
+    clock = Clock(MIDNIGHT + 30)
+    scheduler = BarScheduler(delay=0.25, retry_interval=0.5, retry_timeout=3, clock=clock)
+    published = []
+    scheduler.add('m1', 60, lambda boundary: clock.now >= boundary + 1.2 and not published.append(boundary))
+
+    dues = []
+    for _ in range(5):
+        clock.now = scheduler.next_due()
+        dues.append(clock.now - MIDNIGHT)
+        scheduler.run_pending()
+    assert dues == [60.25, 60.75, 61.25, 120.25, 120.75]
+    assert published == [MIDNIGHT + 60]
+    assert scheduler.retries == 4
+
+
+def test_gives_up_after_retry_timeout():
+    clock = Clock(MIDNIGHT + 30)
+    scheduler = BarScheduler(delay=0.25, retry_interval=1, retry_timeout=2, clock=clock)
+    scheduler.add('m1', 60, lambda boundary: False)  # market closed
+    for _ in range(3):
+        clock.now = scheduler.next_due()
+        scheduler.run_pending()
+    assert scheduler.next_due() == MIDNIGHT + 120.25
+
+
+def test_removed_job_never_fires():
+    clock = Clock(MIDNIGHT + 30)
+    scheduler = BarScheduler(clock=clock)
+    calls = []
+    scheduler.add('m1', 60, lambda boundary: calls.append(boundary) or True)
+    scheduler.remove('m1')
+    clock.now += 60
+    assert scheduler.run_pending() == 0
+    assert scheduler.next_due() is None and calls == []
+
+
+def test_closed_market_goes_idle_without_retries():
+    clock = Clock(MIDNIGHT + 30)
+    scheduler = BarScheduler(delay=0.25, retry_interval=0.5, retry_timeout=15, idle_after=2, clock=clock)
+    open_market = []
+    calls = []
+    scheduler.add('m1', 60, lambda boundary: calls.append(boundary) or bool(open_market))
+
+    def run_boundary(boundary):
+        while scheduler.next_due() is not None and scheduler.next_due() < boundary + 60:
+            clock.now = scheduler.next_due()
+            scheduler.run_pending()
+
+    run_boundary(MIDNIGHT + 60)
+    run_boundary(MIDNIGHT + 120)
+    assert scheduler.idle() == ['m1']
+    retried = len(calls)
+    for minute in range(3, 13):  # ten quiet minutes: one call each
+        run_boundary(MIDNIGHT + minute * 60)
+    assert len(calls) == retried + 10
+
+    open_market.append(True)
+    run_boundary(MIDNIGHT + 13 * 60)
+    assert scheduler.idle() == []
+
+
+def test_touch_ends_idle_mode():
+    clock = Clock(MIDNIGHT + 30)
+    scheduler = BarScheduler(delay=0.25, retry_interval=0.5, retry_timeout=1, idle_after=1, clock=clock)
+    scheduler.add('m1', 60, lambda boundary: False)
+    while not scheduler.idle():
+        clock.now = scheduler.next_due()
+        scheduler.run_pending()
+    scheduler.touch('m1')
+    clock.now = scheduler.next_due()
+    scheduler.run_pending()  # late bars arrived: retry this boundary again
+    assert scheduler.next_due() == clock.now + 0.5
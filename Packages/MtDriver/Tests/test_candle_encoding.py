@@ -0,0 +1,70 @@
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pytest
+from werkzeug.datastructures import MIMEAccept
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from fake_mt5 import FakeMt5
+from candle_encoding import (ARROW, FORMATS, JSON, MSGPACK, NDJSON, PACKED, CANDLE_COLUMNS,
+                             decode_candles, empty_columns, encode_candles, iter_packed_frames,
+                             negotiate, negotiate_stream, rates_to_columns)
+
+
+@pytest.fixture
+def columns():
+    mt5 = FakeMt5()
+    mt5.initialize()
+    rates = mt5.copy_rates_range('EURUSD', mt5.TIMEFRAME_M1, datetime(2025, 3, 3), datetime(2025, 3, 3, 2))
+    return rates_to_columns(rates, 7200)
+
+
+def test_rates_conversion_is_columnar(columns):
+    assert columns['closeTime'].dtype == np.int64
+    assert len(columns['closeTime']) == 121
+    assert np.all(np.diff(columns['closeTime']) == 60)
+
+
+@pytest.mark.parametrize('mimetype', FORMATS)
+def test_round_trip(columns, mimetype):
+    name, period, decoded = decode_candles(encode_candles(columns, 'EURUSD', 'PERIOD_M1', mimetype), mimetype)
+    assert (name, period) == ('EURUSD', 'PERIOD_M1')
+    for c in CANDLE_COLUMNS:
+        np.testing.assert_array_equal(decoded[c], columns[c])
+
+
+def test_packed_columns_are_aligned(columns):
+    body = encode_candles(columns, 'EURUSD', 'PERIOD_M1', PACKED)
+    assert len(body) % 8 == 0
+    assert len(body) < len(encode_candles(columns, 'EURUSD', 'PERIOD_M1', JSON)) / 3
+
+
+def test_empty_packed_payload():
+    name, _, decoded = decode_candles(encode_candles(empty_columns(), 'GBPUSD', 'PERIOD_1D', PACKED), PACKED)
+    assert name == 'GBPUSD' and len(decoded['close']) == 0
+
+
+def test_negotiation_defaults_to_json():
+    assert negotiate(MIMEAccept([])) == JSON
+    assert negotiate(MIMEAccept([('*/*', 1)])) == JSON
+    assert negotiate(MIMEAccept([(PACKED, 1), (JSON, 0.5)])) == PACKED
+    if MSGPACK in FORMATS:
+        assert negotiate(MIMEAccept([(MSGPACK, 1)])) == MSGPACK
+    if ARROW in FORMATS:
+        assert negotiate(MIMEAccept([(ARROW, 1)])) == ARROW
+
+
+def test_streamed_chunks_concatenate(columns):
+    chunks = [{c: v[i:i + 50] for c, v in columns.items()} for i in range(0, 121, 50)]
+    packed = b''.join(encode_candles(chunk, 'EURUSD', 'PERIOD_M1', PACKED) for chunk in chunks)
+    frames = list(iter_packed_frames(packed))
+    assert [len(f[2]['closeTime']) for f in frames] == [50, 50, 21]
+    np.testing.assert_array_equal(np.concatenate([f[2]['open'] for f in frames]), columns['open'])
+
+    ndjson = b''.join(encode_candles(chunk, 'EURUSD', 'PERIOD_M1', NDJSON) for chunk in chunks)
+    lines = ndjson.decode().splitlines()
+    assert len(lines) == 121
+    assert json.loads(lines[-1])['closeTime'] == columns['closeTime'][-1]
+    assert negotiate_stream(MIMEAccept([])) == NDJSON
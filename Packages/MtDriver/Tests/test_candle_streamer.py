@@ -0,0 +1,191 @@
+import sys
+import threading
+import time
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from fake_mt5 import FakeMt5
+from conftest import Clock, SocketIOStub, connected_session
+from candle_streamer import CandleStreamer, room_name
+
+NOW = 1760000000 // 60 * 60 + 30  # 30 s into a minute
+
+
+@pytest.fixture
+def clock():
+    return Clock(NOW)
+
+
+@pytest.fixture
+def mt5(clock):
+    return FakeMt5(clock=clock)
+
+
+@pytest.fixture
+def streamer(mt5, clock):
+    return CandleStreamer(SocketIOStub(), connected_session(mt5), offset_seconds=0, backfill=3, buffer_size=5,
+                          max_replay=20, clock=clock)
+
+
+def poller_of(streamer, symbol='EURUSD'):
+    return streamer._pollers[(symbol, 'PERIOD_M1')]
+
+
+def test_one_poller_per_symbol_whatever_the_subscriber_count(streamer):
+    for sid in ('a', 'b', 'c'):
+        streamer.subscribe(sid, 'eurusd', 'PERIOD_M1')
+    streamer.subscribe('a', 'GBPUSD', 'PERIOD_M1')
+    assert len(streamer.socketio.tasks) == 1  # one scheduler loop for every pair
+    assert len(streamer.scheduler._jobs) == 2
+    assert streamer.socketio.rooms[room_name('EURUSD', 'PERIOD_M1')] == {'a', 'b', 'c'}
+
+
+def last_emit(streamer):
+    """(event, candles, room, resume token) of the latest emit"""
+    event, (candles, token), room = streamer.socketio.emits[-1]
+    return event, candles, room, token
+
+
+LAST_CLOSED = NOW // 60 * 60 - 60  # open time of the last closed bar, not the forming one
+
+
+def test_only_newly_closed_candles_are_emitted(streamer, clock):
+    streamer.subscribe('a', 'EURUSD', 'PERIOD_M1')
+    poller = poller_of(streamer)
+    assert [c['closeTime'] for c in poller.history][-1] == LAST_CLOSED
+    emits = len(streamer.socketio.emits)
+
+    assert streamer.poll_once(poller) == []
+    clock.now += 180
+    new = streamer.poll_once(poller)
+    assert [c['closeTime'] for c in new] == [LAST_CLOSED + 60 * i for i in (1, 2, 3)]
+    event, data, room, token = last_emit(streamer)
+    assert len(streamer.socketio.emits) == emits + 1
+    assert room == room_name('EURUSD', 'PERIOD_M1')
+    assert token == {'symbol': 'EURUSD', 'timeframe': 'PERIOD_M1', 'since': LAST_CLOSED + 180}
+
+
+def test_fresh_subscriber_gets_backfill_on_its_own_sid(streamer):
+    streamer.subscribe('a', 'EURUSD', 'PERIOD_M1')
+    event, data, room, token = last_emit(streamer)
+    assert (event, room, len(data)) == ('new_candles', 'a', 3)
+    assert token['since'] == LAST_CLOSED
+
+
+def test_resume_token_replays_exactly_the_missed_candles(streamer, clock):
+    streamer.subscribe('a', 'EURUSD', 'PERIOD_M1')
+    *_, token = last_emit(streamer)
+    streamer.unsubscribe_all('a')
+
+    streamer.subscribe('b', 'EURUSD', 'PERIOD_M1')
+    clock.now += 120
+    streamer.poll_once(poller_of(streamer))
+    assert streamer.subscribe('a', **token) == 2
+    _, data, room, _ = last_emit(streamer)
+    assert room == 'a' and [c['closeTime'] for c in data] == [LAST_CLOSED + 60, LAST_CLOSED + 120]
+    assert streamer.subscribe('c', 'EURUSD', 'PERIOD_M1', since=LAST_CLOSED + 120) == 0
+
+
+def test_replay_older_than_the_ring_buffer_is_fetched_and_bounded(streamer):
+    streamer.subscribe('a', 'EURUSD', 'PERIOD_M1', since=LAST_CLOSED - 10 * 60)
+    _, data, _, _ = last_emit(streamer)
+    assert [c['closeTime'] for c in data] == [LAST_CLOSED - 60 * i for i in range(9, -1, -1)]
+    streamer.subscribe('b', 'EURUSD', 'PERIOD_M1', since=LAST_CLOSED - 100 * 60)
+    _, data, _, _ = last_emit(streamer)
+    assert len(data) == 20 and data[-1]['closeTime'] == LAST_CLOSED
+
+
+def test_poller_stops_with_its_last_subscriber(streamer):
+    streamer.subscribe('a', 'EURUSD', 'PERIOD_M1')
+    streamer.subscribe('b', 'EURUSD', 'PERIOD_M1')
+    poller = poller_of(streamer)
+    streamer.unsubscribe_all('a')
+    assert poller.active
+    streamer.unsubscribe('b', 'EURUSD', 'PERIOD_M1')
+    assert not poller.active
+    assert streamer.status() == []
+
+
+def test_bar_close_is_polled_right_after_the_boundary(streamer, clock):
+    streamer.subscribe('a', 'EURUSD', 'PERIOD_M1')
+    boundary = NOW // 60 * 60 + 60
+    assert streamer.scheduler.next_due() == boundary + 0.25
+
+    clock.now = boundary + 0.25
+    assert streamer.scheduler.run_pending() == 1
+    _, data, room, _ = last_emit(streamer)
+    assert room == room_name('EURUSD', 'PERIOD_M1')
+    assert [c['closeTime'] for c in data] == [boundary - 60]
+    assert streamer.scheduler.next_due() == boundary + 60.25
+
+
+def test_unpublished_bar_is_retried_quickly(streamer, mt5, clock):
+    streamer.subscribe('a', 'EURUSD', 'PERIOD_M1')
+    boundary = NOW // 60 * 60 + 60
+    clock.now = boundary + 0.25
+    mt5.copy_rates_from_pos = lambda *args: None  # broker late with the bar
+    streamer.scheduler.run_pending()
+    assert streamer.scheduler.next_due() == boundary + 0.75
+
+    del mt5.copy_rates_from_pos
+    clock.now = boundary + 0.75
+    streamer.scheduler.run_pending()
+    assert last_emit(streamer)[1][-1]['closeTime'] == boundary - 60
+    assert streamer.scheduler_status()['retries'] == 1
+
+
+def test_concurrent_polls_are_serialized(streamer, clock):
+    streamer.subscribe('a', 'EURUSD', 'PERIOD_M1')
+    poller = poller_of(streamer)
+    clock.now += 60
+    fetch = streamer._fetch
+    inside = []
+    overlap = []
+
+    def slow_fetch(*args):
+        inside.append(1)
+        overlap.append(len(inside))
+        time.sleep(0.05)  # the other poll starts meanwhile
+        inside.pop()
+        return fetch(*args)
+
+    streamer._fetch = slow_fetch
+    threads = [threading.Thread(target=streamer.poll_once, args=(poller,)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(overlap) == 1
+    assert poller.emitted == 1
+
+
+def test_subscribers_waiting_for_a_first_poll_get_their_own_replay(streamer, mt5):
+    copy_rates = mt5.copy_rates_from_pos
+    mt5.copy_rates_from_pos = lambda *args: None  # terminal has no bars yet
+    assert streamer.subscribe('a', 'EURUSD', 'PERIOD_M1') == 0
+    assert streamer.subscribe('b', 'EURUSD', 'PERIOD_M1', since=LAST_CLOSED - 60) == 0
+    assert streamer.socketio.emits == []
+
+    mt5.copy_rates_from_pos = copy_rates
+    assert streamer.subscribe('c', 'EURUSD', 'PERIOD_M1') == 3
+    by_room = {room: [c['closeTime'] for c in candles] for _, (candles, _), room in streamer.socketio.emits}
+    assert by_room == {'a': [LAST_CLOSED - 120, LAST_CLOSED - 60, LAST_CLOSED], 'b': [LAST_CLOSED],
+                       'c': [LAST_CLOSED - 120, LAST_CLOSED - 60, LAST_CLOSED]}
+    assert poller_of(streamer).waiting == {}
+
+
+def test_first_scheduled_poll_does_not_broadcast_the_whole_fetch(streamer, mt5, clock):
+    copy_rates = mt5.copy_rates_from_pos
+    mt5.copy_rates_from_pos = lambda *args: None
+    streamer.subscribe('a', 'EURUSD', 'PERIOD_M1', since=LAST_CLOSED - 60)
+    mt5.copy_rates_from_pos = copy_rates
+    clock.now += 60
+    streamer.poll_once(poller_of(streamer))
+    event, data, room, token = last_emit(streamer)
+    assert len(streamer.socketio.emits) == 1
+    assert room == 'a' and [c['closeTime'] for c in data] == [LAST_CLOSED, LAST_CLOSED + 60]
+
+    clock.now += 60
+    streamer.poll_once(poller_of(streamer))  # from now on, new bars go to the room
+    assert last_emit(streamer)[2] == room_name('EURUSD', 'PERIOD_M1')
@@ -0,0 +1,130 @@
+import sys
+import threading
+import time
+from pathlib import Path
+import mysql.connector
+import pytest
+from mysql.connector import pooling
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from db import DbPool, QueryStats
+
+
+def test_query_stats_aggregate_per_label():
+    stats = QueryStats()
+    stats.record('candles_in', 0.002)
+    stats.record('candles_in', 0.004)
+    stats.record('setting', 0.001, error=True)
+    snapshot = stats.snapshot()
+    assert snapshot['candles_in']['count'] == 2
+    assert abs(snapshot['candles_in']['avg_ms'] - 3.0) < 1e-9
+    assert abs(snapshot['candles_in']['max_ms'] - 4.0) < 1e-9
+    assert snapshot['setting']['errors'] == 1
+
+
+def test_pool_is_created_lazily_and_reports_unhealthy():
+    db = DbPool('unreachable', {'host': '127.0.0.1', 'port': 1, 'user': 'root', 'password': '',
+                                'connection_timeout': 1})
+    assert db._pool is None
+    assert db.healthy() is False
+    assert db.metrics()['queries']['health']['errors'] == 1
+
+
+class StubCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, sql, params=()):
+        pass
+
+    def fetchmany(self, size):
+        chunk, self.rows = self.rows[:size], self.rows[size:]
+        return chunk
+
+
+class StubConnection:
+    """Stands in for both a pooled and a dedicated mysql.connector connection"""
+
+    def __init__(self, pool=None, rows=()):
+        self.pool = pool
+        self.rows = list(rows)
+        self._cnx = self
+        self.connection_id = 1
+        self.disconnected = False
+
+    def ping(self, **kwargs):
+        pass
+
+    def cursor(self):
+        return StubCursor(self.rows)
+
+    def close(self):
+        self.pool.free.append(self)
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+class StubPool:
+    def __init__(self, size):
+        self.free = []
+        self.free.extend(StubConnection(self) for _ in range(size))
+        self.calls = 0
+
+    def get_connection(self):
+        self.calls += 1
+        if not self.free:
+            raise pooling.PoolError("Failed getting connection; pool exhausted")
+        return self.free.pop()
+
+
+def stub_db(pool_size=1, **kwargs):
+    db = DbPool('stub', {}, pool_size=pool_size, **kwargs)
+    db._pool = StubPool(pool_size)
+    return db
+
+
+def test_checkout_wakes_up_when_a_connection_is_returned():
+    db = stub_db(checkout_timeout=5.0)
+    waited = []
+
+    def second():
+        started = time.monotonic()
+        with db.connection():
+            waited.append(time.monotonic() - started)
+
+    with db.connection():
+        thread = threading.Thread(target=second)
+        thread.start()
+        time.sleep(0.1)
+    thread.join()
+    assert 0.05 < waited[0] < 1.0
+    assert db._pool.calls == 3  # one failed attempt, then woken by the check-in, no polling
+
+
+def test_checkout_times_out_when_nothing_is_returned():
+    db = stub_db(checkout_timeout=0.1)
+    with db.connection():
+        with pytest.raises(pooling.PoolError):
+            db._checkout()
+
+
+def test_streams_use_their_own_connections(monkeypatch):
+    db = stub_db(max_streams=1, checkout_timeout=0.1)
+    opened = []
+
+    def connect(**config):
+        opened.append(StubConnection(rows=[(i,) for i in range(5)]))
+        return opened[-1]
+
+    monkeypatch.setattr(mysql.connector, 'connect', connect)
+    stream = db.iter_query("SELECT", chunk_size=2)
+    assert next(stream) == [(0,), (1,)]
+    with db.connection():  # the pool is untouched by the open stream
+        pass
+    with pytest.raises(pooling.PoolError):
+        next(db.iter_query("SELECT"))  # over max_streams
+    stream.close()
+    assert opened[0].disconnected
+    assert [len(rows) for rows in db.iter_query("SELECT", chunk_size=2)] == [2, 2, 1]
+    assert db.stats.snapshot()['stream']['errors'] == 1
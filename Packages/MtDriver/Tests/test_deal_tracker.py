@@ -0,0 +1,85 @@
+import json
+import sys
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from fake_mt5 import DEAL_ENTRY_IN, DEAL_ENTRY_OUT, FakeMt5, TradeDeal
+from conftest import Clock, connected_session
+from deal_tracker import DealTracker
+
+NOW = 1760000000
+
+
+def deal(ticket, time, entry=DEAL_ENTRY_OUT):
+    return TradeDeal(ticket, ticket, time, time * 1000, 0, entry, 0, ticket, 0, 0.01, 1.1, 0.0, 0.0, 1.0, 0.0,
+                     'EURUSD', '', 1.09, 1.12)
+
+
+@pytest.fixture
+def clock():
+    return Clock(NOW)
+
+
+@pytest.fixture
+def mt5(clock):
+    return FakeMt5(clock=clock)
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / 'deals.json')
+
+
+def tracker(mt5, clock, state_path, reported):
+    return DealTracker(connected_session(mt5), reported.append, state_path, overlap=60, clock=clock)
+
+
+def test_each_closed_deal_is_reported_once(mt5, clock, state_path):
+    reported = []
+    t = tracker(mt5, clock, state_path, reported)
+    mt5.deals += [deal(2, NOW + 5), deal(1, NOW + 5), deal(3, NOW + 6, DEAL_ENTRY_IN)]
+    clock.now += 10
+    assert t.poll_once() == 2
+    # A deal stamped inside the overlap window shows up late
+    mt5.deals.append(deal(4, NOW + 8))
+    clock.now += 10
+    assert t.poll_once() == 1
+    assert [d.ticket for d in reported] == [1, 2, 4]
+
+
+def test_watermark_advances_without_deals(mt5, clock, state_path):
+    t = tracker(mt5, clock, state_path, [])
+    clock.now += 3600
+    t.poll_once()
+    assert t.watermark == NOW + 3600
+    assert json.load(open(state_path))['watermark'] == NOW + 3600
+
+
+def test_state_survives_a_restart(mt5, clock, state_path):
+    reported = []
+    mt5.deals.append(deal(1, NOW + 5))
+    clock.now += 10
+    tracker(mt5, clock, state_path, reported).poll_once()
+
+    mt5.deals += [deal(2, NOW + 20), deal(3, NOW - 3600)]  # 3 predates the watermark
+    clock.now += 3600  # down for an hour
+    restarted = tracker(mt5, clock, state_path, reported)
+    assert restarted.watermark == NOW + 10
+    restarted.poll_once()
+    assert [d.ticket for d in reported] == [1, 2]
+
+
+def test_mt5_error_keeps_the_window(mt5, clock, state_path):
+    t = tracker(mt5, clock, state_path, [])
+    mt5.history_deals_get = lambda *args: None
+    clock.now += 10
+    t.poll_once()
+    assert t.watermark == NOW
+
+
+def test_deal_poll_is_not_queued_behind_range_fetches(mt5, clock, state_path):
+    t = tracker(mt5, clock, state_path, [])
+    t.poll_once()
+    queue = t.session.status()['queue']
+    assert queue['tick']['acquired'] == 1 and queue['history']['acquired'] == 0
@@ -0,0 +1,167 @@
+import gzip
+import logging
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from log_writer import DailyRotatingFileHandler, LogWriter
+
+TZ = ZoneInfo("Europe/Athens")
+
+
+def record(message, created=None, level=logging.INFO):
+    rec = logging.LogRecord('test', level, __file__, 1, message, None, None)
+    if created is not None:
+        rec.created = created
+    return rec
+
+
+def at(text):
+    return datetime.fromisoformat(text).replace(tzinfo=TZ).timestamp()
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.delay = delay
+        self.messages = []
+        self.flushes = 0
+
+    def emit(self, rec):
+        time.sleep(self.delay)
+        self.messages.append(rec.getMessage())
+
+    def flush(self):
+        self.flushes += 1
+
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger('test_log_writer')
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    yield logger
+    logger.handlers.clear()
+
+
+def test_file_per_day_of_record_time(tmp_path):
+    handler = DailyRotatingFileHandler(str(tmp_path), TZ)
+    handler.emit(record('before midnight', at('2025-03-01T23:59:59')))
+    handler.emit(record('after midnight', at('2025-03-02T00:00:00')))
+    handler.close()
+    assert 'before midnight' in (tmp_path / '2025-03-01.log').read_text()
+    assert 'after midnight' in (tmp_path / '2025-03-02.log').read_text()
+    assert 'after' not in (tmp_path / '2025-03-01.log').read_text()
+
+
+def test_rollover_boundary_cached_per_file(tmp_path):
+    handler = DailyRotatingFileHandler(str(tmp_path), TZ)
+    handler.emit(record('a', at('2025-03-30T12:00:00')))
+    # The DST change day in Athens is 23 hours long; midnight is still midnight
+    assert handler.rollover_at == at('2025-03-31T00:00:00')
+    handler.close()
+
+
+def test_writes_are_buffered_until_flush(tmp_path):
+    handler = DailyRotatingFileHandler(str(tmp_path), TZ)
+    handler.emit(record('buffered', at('2025-03-01T10:00:00')))
+    path = tmp_path / '2025-03-01.log'
+    assert path.read_text() == ''
+    handler.flush()
+    assert 'buffered' in path.read_text()
+    handler.close()
+
+
+def test_size_rotation_compresses_and_caps_parts(tmp_path):
+    handler = DailyRotatingFileHandler(str(tmp_path), TZ, max_bytes=200, backup_count=2)
+    created = at('2025-03-01T10:00:00')
+    for i in range(12):
+        handler.emit(record(f"line {i:02d} " + 'x' * 40, created))
+    handler.close()
+    parts = sorted(p.name for p in tmp_path.iterdir())
+    assert parts == ['2025-03-01.1.log.gz', '2025-03-01.2.log.gz', '2025-03-01.log']
+    assert (tmp_path / '2025-03-01.log').stat().st_size <= 200
+    newest = gzip.decompress((tmp_path / '2025-03-01.1.log.gz').read_bytes()).decode()
+    older = gzip.decompress((tmp_path / '2025-03-01.2.log.gz').read_bytes()).decode()
+    current = (tmp_path / '2025-03-01.log').read_text()
+    assert 'line 11' in current
+    assert max(older.split('line ')[1:]) < min(newest.split('line ')[1:])
+
+
+def test_writer_delivers_in_order_and_flushes_per_batch(logger):
+    target = ListHandler()
+    writer = LogWriter([target], batch_size=100)
+    logger.addHandler(writer.handler)
+    for i in range(250):
+        logger.info("msg %d", i)
+    writer.start()
+    writer.stop()
+    assert target.messages == [f"msg {i}" for i in range(250)]
+    assert target.flushes == 3  # queued up before start: batches of 100, 100, 50
+    assert writer.written == 250
+
+
+def test_writer_respects_handler_level(logger):
+    target = ListHandler()
+    target.setLevel(logging.WARNING)
+    writer = LogWriter([target])
+    logger.addHandler(writer.handler)
+    writer.start()
+    logger.info('quiet')
+    logger.warning('loud')
+    writer.stop()
+    assert target.messages == ['loud']
+
+
+def test_slow_handler_does_not_block_caller(logger):
+    target = ListHandler(delay=0.05)
+    writer = LogWriter([target])
+    logger.addHandler(writer.handler)
+    writer.start()
+    started = time.perf_counter()
+    for i in range(20):
+        logger.info("msg %d", i)
+    elapsed = time.perf_counter() - started
+    writer.stop()
+    assert elapsed < 0.05  # 20 writes take a second on the writer thread
+    assert len(target.messages) == 20
+
+
+def test_full_queue_drops_instead_of_blocking(logger):
+    gate = threading.Event()
+
+    class Blocked(ListHandler):
+        def emit(self, rec):
+            gate.wait()
+            super().emit(rec)
+
+    target = Blocked()
+    writer = LogWriter([target], queue_size=5, batch_size=1)
+    logger.addHandler(writer.handler)
+    writer.start()
+    logger.info('held')  # taken by the writer, which then waits
+    time.sleep(0.05)
+    for i in range(10):
+        logger.info("msg %d", i)
+    assert writer.dropped == 5
+    gate.set()
+    writer.stop()
+    assert target.messages == ['held'] + [f"msg {i}" for i in range(5)]
+
+
+def test_exception_text_survives_the_queue(logger):
+    target = ListHandler()
+    writer = LogWriter([target])
+    logger.addHandler(writer.handler)
+    writer.start()
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        logger.error('failed', exc_info=True)
+    writer.stop()
+    assert 'ValueError: boom' in target.messages[0]
@@ -0,0 +1,184 @@
+import sys
+import threading
+import time
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from fake_mt5 import FakeMt5
+from mt5_session import Mt5Session, Mt5ConnectionError, eventlet_executor
+
+
+@pytest.fixture
+def backend():
+    return FakeMt5()
+
+
+@pytest.fixture
+def session(backend):
+    s = Mt5Session(backend=backend, health_interval=0.05, backoff_initial=0.01, backoff_max=0.05)
+    s.start()
+    yield s
+    s.stop()
+
+
+def test_initializes_once_across_requests(session, backend):
+    for _ in range(5):
+        with session.acquire() as mt5:
+            assert mt5.symbol_info_tick('EURUSD') is not None
+    assert backend.initialize_calls == 1
+    assert backend.shutdown_calls == 0
+
+
+def test_connect_retries_with_backoff(backend):
+    backend.fail_initialize = 2
+    session = Mt5Session(backend=backend, backoff_initial=0.01)
+    assert session.reconnect()
+    with session.acquire() as mt5:
+        assert mt5.terminal_info() is not None
+    assert backend.initialize_calls == 3
+
+
+def test_acquire_raises_when_terminal_unreachable(backend):
+    backend.fail_initialize = 10
+    session = Mt5Session(backend=backend, connect_attempts=2, backoff_initial=0.01)
+    assert not session.reconnect()
+    assert backend.initialize_calls == 2
+    with pytest.raises(Mt5ConnectionError):
+        with session.acquire():
+            pass
+    assert backend.initialize_calls == 2  # fails fast, reconnecting is the health check's job
+
+
+def test_ipc_error_in_failing_caller_marks_session_disconnected(backend):
+    session = Mt5Session(backend=backend)
+    session.reconnect(1)
+    with pytest.raises(RuntimeError):
+        with session.acquire() as mt5:
+            backend.drop()
+            mt5.symbol_info('EURUSD')
+            raise RuntimeError('handler failed')
+    assert not session.connected
+
+
+def test_ipc_error_marks_session_disconnected(session, backend):
+    with session.acquire() as mt5:
+        backend.drop()
+        assert mt5.symbol_info('EURUSD') is None
+    assert not session.connected
+    with pytest.raises(Mt5ConnectionError):
+        with session.acquire():
+            pass
+    for _ in range(100):
+        if session.connected:
+            break
+        threading.Event().wait(0.01)
+    with session.acquire() as mt5:
+        assert mt5.symbol_info('EURUSD') is not None
+    assert session.status()['drops'] == 1
+
+
+def test_health_check_reconnects_dropped_terminal(session, backend):
+    backend.drop()
+    for _ in range(100):
+        if backend.initialize_calls >= 2 and session.connected:
+            break
+        threading.Event().wait(0.01)
+    assert session.connected
+    assert backend.initialize_calls >= 2
+
+
+def test_acquire_serializes_access(session):
+    active = []
+    overlap = []
+
+    def worker():
+        with session.acquire():
+            active.append(1)
+            overlap.append(len(active))
+            threading.Event().wait(0.01)
+            active.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(overlap) == 1
+
+
+def test_calls_go_through_the_executor(backend):
+    calls = []
+
+    def executor(fn, *args, **kwargs):
+        calls.append(fn.__name__)
+        return fn(*args, **kwargs)
+
+    session = Mt5Session(backend=backend, executor=executor)
+    session.reconnect(1)
+    with session.acquire() as mt5:
+        assert mt5.TIMEFRAME_M1 == 1
+        mt5.symbol_info_tick('EURUSD')
+    assert calls == ['initialize', 'symbol_info_tick']  # nothing failed: no last_error() round trip
+    with session.acquire() as mt5:
+        assert mt5.symbol_info('NOPE') is None
+    assert calls[2:] == ['symbol_info', 'last_error']
+
+
+def test_eventlet_executor_keeps_the_hub_running(backend):
+    eventlet = pytest.importorskip('eventlet')
+    backend.copy_rates_range = lambda *args: time.sleep(0.3) or 'rates'  # blocking like the C extension
+    session = Mt5Session(backend=backend, executor=eventlet_executor())
+    session.reconnect(1)
+    ticks = []
+
+    def ticker():
+        while len(ticks) < 100:
+            ticks.append(1)
+            eventlet.sleep(0.01)
+
+    green = eventlet.spawn(ticker)
+    with session.acquire() as mt5:
+        assert mt5.copy_rates_range('EURUSD', mt5.TIMEFRAME_M1, 0, 0) == 'rates'
+    during = len(ticks)
+    green.kill()
+    assert during >= 10
+
+
+def test_waiters_are_served_by_priority(session):
+    from mt5_session import PRIORITY_HISTORY, PRIORITY_ORDER, PRIORITY_TICK
+    order = []
+    release = threading.Event()
+
+    def holder():
+        with session.acquire(PRIORITY_HISTORY):
+            release.wait(1)
+
+    def waiter(name, priority):
+        with session.acquire(priority):
+            order.append(name)
+
+    threads = [threading.Thread(target=holder)]
+    threads[0].start()
+    while not session.lock._owner:
+        time.sleep(0.001)
+    for name, priority in (('history', PRIORITY_HISTORY), ('tick', PRIORITY_TICK), ('order', PRIORITY_ORDER)):
+        thread = threading.Thread(target=waiter, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        while len(session.lock._waiting) < len(threads) - 1:
+            time.sleep(0.001)
+
+    assert session.status()['queue']['history']['queued'] == 1
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert order == ['order', 'tick', 'history']
+    assert session.status()['queue']['history']['acquired'] == 2
+
+
+def test_acquire_is_reentrant(session):
+    with session.acquire() as outer:
+        with session.acquire() as inner:
+            assert inner is outer
+    assert session.lock._owner is None
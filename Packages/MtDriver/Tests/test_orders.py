@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import fake_mt5
+from fake_mt5 import FakeMt5, Tick
+from orders import (OrderRejected, build_market_request, build_pending_request, parse_order, rollback_request,
+                    submit)
+
+TICK = Tick(0, 1.10000, 1.10010, 0.0, 0, 0, 6, 0.0)
+
+
+@pytest.fixture
+def mt5():
+    backend = FakeMt5()
+    backend.initialize()
+    return backend
+
+
+def order(**fields):
+    return parse_order(dict({'symbol': 'eurusd', 'volume': 0.01, 'direction': 'buy', 'price': 1.10010,
+                             'sl': 1.09800, 'tp': 1.10400}, **fields))
+
+
+def test_missing_field_is_rejected():
+    with pytest.raises(OrderRejected) as e:
+        parse_order({'symbol': 'EURUSD', 'volume': 0.01, 'direction': 'BUY', 'price': 1.1, 'sl': None, 'tp': 1.2})
+    assert (e.value.payload, e.value.status) == ({'error': 'Missing required field: sl'}, 400)
+
+
+@pytest.mark.parametrize('data, error', [
+    ('EURUSD', 'Order must be a JSON object'),
+    (['EURUSD', 0.01], 'Order must be a JSON object'),
+    ({'symbol': 1, 'volume': 0.01, 'direction': 'BUY', 'price': 1.1, 'sl': 1.0, 'tp': 1.2},
+     'Invalid symbol - must be a string'),
+    ({'symbol': 'EURUSD', 'volume': 'lots', 'direction': 'BUY', 'price': 1.1, 'sl': 1.0, 'tp': 1.2},
+     'Invalid volume - must be a number'),
+])
+def test_malformed_order_is_rejected(data, error):
+    with pytest.raises(OrderRejected) as e:
+        parse_order(data)
+    assert (e.value.payload, e.value.status) == ({'error': error}, 400)
+
+
+def test_market_request_uses_the_tick_side(mt5):
+    mt5_request, details = build_market_request(mt5, order(), mt5.symbols['EURUSD'], TICK)
+    assert (mt5_request['type'], mt5_request['price'], mt5_request['symbol']) == \
+        (fake_mt5.ORDER_TYPE_BUY, 1.10010, 'EURUSD')
+    with pytest.raises(OrderRejected, match='lower than'):
+        build_market_request(mt5, order(price=1.1010), mt5.symbols['EURUSD'], TICK)
+    with pytest.raises(OrderRejected, match='SL must be above'):
+        build_market_request(mt5, order(direction='SELL', price=1.1, sl=1.099, tp=1.09), mt5.symbols['EURUSD'], TICK)
+
+
+def test_pending_request_picks_limit_or_stop(mt5):
+    info = mt5.symbols['EURUSD']
+    stop, _ = build_pending_request(mt5, order(price=1.10100, sl=1.09900, tp=1.10500), info, TICK, 2, 10)
+    limit, _ = build_pending_request(mt5, order(price=1.09900), info, TICK, 2, 10)
+    assert (stop['type'], limit['type']) == (fake_mt5.ORDER_TYPE_BUY_STOP, fake_mt5.ORDER_TYPE_BUY_LIMIT)
+    with pytest.raises(OrderRejected, match='too close to current price'):
+        build_pending_request(mt5, order(price=1.10011), info, TICK, 2, 10)
+    with pytest.raises(OrderRejected, match='SL too close'):
+        build_pending_request(mt5, order(price=1.09900, sl=1.09895), info, TICK, 2, 10)
+
+
+def test_rollback_removes_pending_and_closes_market_orders(mt5):
+    info = mt5.symbols['EURUSD']
+    pending, _ = build_pending_request(mt5, order(price=1.09900), info, TICK, 2, 10)
+    market, _ = build_market_request(mt5, order(), info, TICK)
+    pending_result, market_result = submit(mt5, pending), submit(mt5, market)
+
+    remove = rollback_request(mt5, pending, pending_result, TICK)
+    assert remove == {'action': fake_mt5.TRADE_ACTION_REMOVE, 'order': pending_result.order, 'comment': 'FBB'}
+    close = rollback_request(mt5, market, market_result, TICK)
+    assert (close['type'], close['position'], close['price']) == \
+        (fake_mt5.ORDER_TYPE_SELL, market_result.order, TICK.bid)
+
+
+def test_submit_reports_a_missing_result(mt5):
+    mt5.order_send = lambda request: None
+    with pytest.raises(OrderRejected) as e:
+        submit(mt5, {'symbol': 'EURUSD'})
+    assert e.value.status == 500 and e.value.payload['error'] == 'Order failed - no response from MT5'
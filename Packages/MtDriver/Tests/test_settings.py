@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+import pytest
+from mysql.connector import Error
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from settings import SettingsCache
+
+
+class TableStub:
+    """Stands in for a DbPool serving the `setting` table"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+        self.fail = False
+
+    def query(self, sql, params=(), label=None):
+        self.queries += 1
+        if self.fail:
+            raise Error("server has gone away")
+        return list(self.rows)
+
+
+@pytest.fixture
+def table():
+    return TableStub([
+        (1, 'Mt5Login', '5034048580', 'STRING'),
+        (2, 'MtMinDistancePoint', '2', 'INT'),
+        (3, 'RiskReward', '2', 'FLOAT'),
+    ])
+
+
+def test_one_query_serves_every_read(table):
+    settings = SettingsCache(table)
+    assert settings.get('Mt5Login') == '5034048580'
+    assert settings.get('MtMinDistancePoint') == 2
+    assert settings.get('RiskReward') == 2.0
+    assert settings.record('Mt5Login') == (1, 'Mt5Login', '5034048580', 'STRING')
+    assert settings.get('Missing', 7) == 7
+    assert table.queries == 1
+
+
+def test_subscribers_see_changes_on_reload(table):
+    settings = SettingsCache(table)
+    seen = []
+    unsubscribe = settings.subscribe('MtMinDistancePoint', seen.append, default=5)
+    table.rows[1] = (2, 'MtMinDistancePoint', '4', 'INT')
+    settings.load()
+    settings.load()
+    del table.rows[1]
+    settings.load()
+    unsubscribe()
+    table.rows.append((2, 'MtMinDistancePoint', '9', 'INT'))
+    settings.load()
+    assert seen == [2, 4, 5]
+
+
+def test_failed_reload_keeps_values_and_reads_stay_off_the_db(table):
+    table.fail = True
+    settings = SettingsCache(table)
+    assert settings.get('Mt5Login') is None
+    assert settings.get('Mt5Login') is None
+    assert table.queries == 1
+    table.fail = False
+    assert settings.load()
+    table.fail = True
+    assert not settings.load()
+    assert settings.get('Mt5Login') == '5034048580'
@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from fake_mt5 import FakeMt5
+from conftest import Clock, connected_session
+from symbol_cache import SymbolInfoCache
+
+
+class CountingMt5(FakeMt5):
+    def __init__(self):
+        super().__init__()
+        self.symbol_info_calls = 0
+
+    def symbol_info(self, symbol):
+        self.symbol_info_calls += 1
+        return super().symbol_info(symbol)
+
+
+@pytest.fixture
+def mt5():
+    return CountingMt5()
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def cache(mt5, clock):
+    return SymbolInfoCache(connected_session(mt5), ttl=60, clock=clock)
+
+
+def test_metadata_is_fetched_once_per_ttl(cache, mt5, clock):
+    meta = cache.get('eurusd')
+    assert (meta.name, meta.digits, meta.point, meta.volume_step) == ('EURUSD', 5, 0.00001, 0.01)
+    cache.get('EURUSD')
+    assert mt5.symbol_info_calls == 1
+    clock.now = 60
+    cache.get('EURUSD')
+    assert mt5.symbol_info_calls == 2
+    assert cache.status()['hits'] == 1
+
+
+def test_invalidate_and_reconnect_drop_entries(cache, mt5):
+    cache.warm(['EURUSD', 'GBPUSD', 'XAUUSD'])
+    assert cache.status()['symbols'] == ['EURUSD', 'GBPUSD']
+    cache.invalidate('gbpusd')
+    cache.get('GBPUSD')
+    assert mt5.symbol_info_calls == 4
+
+    cache.session.mark_disconnected()
+    cache.session.reconnect(1)
+    cache.get('EURUSD')
+    assert mt5.symbol_info_calls == 5
+
+
+def test_warm_up_is_not_queued_behind_range_fetches(cache):
+    before = cache.session.status()['queue']['order']['acquired']  # reconnect() takes it too
+    cache.warm(['EURUSD'])
+    queue = cache.session.status()['queue']
+    assert queue['order']['acquired'] == before + 1 and queue['history']['acquired'] == 0
+
+
+def test_unknown_symbol_is_not_cached(cache, mt5):
+    assert cache.get('XAUUSD') is None
+    assert cache.get('XAUUSD') is None
+    assert mt5.symbol_info_calls == 2
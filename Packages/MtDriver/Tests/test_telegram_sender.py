@@ -0,0 +1,237 @@
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from conftest import Clock
+from telegram_sender import TelegramSender, TokenBucket
+
+
+class StubTelegram(ThreadingHTTPServer):
+    """Local sendMessage endpoint; answers with the queued (status, body) responses, then 200"""
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.posts = []
+        self.responses = []
+        self.connections = set()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def texts(self):
+        with self.lock:
+            return [post['text'] for post in self.posts]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse is visible
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        with self.server.lock:
+            self.server.connections.add(self.client_address)
+            status, body = self.server.responses.pop(0) if self.server.responses else (200, {'ok': True})
+            if status == 200:
+                self.server.posts.append(dict(form, path=self.path))
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = StubTelegram()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_sender(server, **kwargs):
+    options = dict(per_minute=6000, burst=5, coalesce_window=0.05, backoff_initial=0.05, backoff_max=0.2)
+    options.update(kwargs)
+    return TelegramSender('TOKEN', '-100', api_url=server.url, **options)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_token_bucket_refills_at_rate():
+    clock = Clock()
+    bucket = TokenBucket(rate=2.0, capacity=2, clock=clock)
+    bucket.take()
+    bucket.take()
+    assert bucket.wait_time() == pytest.approx(0.5)
+    clock.now = 0.5
+    assert bucket.wait_time() == 0.0
+    clock.now = 100
+    bucket.take()
+    bucket.take()
+    assert bucket.wait_time() > 0  # capacity caps what is saved up
+
+
+def test_token_bucket_penalize_blocks_for_retry_after():
+    clock = Clock()
+    bucket = TokenBucket(rate=1.0, capacity=3, clock=clock)
+    bucket.penalize(5)
+    assert bucket.wait_time() == pytest.approx(6)
+    clock.now = 6
+    assert bucket.wait_time() == 0.0
+
+
+def test_digest_splits_at_limit():
+    assert TelegramSender.digest(['a', 'b', 'c']) == ['a\n\nb\n\nc']
+    assert TelegramSender.digest(['aaaa', 'bbbb', 'cc'], limit=10) == ['aaaa\n\nbbbb', 'cc']
+    assert TelegramSender.digest(['x' * 15], limit=10) == ['x' * 10, 'x' * 5]
+
+
+def test_long_message_is_split_between_lines():
+    lines = [f"*{symbol}* closed" for symbol in ('EURUSD', 'GBPUSD', 'USDJPY')]  # 15 characters each
+    posts = TelegramSender.digest(['\n'.join(lines), 'next'], limit=40)
+    assert posts == ['\n'.join(lines[:2]), lines[2] + '\n\nnext']
+    assert '\n'.join(posts).replace('\n\n', '\n') == '\n'.join(lines + ['next'])  # nothing lost
+
+
+def test_sends_message_to_chat(server):
+    sender = make_sender(server)
+    sender.send('hello')
+    assert wait_for(lambda: server.texts() == ['hello'])
+    assert server.posts[0]['chat_id'] == '-100'
+    assert server.posts[0]['parse_mode'] == 'Markdown'
+    assert server.posts[0]['path'] == '/botTOKEN/sendMessage'
+    sender.stop()
+
+
+def test_burst_is_coalesced_into_digest(server):
+    sender = make_sender(server, coalesce_window=0.2)
+    for i in range(5):
+        sender.send(f"msg {i}")
+    assert wait_for(lambda: sender.stats['sent_messages'] == 5)
+    assert server.texts() == ['\n\n'.join(f"msg {i}" for i in range(5))]
+    assert sender.stats['sent_posts'] == 1
+    sender.stop()
+
+
+def test_rate_limit_turns_backlog_into_digest(server):
+    # One token a second and none saved up: everything after the first post waits and is merged
+    sender = make_sender(server, per_minute=60, burst=1, coalesce_window=0)
+    sender.send('first')
+    assert wait_for(lambda: server.texts() == ['first'])
+    for i in range(3):
+        sender.send(f"later {i}")
+    assert wait_for(lambda: len(server.texts()) == 2)
+    assert server.texts()[1] == 'later 0\n\nlater 1\n\nlater 2'
+    sender.stop()
+
+
+def test_server_error_is_retried_with_backoff(server):
+    server.responses = [(500, {'ok': False}), (502, {'ok': False})]
+    sender = make_sender(server)
+    sender.send('important')
+    assert wait_for(lambda: server.texts() == ['important'])
+    assert sender.stats['retries'] == 2
+    assert sender.stats['dropped'] == 0
+    sender.stop()
+
+
+def test_429_waits_retry_after(server):
+    server.responses = [(429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 0.3}})]
+    sender = make_sender(server)
+    started = time.monotonic()
+    sender.send('throttled')
+    assert wait_for(lambda: server.texts() == ['throttled'])
+    assert time.monotonic() - started >= 0.3
+    assert sender.stats['retries'] == 1
+    sender.stop()
+
+
+def test_unparsable_markup_is_resent_as_plain_text(server):
+    server.responses = [(400, {'ok': False, 'description': "Bad Request: can't parse entities"})]
+    sender = make_sender(server)
+    sender.send('*broken')
+    assert wait_for(lambda: server.texts() == ['*broken'])
+    assert 'parse_mode' not in server.posts[0]
+    assert sender.stats['dropped'] == 0
+    sender.stop()
+
+
+def test_bad_request_is_dropped(server):
+    server.responses = [(400, {'ok': False, 'description': "Bad Request: chat not found"})]
+    sender = make_sender(server)
+    sender.send('lost')
+    assert wait_for(lambda: sender.stats['dropped'] == 1)
+    sender.send('fine')
+    assert wait_for(lambda: server.texts() == ['fine'])
+    assert sender.stats['retries'] == 0
+    sender.stop()
+
+
+def test_stop_flushes_pending_messages(server):
+    sender = make_sender(server, coalesce_window=10)  # would otherwise hold the messages for 10 s
+    for i in range(3):
+        sender.send(f"shutdown {i}")
+    started = time.monotonic()
+    sender.stop()
+    assert time.monotonic() - started < 2
+    assert server.texts() == ['shutdown 0\n\nshutdown 1\n\nshutdown 2']
+    assert sender.pending() == 0
+
+
+def test_stop_gives_up_at_its_timeout(server):
+    server.responses = [(429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 30}})]
+    sender = make_sender(server, coalesce_window=0)
+    sender.send('throttled')
+    assert wait_for(lambda: sender.stats['retries'] == 1)
+    started = time.monotonic()
+    sender.stop(timeout=0.5)
+    assert time.monotonic() - started < 2
+    assert server.texts() == [] and sender.stats['dropped'] == 1
+
+
+def test_connection_is_reused(server):
+    sender = make_sender(server, coalesce_window=0)
+    for i in range(3):
+        sender.send(f"msg {i}")
+        assert wait_for(lambda: sender.stats['sent_messages'] == i + 1)
+    assert len(server.connections) == 1
+    sender.stop()
+
+
+def test_full_queue_drops_oldest(server):
+    sender = make_sender(server, max_pending=2)
+    sender.stop()  # keep the worker from draining while queueing
+    sender.start = lambda: None
+    for i in range(3):
+        sender.send(f"msg {i}")
+    assert sender.pending() == 2
+    assert sender.stats['dropped'] == 1
+    assert list(sender._pending) == ['msg 1', 'msg 2']
+
+
+def test_no_token_sends_nothing(server):
+    sender = TelegramSender('', '-100', api_url=server.url)
+    sender.send('hello')
+    assert sender.pending() == 0
+    assert sender._thread is None
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from fake_mt5 import (DEAL_ENTRY_OUT, DEAL_REASON_SL, DEAL_TYPE_SELL, ORDER_TYPE_BUY, TRADE_ACTION_DEAL, FakeMt5,
+                      TradeDeal)
+from conftest import Clock, connected_session
+from tgChannel import TelegramChannel
+
+NOW = 1760000000
+
+
+@pytest.fixture
+def clock():
+    return Clock(NOW)
+
+
+@pytest.fixture
+def mt5(clock):
+    return FakeMt5(clock=clock)
+
+
+@pytest.fixture
+def channel(mt5, tmp_path):
+    channel = TelegramChannel('', '-100', session=connected_session(mt5), deal_state_path=str(tmp_path / 'deals.json'))
+    channel.events = []
+    channel.on_order_event = lambda event, data: channel.events.append((event, data))
+    return channel
+
+
+def close_deal(position, time):
+    return TradeDeal(position + 1, position + 1, time, time * 1000, DEAL_TYPE_SELL, DEAL_ENTRY_OUT, 0, position,
+                     DEAL_REASON_SL, 0.01, 1.09, 0.0, 0.0, -1.0, 0.0, 'EURUSD', '', 1.09, 1.12)
+
+
+def test_closed_deal_duration_comes_from_the_opening_deal(channel, mt5, clock):
+    result = mt5.order_send({'action': TRADE_ACTION_DEAL, 'symbol': 'EURUSD', 'type': ORDER_TYPE_BUY,
+                             'volume': 0.01, 'price': 1.1, 'sl': 1.09, 'tp': 1.12})
+    assert not hasattr(mt5.deals[0], 'time_close')  # like the real TradeDeal
+    channel._process_closed_deal(close_deal(result.deal, NOW + 5400 + 59))
+    event, data = channel.events[-1]
+    assert (event, data['duration'], data['direction']) == ('closed', '1h 30m', 'SELL')
+
+
+def test_unknown_opening_deal_still_reports_the_close(channel):
+    channel._process_closed_deal(close_deal(999, NOW))
+    assert channel.events[-1][1]['duration'] == 'unknown'
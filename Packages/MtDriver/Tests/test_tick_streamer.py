@@ -0,0 +1,98 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from fake_mt5 import FakeMt5, TICKS_DTYPE
+from conftest import Clock, SocketIOStub, connected_session
+from tick_streamer import TickBarAggregator, TickCursor, TickStreamer, bar_room, tick_room
+
+NOW = 1760000000 + 0.1
+
+
+@pytest.fixture
+def clock():
+    return Clock(NOW)
+
+
+@pytest.fixture
+def streamer(clock):
+    mt5 = FakeMt5(clock=clock)
+    mt5.initialize()
+    return TickStreamer(SocketIOStub(), connected_session(mt5), max_batch=6, clock=clock)
+
+
+def ticks(times_msc):
+    array = np.zeros(len(times_msc), dtype=TICKS_DTYPE)
+    array['time_msc'] = times_msc
+    return array
+
+
+def test_cursor_never_repeats_ticks_sharing_a_millisecond():
+    cursor = TickCursor(1000)
+    assert cursor.advance(ticks([1000, 1200, 1200]))['time_msc'].tolist() == [1000, 1200, 1200]
+    assert cursor.date_from() == 1
+    # Refetched from the start of the second, plus a third tick at 1200 and a new one
+    assert cursor.advance(ticks([1000, 1200, 1200, 1200, 1500]))['time_msc'].tolist() == [1200, 1500]
+    assert len(cursor.advance(ticks([1000, 1200, 1200, 1200, 1500]))) == 0
+
+
+def test_aggregator_closes_bars_on_boundaries_and_by_time():
+    aggregator = TickBarAggregator(5)
+    closed = aggregator.add([1000, 2000, 4999, 5000], [1.0, 1.2, 0.9, 1.1])
+    assert closed == [{'start': 0, 'open': 1.0, 'high': 1.2, 'low': 0.9, 'close': 0.9, 'ticks': 3}]
+    assert aggregator.flush(9999) == []
+    assert aggregator.flush(10000)[0]['close'] == 1.1
+    assert aggregator.add([9000], [2.0]) == [] and aggregator.bar is None  # late tick of a closed bar
+
+
+def test_ticks_are_batched_per_poll(streamer, clock):
+    streamer.subscribe('a', 'eurusd')
+    streamer.subscribe('b', 'EURUSD')
+    assert len(streamer.socketio.tasks) == 1
+    poller = streamer._pollers['EURUSD']
+
+    streamer.poll_once(poller)  # starts at the terminal's last tick
+    assert streamer.socketio.emits[-1][1]['time'] == [1760000000000]
+    clock.now += 1
+    streamer.poll_once(poller)
+    event, data, room = streamer.socketio.emits[-1]
+    assert (event, room) == ('ticks', tick_room('EURUSD'))
+    assert data['time'] == [1760000000250, 1760000000500, 1760000000750, 1760000001000]
+    assert len(data['bid']) == len(data['ask']) == 4
+
+    clock.now += 5  # 20 ticks pending; a fetch returns max_batch, one of them the already sent 1.000
+    streamer.poll_once(poller)
+    assert len(streamer.socketio.emits[-1][1]['time']) == 5
+    streamer.poll_once(poller)
+    assert streamer.socketio.emits[-1][1]['time'][0] == 1760000002500
+    assert streamer.status()[0]['emits'] == 4
+
+
+def test_bar_subscribers_get_closed_bars_in_utc(clock):
+    mt5 = FakeMt5(clock=lambda: clock() + 3600)  # terminal on UTC+1 server time
+    mt5.initialize()
+    streamer = TickStreamer(SocketIOStub(), connected_session(mt5), offset_seconds=3600, clock=clock)
+    streamer.subscribe('a', 'EURUSD', bar_seconds=5)
+    poller = streamer._pollers['EURUSD']
+    streamer.poll_once(poller)
+    clock.now += 11
+    streamer.poll_once(poller)
+    event, data, room = streamer.socketio.emits[-1]
+    assert (event, room, data['seconds']) == ('tick_bars', bar_room('EURUSD', 5), 5)
+    assert [bar['closeTime'] for bar in data['bars']] == [1760000000, 1760000005]
+    assert [bar['ticks'] for bar in data['bars']] == [20, 20]
+    assert all(e[0] != 'ticks' for e in streamer.socketio.emits)
+
+    with pytest.raises(ValueError):
+        streamer.subscribe('a', 'EURUSD', bar_seconds=7)
+
+
+def test_poller_goes_with_its_last_subscriber(streamer):
+    streamer.subscribe('a', 'EURUSD')
+    streamer.subscribe('a', 'EURUSD', bar_seconds=60)
+    streamer.unsubscribe('a', 'EURUSD')
+    assert streamer.status()[0]['bar_subscribers'] == {60: 1}
+    streamer.unsubscribe_all('a')
+    assert streamer.status() == []
@@ -1,31 +1,36 @@
 from eventlet import monkey_patch
 monkey_patch()
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_socketio import SocketIO
-import MetaTrader5 as mt5
 from datetime import datetime, timedelta, timezone
 import eventlet
 from zoneinfo import ZoneInfo
 from collections import defaultdict
-from shared import initialize_mt5, setup_logging, target_tz
+from shared import mt5_init_kwargs, setup_logging, target_tz, target_tz_name, CANDLE_STORE_DIR, CANDLE_CACHE_DIR, \
+    DEAL_STATE_PATH, candles_db, core_db, settings
+from mt5_session import Mt5Session, Mt5ConnectionError, eventlet_executor, PRIORITY_ORDER
+from candle_streamer import CandleStreamer
+from tick_streamer import TickStreamer
+from candle_encoding import (negotiate, negotiate_stream, encode_candles, rates_to_columns, rows_to_columns,
+                             NDJSON)
 from tgChannel import TelegramChannel
-from threading import Lock
+from symbol_cache import SymbolInfoCache
+from orders import OrderRejected, parse_order, build_market_request, build_pending_request, submit, \
+    rollback_request
+import json
+import numpy as np
 import logging
-import mysql.connector
+import os
+import sys
+
+# CandleStore package (candle_store, candle_cache); imported on first use, as it needs pyarrow
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'CandleStore'))
 
 # Initialize logging first
 setup_logging()
 logger = logging.getLogger(__name__)
 
-# 6778796222:AAH-UKnDf5y5axNcLjk1LL1prUx2i7R9EL8  // do not use in this repo
-bot_token = ""
-# Initialize Telegram channel
-tg_bot = TelegramChannel(
-    bot_token='',
-    chat_id='-1002469452779'
-)
-
 eventlet.monkey_patch()
 
 app = Flask(__name__)
@@ -35,15 +40,41 @@ socketio = SocketIO(app,
                     logger=True,
                     engineio_logger=True)
 
-# Track active subscriptions
-active_subscriptions = {}
-subscription_lock = Lock()
+# One long-lived terminal connection shared by every handler. MetaTrader5 calls block
+# in C, so they run on eventlet's OS thread pool instead of the green thread hub
+mt5_session = Mt5Session(init_kwargs=mt5_init_kwargs, executor=eventlet_executor())
+
+# symbol_info metadata for the order path and the Telegram channel, warmed at startup
+SYMBOL_INFO_TTL = 300
+SYMBOL_CACHE_WARM = ['EURUSD', 'GBPUSD']
+symbol_cache = SymbolInfoCache(mt5_session, ttl=SYMBOL_INFO_TTL)
 
+# Opened on first use so pyarrow is only needed when the store is queried
+candle_store = None
+candle_cache = None
+STREAM_CHUNK_SIZE = 10080  # candles per streamed chunk (one week of M1)
+MAX_BATCH_ORDERS = 50  # orders accepted by one /place_orders request
+# MT5 range fetches release the session between slices so orders and live polls can get in
+RANGE_SLICE_MINUTES = 1440
+
+# Order distance limits in points, live-updated from the `setting` table
 min_distance_point = 2
 min_stop_distance_point = 10
 
-target_tz_name = "Europe/Athens"
-target_tz = ZoneInfo(target_tz_name) # +02:00 | +03:00
+
+def set_min_distance_point(value):
+    global min_distance_point
+    min_distance_point = value
+
+
+def set_min_stop_distance_point(value):
+    global min_stop_distance_point
+    min_stop_distance_point = value
+
+
+settings.subscribe("MtMinDistancePoint", set_min_distance_point, default=min_distance_point)
+settings.subscribe("MtMinStopDistancePoint", set_min_stop_distance_point, default=min_stop_distance_point)
+
 
 def now_in_utc():
     return datetime.now(timezone.utc)
@@ -59,6 +90,40 @@ def to_utc(dt: datetime):
         
 
 target_tz_offset_seconds = target_tz.utcoffset(now_in_utc()).seconds
+
+# Candles are polled this many seconds after each bar close, then retried every
+# BAR_RETRY_INTERVAL seconds until the broker publishes the bar (at most BAR_RETRY_TIMEOUT)
+BAR_POLL_DELAY = 0.25
+BAR_RETRY_INTERVAL = 0.5
+BAR_RETRY_TIMEOUT = 15
+BAR_IDLE_AFTER = 3  # boundaries without a bar (market closed) before retries stop
+
+# One MT5 poller per (symbol, timeframe), shared by every Socket.IO subscriber
+candle_streamer = CandleStreamer(socketio, mt5_session, offset_seconds=target_tz_offset_seconds,
+                                 delay=BAR_POLL_DELAY, retry_interval=BAR_RETRY_INTERVAL,
+                                 retry_timeout=BAR_RETRY_TIMEOUT, idle_after=BAR_IDLE_AFTER)
+
+# Ticks are batched per symbol and emitted at most once every TICK_STREAM_INTERVAL seconds
+TICK_STREAM_INTERVAL = 0.25
+TICK_STREAM_MAX_BATCH = 1000
+tick_streamer = TickStreamer(socketio, mt5_session, offset_seconds=target_tz_offset_seconds,
+                             interval=TICK_STREAM_INTERVAL, max_batch=TICK_STREAM_MAX_BATCH)
+
+# 6778796222:AAH-UKnDf5y5axNcLjk1LL1prUx2i7R9EL8  // do not use in this repo
+bot_token = ""
+# Telegram allows about 20 messages a minute to a group; bursts beyond that are sent as digests
+TELEGRAM_MESSAGES_PER_MINUTE = 20
+# Initialize Telegram channel
+tg_bot = TelegramChannel(
+    bot_token='',
+    chat_id='-1002469452779',
+    symbol_cache=symbol_cache,
+    session=mt5_session,
+    deal_state_path=DEAL_STATE_PATH,
+    offset_seconds=target_tz_offset_seconds,
+    messages_per_minute=TELEGRAM_MESSAGES_PER_MINUTE
+)
+
 utc_tz = ZoneInfo("UTC")
 
 live_start_time_target_tz = now_in_target_tz().replace(tzinfo=None)
@@ -130,11 +195,8 @@ def get_closed_positions_stats(start_date: datetime) -> dict:
     
     # Rest of the function remains the same but uses these timestamps
     try:
-        if not mt5.initialize():
-            logging.error("MT5 initialization failed")
-            return {'error': True}
-
-        deals = mt5.history_deals_get(effective_start.timestamp(), now_in_target_tz().timestamp())
+        with mt5_session.acquire() as mt5:
+            deals = mt5.history_deals_get(effective_start.timestamp(), now_in_target_tz().timestamp())
         if not deals:
             return stats
 
@@ -156,422 +218,380 @@ def get_closed_positions_stats(start_date: datetime) -> dict:
         stats['symbols'] = dict(stats['symbols'])
         return stats
 
+    except Mt5ConnectionError:
+        logging.error("MT5 initialization failed")
+        return {'error': True}
     except Exception as e:
         logging.error(f"Error retrieving closed positions: {str(e)}")
         stats['error'] = True
         return stats
-    finally:
-        mt5.shutdown()
 
 
-def get_candles(symbol, timeframe, num_candles=360):
-    """Fetch the latest num_candles candle data with enhanced error handling"""
-    try:
-        if not initialize_mt5():
-            logging.error("MT5 initialization failed")
-            return None
-
-        if not mt5.symbol_select(symbol, True):
-            logging.error(f"Symbol {symbol} not found in Market Watch")
-            return None
-
-        timeframe_map = {'PERIOD_M1': mt5.TIMEFRAME_M1}
-        mt5_timeframe = timeframe_map.get(timeframe.upper())
-        if not mt5_timeframe:
-            logging.error(f"Invalid timeframe: {timeframe}")
-            return None
-
-        rates = mt5.copy_rates_from_pos(symbol, mt5_timeframe, 1, num_candles)
-        if rates is None or len(rates) == 0:
-            logging.warning(f"No data returned for {symbol} {timeframe}")
-            return None
-
-        candles = [
-            {
-                'closeTime': int(rate[0]) - target_tz_offset_seconds,
-                'open': rate[1],
-                'high': rate[2],
-                'low': rate[3],
-                'close': rate[4],
-                'name': symbol,
-                'period': timeframe.upper()
-            }
-            for rate in rates
-        ]
-        return candles
+def get_candle_store():
+    global candle_store
+    if candle_store is None:
+        from candle_store import CandleStore
+        candle_store = CandleStore(CANDLE_STORE_DIR)
+    return candle_store
 
-    except Exception as e:
-        logging.error(f"Error fetching candles: {str(e)}")
-        return None
-    finally:
+
+def get_candle_cache():
+    global candle_cache
+    if candle_cache is None:
+        from candle_cache import CandleCache
+        candle_cache = CandleCache(CANDLE_CACHE_DIR)
+    return candle_cache
+
+
+def candles_response(columns, symbol, period='PERIOD_M1'):
+    """Candle columns in the format picked from the Accept header (JSON by default)"""
+    mimetype = negotiate(request.accept_mimetypes)
+    return Response(encode_candles(columns, symbol, period, mimetype), status=200, mimetype=mimetype)
+
+
+def stream_response(chunks, symbol, period='PERIOD_M1'):
+    """Stream candle column chunks as NDJSON lines or packed frames (chunked transfer).
+
+    The generator only pulls the next chunk once the previous one has been
+    written to the client socket, so memory stays at one chunk and a slow
+    client slows the source down instead of piling up buffers.
+    """
+    mimetype = negotiate_stream(request.accept_mimetypes)
+
+    def generate():
         try:
-            mt5.shutdown()
+            for columns in chunks:
+                if len(columns['closeTime']):
+                    yield encode_candles(columns, symbol, period, mimetype)
+                eventlet.sleep(0)  # let other greenlets run between chunks
         except Exception as e:
-            logging.error(f"Error shutting down MT5: {str(e)}")
+            logging.error(f"Candle stream for {symbol} aborted: {str(e)}")
+            if mimetype == NDJSON:
+                yield (json.dumps({"error": "stream aborted"}) + "\n").encode()
+        finally:
+            chunks.close()
+
+    return Response(generate(), status=200, mimetype=mimetype)
+
+
+CANDLES_IN_RANGE_SQL = (
+    "SELECT closeTime, open, high, low, close FROM candles "
+    "WHERE name = %s AND closeTime >= %s AND closeTime <= %s ORDER BY closeTime"
+)
+
+
+def db_candle_chunks(symbol, start, end, chunk_size):
+    """Candles of [start, end] from MySQL through an unbuffered (server-side) cursor"""
+    for rows in candles_db.iter_query(CANDLES_IN_RANGE_SQL, (symbol, start, end), chunk_size, label='candles_in_stream'):
+        yield rows_to_columns(rows)
+
+
+def cache_candle_chunks(records, chunk_size):
+    for i in range(0, len(records), chunk_size):
+        yield records[i:i + chunk_size]
+
+
+def store_candle_chunks(symbol, start, end, chunk_size):
+    window = chunk_size * 60
+    for window_start in range(start, end + 1, window):
+        yield get_candle_store().read(symbol, window_start, min(window_start + window - 1, end))
+
+
+def mt5_rate_slices(symbol, start_dt, end_dt, slice_minutes=RANGE_SLICE_MINUTES):
+    """M1 rates of [start_dt, end_dt] as successive copy_rates_range slices.
+
+    The session is acquired per slice at history priority, so a months-long
+    fetch lets queued orders, tick reads and candle polls go first between
+    slices instead of holding the terminal until it is done.
+    """
+    window = timedelta(minutes=slice_minutes)
+    while start_dt <= end_dt:
+        window_end = min(start_dt + window - timedelta(seconds=1), end_dt)
+        with mt5_session.acquire() as mt5:
+            rates = mt5.copy_rates_range(symbol, mt5.TIMEFRAME_M1, start_dt, window_end)
+        if rates is not None and len(rates):
+            yield rates
+        start_dt = window_end + timedelta(seconds=1)
+
+
+def mt5_rates_range(symbol, start_dt, end_dt):
+    slices = list(mt5_rate_slices(symbol, start_dt, end_dt))
+    return np.concatenate(slices) if slices else None
+
+
+def mt5_candle_chunks(symbol, start_dt, end_dt, chunk_size):
+    """Successive chunk_size-minute windows, each fetched in slices"""
+    window = timedelta(minutes=chunk_size)
+    while start_dt <= end_dt:
+        window_end = min(start_dt + window - timedelta(seconds=1), end_dt)
+        yield rates_to_columns(mt5_rates_range(symbol, start_dt, window_end), target_tz_offset_seconds)
+        start_dt = window_end + timedelta(seconds=1)
 
 
 @socketio.on('start_candle_stream')
 def handle_candle_stream(data):
     """Handle new candle stream requests"""
+    sid = request.sid
     try:
-        sid = request.sid
         subscriptions = data.get('subscriptions', [])
 
-        if sid in active_subscriptions:
-            active_subscriptions[sid]['active'] = False
-
-        active_subscriptions[sid] = {
-            'symbols': {
-                f"{sub['symbol']}_{sub['timeframe']}": {
-                    'symbol': sub['symbol'],
-                    'timeframe': sub['timeframe'],
-                    'last_candle': 0
-                } for sub in subscriptions
-            },
-            'active': True
-        }
-
-        socketio.start_background_task(candle_polling_worker, sid, socketio)
+        # A repeated request replaces the client's previous subscriptions. A subscription
+        # may be the resume token of the last new_candles batch ({symbol, timeframe, since})
+        candle_streamer.unsubscribe_all(sid)
+        for sub in subscriptions:
+            candle_streamer.subscribe(sid, sub['symbol'], sub['timeframe'], since=sub.get('since'))
+
         socketio.emit('status', {'message': 'Candle streaming started'}, room=sid)
 
     except Exception as e:
         logging.error(f"Stream setup error: {str(e)}")
         socketio.emit('error', {'message': 'Failed to start stream'}, room=sid)
 
-def candle_polling_worker(sid, socketio):
-    """Background task to check for new candles"""
-    with app.app_context():
-        while active_subscriptions.get(sid, {}).get('active', False):
-            try:
-                subs = active_subscriptions.get(sid, {}).get('symbols', {})
-                for key, config in subs.items():
-                    print_default_data()
-                    candles = get_candles(config['symbol'], config['timeframe'])
-                    if candles:
-                        # Emit only new candles
-                        socketio.emit('new_candles', candles, room=sid)
-                        config['last_candle'] = max(candle['closeTime'] for candle in candles)
-                        # for candle in candles:
-                            # if candle['closeTime'] > config['last_candle']:
-                        # Update last_candle to the latest closeTime
-                sleep_time = 20
-                secs = now_in_utc().second % sleep_time
-                eventlet.sleep(sleep_time - secs)
-            except Exception as e:
-                logging.error(f"Polling error: {str(e)}")
-                break
+
+@socketio.on('stop_candle_stream')
+def handle_stop_candle_stream(data=None):
+    candle_streamer.unsubscribe_all(request.sid)
+    socketio.emit('status', {'message': 'Candle streaming stopped'}, room=request.sid)
+
+
+@socketio.on('start_tick_stream')
+def handle_tick_stream(data):
+    """Subscribe to raw ticks ({symbol}) or server-built bars ({symbol, bar_seconds})"""
+    sid = request.sid
+    try:
+        subscriptions = data.get('subscriptions', [])
+
+        tick_streamer.unsubscribe_all(sid)
+        for sub in subscriptions:
+            tick_streamer.subscribe(sid, sub['symbol'], bar_seconds=sub.get('bar_seconds'))
+
+        socketio.emit('status', {'message': 'Tick streaming started'}, room=sid)
+
+    except Exception as e:
+        logging.error(f"Tick stream setup error: {str(e)}")
+        socketio.emit('error', {'message': 'Failed to start tick stream'}, room=sid)
+
+
+@socketio.on('stop_tick_stream')
+def handle_stop_tick_stream(data=None):
+    tick_streamer.unsubscribe_all(request.sid)
+    socketio.emit('status', {'message': 'Tick streaming stopped'}, room=request.sid)
+
 
 @socketio.on('disconnect')
 def handle_disconnect():
     sid = request.sid
-    with subscription_lock:
-        if sid in active_subscriptions:
-            active_subscriptions[sid]['active'] = False
-            del active_subscriptions[sid]
+    candle_streamer.unsubscribe_all(sid)
+    tick_streamer.unsubscribe_all(sid)
     logging.info(f"Client disconnected: {sid}")
 
 
+@app.route('/stream_stats', methods=['GET'])
+def stream_stats():
+    """Active pollers with their subscriber counts, and the bar-close scheduler counters"""
+    return jsonify({"pollers": candle_streamer.status(), "scheduler": candle_streamer.scheduler_status(),
+                    "ticks": tick_streamer.status()}), 200
+
+
 @app.route('/place_order', methods=['POST'])
 def place_order():
     """Execute trading orders with real-time price validation"""
     try:
-        data = request.json
-        required_fields = ['symbol', 'volume', 'direction', 'sl', 'tp', 'price']
+        order = parse_order(request.json)
+        symbol = order['symbol']
 
-        # Validate request
-        for field in required_fields:
-            if field not in data or data[field] is None:
-                logger.warning(f"Missing field {field} in order request")
-                return jsonify({"error": f"Missing required field: {field}"}), 400
+        with mt5_session.acquire(PRIORITY_ORDER) as mt5:
+            # Get symbol precision
+            symbol_info = symbol_cache.get(symbol, mt5)
+            if not symbol_info:
+                return jsonify({"error": "No symbol_info data"}), 500
 
-        if not initialize_mt5():
-            logger.error("MT5 initialization failed in place_order")
-            return jsonify({"error": "MT5 connection failed"}), 500
-
-        symbol = data['symbol'].upper()        
-        direction = data['direction'].upper()
-        volume = float(data['volume'])
-        entry_price = float(data['price'])
-        sl = float(data['sl'])
-        tp = float(data['tp'])
-        deviation = 5
-        order_type = mt5.ORDER_TYPE_BUY
-        current_price = 0
-        
-        # Get symbol precision
-        symbol_info = mt5.symbol_info(symbol)
+            # Get current market price
+            tick = mt5.symbol_info_tick(symbol)
+            if not tick:
+                return jsonify({"error": "Failed to get market price"}), 400
 
-        if not symbol_info:
-            return jsonify({"error": "No symbol_info data"}), 500
-        
-        digits = symbol_info.digits
-        point = symbol_info.point
+            mt5_request, details = build_market_request(mt5, order, symbol_info, tick)
 
-        # Format prices
-        entry_price = round(entry_price, digits)
-        sl = round(sl, digits)
-        tp = round(tp, digits)
-        
-        # Get current market price
-        tick = mt5.symbol_info_tick(symbol)
-        if not tick:
-            return jsonify({"error": "Failed to get market price"}), 400
-
-        # Determine prices based on direction
-        if direction == "BUY":
-            current_price = tick.ask  # Use ASK price for BUY orders
-            
-            if abs(current_price - entry_price) > 0.0002:
-                return jsonify({"error": f"for market orders current_price - entry_price is {abs(current_price - entry_price)} wich should be lower than 0.0002"}), 400
-            
-            # SL must be BELOW current_price, TP must be ABOVE current_price
-            if sl >= current_price:
-                return jsonify({"error": "SL must be below entry price for BUY"}), 400
-            if tp <= current_price:
-                return jsonify({"error": "TP must be above entry price for BUY"}), 400
-            
-            order_type = mt5.ORDER_TYPE_BUY
-            mt5_request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": volume,
-                "type": order_type,
-                "price": current_price,
-                "sl": sl,
-                "tp": tp,
-                "deviation": deviation,
-                "type_time": mt5.ORDER_TIME_GTC,
-                "magic": 12345,
-                "comment": "FBB",
-            }
-        elif direction == "SELL":
-            current_price = tick.bid  # Use BID price for SELL orders
-            
-            if abs(current_price - entry_price) > 0.0002:
-                return jsonify({"error": f"for market orders current_price - entry_price is {abs(current_price - entry_price)} wich should be lower than 0.0002"}), 400
-            
-            # SL must be ABOVE current_price, TP must be BELOW current_price
-            if sl <= current_price:
-                return jsonify({"error": "SL must be above entry price for SELL"}), 400
-            if tp >= current_price:
-                return jsonify({"error": "TP must be below entry price for SELL"}), 400
-            
-            order_type = mt5.ORDER_TYPE_SELL
-            mt5_request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": volume,
-                "type": order_type,
-                "price": current_price,
-                "sl": sl,
-                "tp": tp,
-                "deviation": deviation,
-                "type_time": mt5.ORDER_TIME_GTC,
-                "magic": 12345,
-                "comment": "FBB",
-            }
-        else:
-            return jsonify({"error": "Invalid direction - use BUY/SELL"}), 400
-
-        # Validate symbol
-        if not mt5.symbol_select(symbol, True):
-            return jsonify({"error": f"Symbol {symbol} not available"}), 400
-
-        # Execute order
-        result = mt5.order_send(mt5_request)
-        if not result:
-            error = mt5.last_error()
-            logger.error(f"Order failed for {symbol}: {error}")
-            return jsonify({
-                "error": "Order failed - no response from MT5",
-                "code": error[0],
-                "message": error[1]
-            }), 500
-        logger.info(f"Order executed successfully: {result.order}")
-
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            error = mt5.last_error()
-            return jsonify({
-                "error": "Order rejected",
-                "code": error[0],
-                "message": error[1],
-                "comment": result.comment
-            }), 400
-            
-        tg_bot.on_order_event('placed', {
-            'ticket': result.order,
-            'symbol': symbol,
-            'direction': direction,
-            'volume': volume,
-            'price': entry_price,
-            'sl': sl,
-            'tp': tp
-        })
-        
-        return jsonify({
-            "message": "Market order executed successfully",
-            "ticket": result.order,
-            "direction": direction,
-            "order_type": order_type,
-            "entry_price": entry_price,
-            "current_price": current_price,
-            "sl": sl,
-            "tp": tp
-        }), 200
+            # Validate symbol
+            if not mt5.symbol_select(symbol, True):
+                return jsonify({"error": f"Symbol {symbol} not available"}), 400
 
+            # Execute order
+            result = submit(mt5, mt5_request)
+
+        notify_order_placed(order, details, result)
+        return jsonify(dict(details, message="Market order executed successfully", ticket=result.order)), 200
+
+    except OrderRejected as e:
+        return jsonify(e.payload), e.status
+    except Mt5ConnectionError:
+        logger.error("MT5 initialization failed in place_order")
+        return jsonify({"error": "MT5 connection failed"}), 500
     except Exception as e:
         logger.error(f"Order processing error: {str(e)}", exc_info=True)
         return jsonify({"error": "Internal server error"}), 500
-    finally:
-        try:
-            mt5.shutdown()
-        except Exception as e:
-            logger.error(f"MT5 shutdown error: {str(e)}")
 
 
 @app.route('/place_limit_order', methods=['POST'])
 def place_limit_order():
     """Execute pending (limit/stop) orders with proper validations"""
     try:
-        data = request.json
-        required_fields = ['symbol', 'volume', 'direction', 'sl', 'tp', 'price']
+        order = parse_order(request.json)
+        symbol = order['symbol']
 
-        # Validate request
-        for field in required_fields:
-            if field not in data or data[field] is None:
-                logger.warning(f"Missing field {field} in order request")
-                return jsonify({"error": f"Missing required field: {field}"}), 400
+        with mt5_session.acquire(PRIORITY_ORDER) as mt5:
+            symbol_info = symbol_cache.get(symbol, mt5)
+            if not symbol_info:
+                return jsonify({"error": "No symbol_info data"}), 500
 
-        if not initialize_mt5():
-            logger.error("MT5 initialization failed in place_order")
-            return jsonify({"error": "MT5 connection failed"}), 500
+            # Get current market price
+            tick = mt5.symbol_info_tick(symbol)
+            if not tick:
+                return jsonify({"error": "Failed to get market price"}), 400
 
-        symbol = data['symbol'].upper()
-        direction = data['direction'].upper()
-        volume = float(data['volume'])
-        entry_price = float(data['price'])
-        sl = float(data['sl'])
-        tp = float(data['tp'])
-
-        # Get current market price
-        tick = mt5.symbol_info_tick(symbol)
-        if not tick:
-            return jsonify({"error": "Failed to get market price"}), 400
-
-        # Determine prices and order type
-        current_price = tick.ask if direction == "BUY" else tick.bid
-        price_diff = entry_price - current_price
-        
-        if direction == "BUY":
-            if entry_price > current_price:
-                order_type = mt5.ORDER_TYPE_BUY_STOP
-                min_distance = min_distance_point * mt5.symbol_info(symbol).point
-                if abs(price_diff) < min_distance:
-                    return jsonify({"error": f"Entry price too close to current price (min {min_distance})"}), 400
-            else:
-                order_type = mt5.ORDER_TYPE_BUY_LIMIT
-        elif direction == "SELL":
-            if entry_price < current_price:
-                order_type = mt5.ORDER_TYPE_SELL_STOP
-                min_distance = min_distance_point * mt5.symbol_info(symbol).point
-                if abs(price_diff) < min_distance:
-                    return jsonify({"error": f"Entry price too close to current price (min {min_distance})"}), 400
-            else:
-                order_type = mt5.ORDER_TYPE_SELL_LIMIT
-        else:
-            return jsonify({"error": "Invalid direction - use BUY/SELL"}), 400
-
-        # Validate symbol
-        if not mt5.symbol_select(symbol, True):
-            return jsonify({"error": f"Symbol {symbol} not available"}), 400
-
-        # Get symbol precision
-        symbol_info = mt5.symbol_info(symbol)
-        digits = symbol_info.digits
-        point = symbol_info.point
-
-        # Format prices
-        entry_price = round(entry_price, digits)
-        sl = round(sl, digits)
-        tp = round(tp, digits)
-
-        # Validate stop levels
-        min_stop_distance = min_stop_distance_point * point
-        if direction == "BUY":
-            if sl >= entry_price - min_stop_distance:
-                return jsonify({"error": "SL too close to entry price for BUY order"}), 400
-            if tp <= entry_price + min_stop_distance:
-                return jsonify({"error": "TP too close to entry price for BUY order"}), 400
-        else:
-            if sl <= entry_price + min_stop_distance:
-                return jsonify({"error": "SL too close to entry price for SELL order"}), 400
-            if tp >= entry_price - min_stop_distance:
-                return jsonify({"error": "TP too close to entry price for SELL order"}), 400
-
-        # Build order request
-        order_request = {
-            "action": mt5.TRADE_ACTION_PENDING,
-            "symbol": symbol,
-            "volume": volume,
-            "type": order_type,
-            "price": entry_price,
-            "sl": sl,
-            "tp": tp,
-            "deviation": 30,
-            "type_time": mt5.ORDER_TIME_GTC,
-            "type_filling": mt5.ORDER_FILLING_RETURN,  # More suitable for pending orders
-        }
-        
-        # Execute order
-        result = mt5.order_send(order_request)
-        if not result:
-            error = mt5.last_error()
-            logger.error(f"Order failed for {symbol}: {error}")
-            return jsonify({
-                "error": "Order failed - no response from MT5",
-                "code": error[0],
-                "message": error[1]
-            }), 500
-        logger.info(f"Order executed successfully: {result.order}")
-
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            error = mt5.last_error()
-            return jsonify({
-                "error": "Order rejected",
-                "code": error[0],
-                "message": error[1],
-                "comment": result.comment
-            }), 400
-
-        tg_bot.on_order_event('placed', {
-            'ticket': result.order,
-            'symbol': symbol,
-            'direction': f"PENDING {direction}",
-            'volume': volume,
-            'price': entry_price,
-            'sl': sl,
-            'tp': tp
-        })
+            mt5_request, details = build_pending_request(
+                mt5, order, symbol_info, tick, min_distance_point, min_stop_distance_point)
+
+            # Validate symbol
+            if not mt5.symbol_select(symbol, True):
+                return jsonify({"error": f"Symbol {symbol} not available"}), 400
+
+            # Execute order
+            result = submit(mt5, mt5_request)
 
+        notify_order_placed(order, details, result, pending=True)
         return jsonify({
             "message": "Pending order placed successfully",
             "ticket": result.order,
-            "direction": direction,
-            "entry_price": entry_price,
-            "sl": sl,
-            "tp": tp,
+            "direction": details['direction'],
+            "entry_price": details['entry_price'],
+            "sl": details['sl'],
+            "tp": details['tp'],
         }), 200
 
+    except OrderRejected as e:
+        return jsonify(e.payload), e.status
+    except Mt5ConnectionError:
+        logger.error("MT5 initialization failed in place_order")
+        return jsonify({"error": "MT5 connection failed"}), 500
     except Exception as e:
         logger.error(f"Order processing error: {str(e)}", exc_info=True)
         return jsonify({"error": "Internal server error"}), 500
-    finally:
+
+
+def notify_order_placed(order, details, result, pending=False):
+    tg_bot.on_order_event('placed', {
+        'ticket': result.order,
+        'symbol': order['symbol'],
+        'direction': f"PENDING {details['direction']}" if pending else details['direction'],
+        'volume': order['volume'],
+        'price': details['entry_price'],
+        'sl': details['sl'],
+        'tp': details['tp']
+    })
+
+
+@app.route('/place_orders', methods=['POST'])
+def place_orders():
+    """Place a batch of market / pending orders over one MT5 session.
+
+    Body: {"orders": [{"type": "market" | "pending", symbol, volume, direction,
+    sl, tp, price}, ...], "all_or_nothing": false}. Every order is validated
+    against one tick snapshot per symbol before anything is sent. With
+    all_or_nothing a validation failure sends nothing, and a failed send
+    removes the pending orders and closes the positions already placed.
+    Returns one result per order, in request order.
+    """
+    try:
+        data = request.json or {}
+        orders = data.get('orders')
+        all_or_nothing = bool(data.get('all_or_nothing', False))
+        if not isinstance(orders, list) or not orders:
+            return jsonify({"error": "orders must be a non-empty list"}), 400
+        if len(orders) > MAX_BATCH_ORDERS:
+            return jsonify({"error": f"At most {MAX_BATCH_ORDERS} orders per batch"}), 400
+
+        results = [None] * len(orders)
+        prepared = []  # (index, order, mt5_request, details, pending)
+        with mt5_session.acquire(PRIORITY_ORDER) as mt5:
+            ticks = {}
+            for index, raw in enumerate(orders):
+                try:
+                    order = parse_order(raw)
+                    kind = str(raw.get('type') or 'market').lower()
+                    if kind not in ('market', 'pending'):
+                        raise OrderRejected("Invalid type - use market/pending")
+                    symbol = order['symbol']
+                    symbol_info = symbol_cache.get(symbol, mt5)
+                    if not symbol_info:
+                        raise OrderRejected("No symbol_info data", 500)
+                    if symbol not in ticks:
+                        if not mt5.symbol_select(symbol, True):
+                            raise OrderRejected(f"Symbol {symbol} not available")
+                        ticks[symbol] = mt5.symbol_info_tick(symbol)
+                    tick = ticks[symbol]
+                    if not tick:
+                        raise OrderRejected("Failed to get market price")
+
+                    if kind == 'market':
+                        mt5_request, details = build_market_request(mt5, order, symbol_info, tick)
+                    else:
+                        mt5_request, details = build_pending_request(
+                            mt5, order, symbol_info, tick, min_distance_point, min_stop_distance_point)
+                    prepared.append((index, order, mt5_request, details, kind == 'pending'))
+                except OrderRejected as e:
+                    results[index] = dict(e.payload, status='rejected')
+
+            failed = len(prepared) < len(orders)
+            if failed and all_or_nothing:
+                for index in range(len(orders)):
+                    results[index] = results[index] or {"status": "skipped"}
+                return jsonify({"placed": 0, "results": results}), 400
+
+            placed = []  # (index, order, mt5_request, details, pending, result)
+            for index, order, mt5_request, details, pending in prepared:
+                if failed and all_or_nothing:
+                    results[index] = {"status": "skipped"}
+                    continue
+                try:
+                    result = submit(mt5, mt5_request)
+                except OrderRejected as e:
+                    results[index] = dict(e.payload, status='failed')
+                    failed = True
+                    continue
+                placed.append((index, order, mt5_request, details, pending, result))
+                results[index] = dict(details, status='placed', ticket=result.order)
+
+            if failed and all_or_nothing:
+                rollback_orders(mt5, placed, results)
+                placed = []
+
+        for index, order, mt5_request, details, pending, result in placed:
+            notify_order_placed(order, details, result, pending=pending)
+        status = 200 if not failed else (400 if all_or_nothing or not placed else 207)
+        return jsonify({"placed": len(placed), "results": results}), status
+
+    except Mt5ConnectionError:
+        logger.error("MT5 initialization failed in place_orders")
+        return jsonify({"error": "MT5 connection failed"}), 500
+    except Exception as e:
+        logger.error(f"Batch order processing error: {str(e)}", exc_info=True)
+        return jsonify({"error": "Internal server error"}), 500
+
+
+def rollback_orders(mt5, placed, results):
+    """Undo the placed orders of a failed all-or-nothing batch, newest first"""
+    for index, order, mt5_request, details, pending, result in reversed(placed):
         try:
-            mt5.shutdown()
-        except Exception as e:
-            logger.error(f"MT5 shutdown error: {str(e)}")  
+            tick = mt5.symbol_info_tick(mt5_request['symbol'])
+            submit(mt5, rollback_request(mt5, mt5_request, result, tick))
+            results[index] = dict(results[index], status='rolled_back')
+        except OrderRejected as e:
+            logger.critical(f"Rollback of order {result.order} failed: {e.payload}")
+            results[index] = dict(results[index], status='rollback_failed', rollback_error=e.payload)
+
 
-       
 @app.route('/last_week_candles_1d', methods=['POST'])
 def last_week_candles_1d():
     """Fetch daily candles between client-provided dates"""
@@ -593,31 +613,19 @@ def last_week_candles_1d():
         end_dt = datetime.fromisoformat(end_str).astimezone(target_tz).replace(tzinfo=None)
         
         # Initialize MT5
-        if not initialize_mt5():
-            return jsonify({"error": "MT5 connection failed"}), 500
+        with mt5_session.acquire() as mt5:
+            # Validate symbol
+            if not mt5.symbol_select(symbol, True):
+                return jsonify({"error": f"Symbol {symbol} not available"}), 400
 
-        # Validate symbol
-        if not mt5.symbol_select(symbol, True):
-            return jsonify({"error": f"Symbol {symbol} not available"}), 400
-
-        # Fetch daily candles
-        rates = mt5.copy_rates_range(symbol, mt5.TIMEFRAME_D1, start_dt, end_dt)
-        if rates is None or len(rates) == 0:
-            return jsonify({"candles": []}), 200
+            # Fetch daily candles
+            rates = mt5.copy_rates_range(symbol, mt5.TIMEFRAME_D1, start_dt, end_dt)
 
         # Return raw candles without processing
-        candles = [{
-            'closeTime': int(rate[0]) - target_tz_offset_seconds,
-            'open': rate[1],
-            'high': rate[2],
-            'low': rate[3],
-            'close': rate[4],
-            'period': 'PERIOD_1D',
-            'name': symbol
-        } for rate in rates]
-            
-        return jsonify({"candles": candles}), 200
+        return candles_response(rates_to_columns(rates, target_tz_offset_seconds), symbol, 'PERIOD_1D')
 
+    except Mt5ConnectionError:
+        return jsonify({"error": "MT5 connection failed"}), 500
     except ValueError as e:
         logging.error(f"Invalid date format: {str(e)}")
         return jsonify({"error": "Invalid ISO date format"}), 400
@@ -646,32 +654,19 @@ def candles_from():
         end_dt = now_in_target_tz().replace(tzinfo=None) - timedelta(minutes=1)
 
         # Initialize MT5
-        if not initialize_mt5():
-            return jsonify({"error": "MT5 connection failed"}), 500
-
-        # Validate symbol
-        if not mt5.symbol_select(symbol, True):
-            return jsonify({"error": f"Symbol {symbol} not available"}), 400
+        with mt5_session.acquire() as mt5:
+            # Validate symbol
+            if not mt5.symbol_select(symbol, True):
+                return jsonify({"error": f"Symbol {symbol} not available"}), 400
 
         # Fetch 1-minute candles
-        rates = mt5.copy_rates_range(symbol, mt5.TIMEFRAME_M1, start_dt, end_dt)
-        
-        if rates is None or len(rates) == 0:
-            return jsonify({"candles": []}), 200
-        
+        rates = mt5_rates_range(symbol, start_dt, end_dt)
+
         # Return raw data
-        candles = [{
-            'closeTime': int(rate[0]) - target_tz_offset_seconds,
-            'open': rate[1],
-            'high': rate[2],
-            'low': rate[3],
-            'close': rate[4],
-            'period': 'PERIOD_M1',
-            'name': symbol
-        } for rate in rates]
-
-        return jsonify({"candles": candles}), 200
+        return candles_response(rates_to_columns(rates, target_tz_offset_seconds), symbol)
 
+    except Mt5ConnectionError:
+        return jsonify({"error": "MT5 connection failed"}), 500
     except ValueError as e:
         logging.error(f"Invalid date format: {str(e)}")
         return jsonify({"error": "Invalid ISO date format"}), 400
@@ -692,66 +687,56 @@ def get_candles_in():
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
 
-        if data['fromdb']:
-            fromdb = data['fromdb']
+        fromdb = data.get('fromdb', 0)
         symbol = data['symbol'].upper()
         start_str = data['start']
         end_str = data['end']
-        
-        print(symbol)
+        # stream: chunked NDJSON / packed frames instead of one response body
+        stream = data.get('stream', False) or request.accept_mimetypes.best == NDJSON
+        chunk_size = int(data.get('chunk_size', STREAM_CHUNK_SIZE))
 
         if fromdb == 1:
-            with mysql.connector.connect(
-                host="localhost",
-                user="root",
-                password="",  # Replace with your actual MySQL root password
-                database="trading_view_candles"
-            ) as mydb:
-                with mydb.cursor() as mycursor:
-                    mycursor.execute(f"SELECT * FROM candles where name = '{symbol}' and closeTime >= {start_str} and closeTime <= {end_str}")
-                    results = mycursor.fetchall()
-                    print(f"SELECT * FROM candles where name = '{symbol}' and closeTime >= {start_str} and closeTime <= {end_str}")
-                    candlesTemp = [{
-                        'closeTime': int(rate[7]),
-                        'open': rate[3],
-                        'high': rate[4],
-                        'low': rate[5],
-                        'close': rate[6],
-                        'period': rate[2],
-                        'name': rate[1]
-                    } for rate in results]
-                    return jsonify({"candles": candlesTemp}), 200      
+            # Ranges already in the memory-mapped cache never reach MySQL
+            cache = get_candle_cache()
+            if cache.covers(symbol, int(start_str), int(end_str)):
+                records = cache.read(symbol, int(start_str), int(end_str))
+                if stream:
+                    return stream_response(cache_candle_chunks(records, chunk_size), symbol)
+                return candles_response(records, symbol)
+
+            if stream:
+                return stream_response(db_candle_chunks(symbol, int(start_str), int(end_str), chunk_size), symbol)
+
+            results = candles_db.query(CANDLES_IN_RANGE_SQL, (symbol, int(start_str), int(end_str)), label='candles_in')
+            return candles_response(rows_to_columns(results), symbol)
+
+        if fromdb == 2:
+            if stream:
+                return stream_response(store_candle_chunks(symbol, int(start_str), int(end_str), chunk_size), symbol)
+            rates = get_candle_store().read(symbol, int(start_str), int(end_str))
+            return candles_response(rates, symbol)
 
         # Direct conversion without timezone handling
         start_dt = datetime.fromisoformat(start_str).astimezone(target_tz).replace(tzinfo=None)
         end_dt = datetime.fromisoformat(end_str).astimezone(target_tz).replace(tzinfo=None)
 
         # Initialize MT5
-        if not initialize_mt5():
-            return jsonify({"error": "MT5 connection failed"}), 500
+        with mt5_session.acquire() as mt5:
+            # Validate symbol
+            if not mt5.symbol_select(symbol, True):
+                return jsonify({"error": f"Symbol {symbol} not available"}), 400
 
-        # Validate symbol
-        if not mt5.symbol_select(symbol, True):
-            return jsonify({"error": f"Symbol {symbol} not available"}), 400
+        if stream:
+            return stream_response(mt5_candle_chunks(symbol, start_dt, end_dt, chunk_size), symbol)
 
         # Fetch 1-minute candles
-        rates = mt5.copy_rates_range(symbol, mt5.TIMEFRAME_M1, start_dt, end_dt)
-        if rates is None or len(rates) == 0:
-            return jsonify({"candles": []}), 200
+        rates = mt5_rates_range(symbol, start_dt, end_dt)
 
         # Return raw data
-        candles = [{
-            'closeTime': int(rate[0]) - target_tz_offset_seconds,
-            'open': rate[1],
-            'high': rate[2],
-            'low': rate[3],
-            'close': rate[4],
-            'period': 'PERIOD_M1',
-            'name': symbol
-        } for rate in rates]
-
-        return jsonify({"candles": candles}), 200
+        return candles_response(rates_to_columns(rates, target_tz_offset_seconds), symbol)
 
+    except Mt5ConnectionError:
+        return jsonify({"error": "MT5 connection failed"}), 500
     except ValueError as e:
         logging.error(f"Invalid date format: {str(e)}")
         return jsonify({"error": "Invalid ISO date format"}), 400
@@ -760,68 +745,100 @@ def get_candles_in():
         return jsonify({"error": "Internal server error"}), 500
 
 
+@app.route('/db_stats', methods=['GET'])
+def db_stats():
+    """Pool health and per-query timings of the MtDriver's database pools"""
+    return jsonify({db.name: dict(db.metrics(), healthy=db.healthy()) for db in (core_db, candles_db)}), 200
+
+
+@app.route('/mt5_stats', methods=['GET'])
+def mt5_stats():
+    """Terminal connection state, queue depth / wait times per priority class, the deal watermark
+    and the Telegram sender's counters"""
+    deals = tg_bot.deal_tracker.status() if tg_bot.deal_tracker else None
+    telegram = dict(tg_bot.sender.stats, pending=tg_bot.sender.pending())
+    return jsonify(dict(mt5_session.status(), deals=deals, telegram=telegram)), 200
+
+
+@app.route('/settings/reload', methods=['POST'])
+def reload_settings():
+    """Re-read the `setting` table now instead of waiting for the next refresh"""
+    if not settings.load():
+        return jsonify({"error": "Loading settings failed"}), 500
+    return jsonify({"min_distance_point": min_distance_point,
+                    "min_stop_distance_point": min_stop_distance_point}), 200
+
+
+@app.route('/symbols/invalidate', methods=['POST'])
+def invalidate_symbols():
+    """Drop cached symbol_info, of one symbol ({"symbol": ...}) or all of them"""
+    symbol = (request.get_json(silent=True) or {}).get('symbol')
+    symbol_cache.invalidate(symbol)
+    return jsonify(symbol_cache.status()), 200
+
+
 @app.route('/test_pending_order', methods=['GET'])
 def test_pending_order():
     """Test endpoint for generating valid pending orders (EURUSD M1)"""
     try:
-        # Initialize MT5 with enhanced logging
-        if not initialize_mt5():
-            logging.error("MT5 initialization failed in test endpoint")
-            return jsonify({"error": "MT5 connection failed"}), 500
-
-        symbol = "EURUSD"
-        volume = 0.01
-        if not mt5.symbol_select(symbol, True):
-            logging.error(f"Failed to select {symbol} in Market Watch")
-            return jsonify({"error": "Symbol not available"}), 400
-
-        # Get detailed price information
-        tick = mt5.symbol_info_tick(symbol)
-        if not tick:
-            logging.error("No tick data received")
-            return jsonify({"error": "Price check failed"}), 400
-
-        # Calculate prices using precise decimal arithmetic
-        point = mt5.symbol_info(symbol).point
-        spread = mt5.symbol_info(symbol).spread * point
-        current_price = round((tick.ask + tick.bid) / 2, 5)
+        with mt5_session.acquire(PRIORITY_ORDER) as mt5:
+            symbol = "EURUSD"
+            volume = 0.01
+            if not mt5.symbol_select(symbol, True):
+                logging.error(f"Failed to select {symbol} in Market Watch")
+                return jsonify({"error": "Symbol not available"}), 400
+
+            # Get detailed price information
+            tick = mt5.symbol_info_tick(symbol)
+            if not tick:
+                logging.error("No tick data received")
+                return jsonify({"error": "Price check failed"}), 400
+
+            # Calculate prices using precise decimal arithmetic
+            symbol_info = symbol_cache.get(symbol, mt5)
+            point = symbol_info.point
+            spread = symbol_info.spread * point
+            current_price = round((tick.ask + tick.bid) / 2, 5)
         
-        # Generate valid BUY STOP order parameters
-        entry_price = current_price + 20 * point  # 20 pips above current
-        sl = entry_price - 20 * point            # 10 pips risk
-        tp = entry_price + 60 * point            # 30 pips reward (3:1 ratio)
-
-        # Create test order payload
-        test_data = {
-            "symbol": symbol,
-            "volume": volume,
-            "direction": "BUY",
-            "sl": round(sl, 5),
-            "tp": round(tp, 5),
-            "price": round(entry_price, 5)
-        }
-
-        # Simulate POST request to place_limit_order
-        with app.test_client() as client:
-            response = client.post('/place_limit_order', 
-                json=test_data,
-                headers={'Content-Type': 'application/json'}
-            )
+            # Generate valid BUY STOP order parameters
+            entry_price = current_price + 20 * point  # 20 pips above current
+            sl = entry_price - 20 * point            # 10 pips risk
+            tp = entry_price + 60 * point            # 30 pips reward (3:1 ratio)
+
+            # Create test order payload
+            test_data = {
+                "symbol": symbol,
+                "volume": volume,
+                "direction": "BUY",
+                "sl": round(sl, 5),
+                "tp": round(tp, 5),
+                "price": round(entry_price, 5)
+            }
+
+            # Simulate POST request to place_limit_order
+            with app.test_client() as client:
+                response = client.post('/place_limit_order', 
+                    json=test_data,
+                    headers={'Content-Type': 'application/json'}
+                )
             
-        return response.json, response.status_code
+            return response.json, response.status_code
 
+    except Mt5ConnectionError:
+        logging.error("MT5 initialization failed in test endpoint")
+        return jsonify({"error": "MT5 connection failed"}), 500
     except Exception as e:
         logging.error(f"Test order failed: {str(e)}", exc_info=True)
         return jsonify({
             "error": "Test order failed",
             "details": str(e)
         }), 500
-    finally:
-        # Don't shutdown MT5 here to maintain connection pool
-        pass
     
 
 if __name__ == '__main__':
     logger.info("Application starting...")
+    mt5_session.start()
+    symbol_cache.warm(SYMBOL_CACHE_WARM)
+    settings.start()
     tg_bot.start_monitoring()
     socketio.run(app, host='127.0.0.1', port=5000, debug=False)
@@ -0,0 +1,135 @@
+# bar_scheduler.py
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BarScheduler:
+    """Fires jobs right after their timeframe boundaries, from one loop for every timeframe.
+
+    Boundaries are aligned in broker server time (unix time + offset_seconds),
+    so D1 and H4 bars close when the broker's do. A job runs `delay` seconds
+    after its boundary; its callback returns True once the closed bar has
+    been seen, otherwise it is retried every `retry_interval` seconds until
+    `retry_timeout` after the boundary, then waits for the next boundary.
+    After `idle_after` boundaries in a row without the bar (market closed,
+    weekend) the job goes idle: one call per boundary, no retries, until a
+    call sees a bar again. Due times of all jobs sit in a single heap, so
+    M1, M5, H1 and D1 subscriptions share one sleeping loop.
+    """
+
+    def __init__(self, offset_seconds=0, delay=0.25, retry_interval=0.5, retry_timeout=15.0, idle_after=3,
+                 clock=time.time):
+        self.offset_seconds = offset_seconds
+        self.delay = delay
+        self.retry_interval = retry_interval
+        self.retry_timeout = retry_timeout
+        self.idle_after = idle_after
+        self.clock = clock
+        self._jobs = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self.fired = 0
+        self.retries = 0
+
+    def next_boundary(self, step, now=None):
+        """First boundary of step strictly after now, as unix time"""
+        now = self.clock() if now is None else now
+        server_now = now + self.offset_seconds
+        return (int(server_now) // step + 1) * step - self.offset_seconds
+
+    def add(self, key, step, callback):
+        """Schedule callback(boundary) after every boundary of step; replaces a job with the same key"""
+        boundary = self.next_boundary(step)
+        job = {'key': key, 'step': step, 'callback': callback, 'boundary': boundary, 'misses': 0}
+        with self._lock:
+            self._jobs[key] = job
+            self._push(boundary + self.delay, job)
+        self._wakeup.set()
+
+    def remove(self, key):
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def touch(self, key):
+        """The job's source produced data (e.g. a late bar): leave idle mode after this run"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                job['touched'] = True
+
+    def _push(self, due, job):
+        heapq.heappush(self._heap, (due, next(self._seq), job))
+
+    def next_due(self):
+        with self._lock:
+            while self._heap and self._jobs.get(self._heap[0][2]['key']) is not self._heap[0][2]:
+                heapq.heappop(self._heap)  # removed or replaced job
+            return self._heap[0][0] if self._heap else None
+
+    def run_pending(self):
+        """Run every due job once; returns the number of callbacks made"""
+        ran = 0
+        while True:
+            now = self.clock()
+            with self._lock:
+                if not self._heap or self._heap[0][0] > now:
+                    return ran
+                _, _, job = heapq.heappop(self._heap)
+                if self._jobs.get(job['key']) is not job:
+                    continue
+
+            try:
+                done = job['callback'](job['boundary'])
+            except Exception as e:
+                logger.error(f"Scheduled job {job['key']} failed: {str(e)}")
+                done = True
+            ran += 1
+
+            now = self.clock()
+            with self._lock:
+                if self._jobs.get(job['key']) is not job:
+                    continue
+                was_idle = job['misses'] >= self.idle_after
+                touched = job.pop('touched', False)
+                if done or touched:
+                    job['misses'] = 0
+                    if was_idle:
+                        logger.info(f"Scheduled job {job['key']} has bars again, retries resumed")
+                idle = job['misses'] >= self.idle_after
+                if done or idle or now >= job['boundary'] + self.retry_timeout:
+                    if not done:
+                        job['misses'] += 1
+                        if job['misses'] == self.idle_after:
+                            logger.info(f"Scheduled job {job['key']} idle: no bar for {self.idle_after} boundaries")
+                    self.fired += 1
+                    job['boundary'] = self.next_boundary(job['step'], now)
+                    self._push(job['boundary'] + self.delay, job)
+                else:
+                    self.retries += 1
+                    self._push(now + self.retry_interval, job)
+
+    def idle(self):
+        """Keys of the jobs currently polled without retries"""
+        with self._lock:
+            return [key for key, job in self._jobs.items() if job['misses'] >= self.idle_after]
+
+    def run(self):
+        """Scheduler loop; run it in a background task"""
+        while not self._stopped:
+            self.run_pending()
+            due = self.next_due()
+            timeout = None if due is None else max(0.0, due - self.clock())
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
@@ -0,0 +1,160 @@
+import json
+import struct
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+CANDLE_COLUMNS = ['closeTime', 'open', 'high', 'low', 'close']
+COLUMN_DTYPES = {'closeTime': np.dtype('<i8'), 'open': np.dtype('<f8'), 'high': np.dtype('<f8'),
+                 'low': np.dtype('<f8'), 'close': np.dtype('<f8')}
+
+JSON = 'application/json'
+ARROW = 'application/vnd.apache.arrow.stream'
+MSGPACK = 'application/msgpack'
+PACKED = 'application/x-candles-packed'
+NDJSON = 'application/x-ndjson'
+
+# JSON first: clients sending no Accept header (or */*) keep getting the old payload
+FORMATS = [JSON, PACKED] + ([MSGPACK] if msgpack else []) + ([ARROW] if pa else [])
+# Streamed responses are a sequence of self-contained chunks: NDJSON lines or packed frames
+STREAM_FORMATS = [NDJSON, PACKED]
+
+
+def negotiate(accept_mimetypes):
+    """Best supported candle format for a werkzeug Accept header"""
+    return accept_mimetypes.best_match(FORMATS, default=JSON) or JSON
+
+
+def negotiate_stream(accept_mimetypes):
+    return accept_mimetypes.best_match(STREAM_FORMATS, default=NDJSON) or NDJSON
+
+
+def rates_to_columns(rates, offset_seconds=0):
+    """MT5 rates structured array -> dict of candle column arrays, without a Python loop"""
+    if rates is None or len(rates) == 0:
+        return empty_columns()
+    return {
+        'closeTime': rates['time'].astype(np.int64) - offset_seconds,
+        'open': rates['open'].astype(np.float64, copy=False),
+        'high': rates['high'].astype(np.float64, copy=False),
+        'low': rates['low'].astype(np.float64, copy=False),
+        'close': rates['close'].astype(np.float64, copy=False),
+    }
+
+
+def rows_to_columns(rows):
+    """(closeTime, open, high, low, close) rows -> dict of candle column arrays"""
+    if not rows:
+        return empty_columns()
+    return {c: np.array([row[i] for row in rows], dtype=COLUMN_DTYPES[c]) for i, c in enumerate(CANDLE_COLUMNS)}
+
+
+def empty_columns():
+    return {c: np.empty(0, dtype=COLUMN_DTYPES[c]) for c in CANDLE_COLUMNS}
+
+
+def candle_dicts(columns, name, period):
+    return [{
+        'closeTime': close_time,
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'period': period,
+        'name': name
+    } for close_time, open_, high, low, close in zip(*(np.asarray(columns[c]).tolist() for c in CANDLE_COLUMNS))]
+
+
+def encode_json(columns, name, period):
+    return json.dumps({'candles': candle_dicts(columns, name, period)}).encode()
+
+
+def encode_ndjson(columns, name, period):
+    """One JSON candle per line, newline terminated so chunks can be concatenated"""
+    return ''.join(json.dumps(candle) + '\n' for candle in candle_dicts(columns, name, period)).encode()
+
+
+def encode_packed(columns, name, period):
+    """Length-prefixed JSON header, then each column as contiguous little-endian values.
+
+    The header is padded to a multiple of 8 bytes so every column can be
+    viewed in place (np.frombuffer, Float64Array/BigInt64Array).
+    """
+    count = len(columns['closeTime'])
+    header = json.dumps({
+        'name': name, 'period': period, 'count': count,
+        'columns': [[c, COLUMN_DTYPES[c].str] for c in CANDLE_COLUMNS],
+    }).encode()
+    header += b' ' * (-(4 + len(header)) % 8)
+    parts = [struct.pack('<I', len(header)), header]
+    parts.extend(np.ascontiguousarray(columns[c], dtype=COLUMN_DTYPES[c]).tobytes() for c in CANDLE_COLUMNS)
+    return b''.join(parts)
+
+
+def encode_msgpack(columns, name, period):
+    payload = {'name': name, 'period': period}
+    payload.update({c: np.asarray(columns[c]).tolist() for c in CANDLE_COLUMNS})
+    return msgpack.packb(payload)
+
+
+def encode_arrow(columns, name, period):
+    table = pa.table({c: np.asarray(columns[c], dtype=COLUMN_DTYPES[c]) for c in CANDLE_COLUMNS})
+    table = table.replace_schema_metadata({'name': name, 'period': period})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+ENCODERS = {JSON: encode_json, PACKED: encode_packed, MSGPACK: encode_msgpack, ARROW: encode_arrow,
+            NDJSON: encode_ndjson}
+
+
+def encode_candles(columns, name, period, mimetype=JSON):
+    """Serialize candle columns in the negotiated format; returns the body bytes"""
+    return ENCODERS[mimetype](columns, name, period)
+
+
+def iter_packed_frames(body):
+    """Split a streamed packed body into (name, period, columns) per frame"""
+    offset = 0
+    while offset < len(body):
+        (length,) = struct.unpack_from('<I', body, offset)
+        header = json.loads(body[offset + 4:offset + 4 + length])
+        size = 4 + length + header['count'] * sum(np.dtype(d).itemsize for _, d in header['columns'])
+        yield decode_candles(body[offset:offset + size], PACKED)
+        offset += size
+
+
+def decode_candles(body, mimetype):
+    """Client side inverse of encode_candles: (name, period, dict of numpy columns)"""
+    if mimetype == PACKED:
+        (length,) = struct.unpack_from('<I', body)
+        header = json.loads(body[4:4 + length])
+        offset, columns = 4 + length, {}
+        for column, dtype in header['columns']:
+            columns[column] = np.frombuffer(body, dtype=dtype, count=header['count'], offset=offset)
+            offset += header['count'] * np.dtype(dtype).itemsize
+        return header['name'], header['period'], columns
+    if mimetype == MSGPACK:
+        payload = msgpack.unpackb(body)
+        return payload['name'], payload['period'], \
+            {c: np.array(payload[c], dtype=COLUMN_DTYPES[c]) for c in CANDLE_COLUMNS}
+    if mimetype == ARROW:
+        table = pa.ipc.open_stream(body).read_all()
+        metadata = table.schema.metadata or {}
+        return metadata.get(b'name', b'').decode(), metadata.get(b'period', b'').decode(), \
+            {c: table[c].to_numpy() for c in CANDLE_COLUMNS}
+    candles = json.loads(body)['candles']
+    first = candles[0] if candles else {}
+    return first.get('name'), first.get('period'), \
+        {c: np.array([candle[c] for candle in candles], dtype=COLUMN_DTYPES[c]) for c in CANDLE_COLUMNS}
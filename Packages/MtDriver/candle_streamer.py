@@ -0,0 +1,251 @@
+# candle_streamer.py
+import logging
+import time
+from collections import deque
+from threading import Lock
+
+from bar_scheduler import BarScheduler
+from mt5_session import PRIORITY_CANDLES, Mt5ConnectionError
+
+logger = logging.getLogger(__name__)
+
+TIMEFRAME_SECONDS = {
+    'PERIOD_M1': 60, 'PERIOD_M5': 300, 'PERIOD_M15': 900, 'PERIOD_M30': 1800,
+    'PERIOD_H1': 3600, 'PERIOD_H4': 14400, 'PERIOD_D1': 86400,
+}
+
+
+def room_name(symbol, timeframe):
+    return f"candles:{symbol}:{timeframe}"
+
+
+def resume_token(symbol, timeframe, since):
+    """Sent with every new_candles batch; a client re-subscribing with it gets exactly what it missed"""
+    return {'symbol': symbol, 'timeframe': timeframe, 'since': since}
+
+
+class SymbolPoller:
+    """Polling state of one (symbol, timeframe): last emitted bar, ring buffer and subscribers"""
+
+    def __init__(self, symbol, timeframe, buffer_size):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.room = room_name(symbol, timeframe)
+        self.step = TIMEFRAME_SECONDS[timeframe]
+        self.last_time = None  # MT5 (server time) open time of the newest emitted closed bar
+        self.history = deque(maxlen=buffer_size)
+        self.subscribers = set()
+        self.waiting = {}  # sid -> since of subscribers that joined before the first successful poll
+        self.lock = Lock()  # subscribe() and the scheduler may poll at the same time
+        self.active = True
+        self.polls = 0
+        self.emitted = 0
+
+
+class CandleStreamer:
+    """One MT5 poller per (symbol, timeframe), fanned out to a Socket.IO room.
+
+    However many clients subscribe, each pair is fetched once right after
+    each of its bar closes (`delay` seconds past the boundary, retried
+    every `retry_interval` seconds until the broker has published the bar,
+    without retries while the market is quiet, see BarScheduler)
+    and only the bars closed since the last poll are requested and emitted
+    as 'new_candles' together with a resume token. Each poller keeps the
+    last `buffer_size` candles in a ring buffer. A subscriber is replayed,
+    on its own sid, the candles after the `since` of its resume token
+    (fetched from MT5, up to `max_replay`, when they are older than the
+    buffer) or the last `backfill` candles when it has no token; one that
+    joins before MT5 has returned any bar is replayed, on its sid, by the
+    first poll that gets them.
+    """
+
+    def __init__(self, socketio, session, offset_seconds=0, delay=0.25, retry_interval=0.5, retry_timeout=15.0,
+                 idle_after=3, backfill=360, buffer_size=1440, max_replay=10080, namespace='/', clock=time.time):
+        self.socketio = socketio
+        self.session = session
+        self.offset_seconds = offset_seconds
+        self.scheduler = BarScheduler(offset_seconds, delay=delay, retry_interval=retry_interval,
+                                      retry_timeout=retry_timeout, idle_after=idle_after, clock=clock)
+        self.backfill = backfill
+        self.buffer_size = buffer_size
+        self.max_replay = max_replay
+        self.namespace = namespace
+        self.clock = clock
+        self._pollers = {}
+        self._by_sid = {}
+        self._lock = Lock()
+        self._scheduler_started = False
+
+    def subscribe(self, sid, symbol, timeframe, since=None):
+        """Join the pair's room and replay what the client is missing; returns the replayed count.
+
+        since: closeTime of the last candle the client has processed (the
+        `since` of its resume token), None for a plain backfill.
+        """
+        symbol, timeframe = symbol.upper(), timeframe.upper()
+        if timeframe not in TIMEFRAME_SECONDS:
+            raise ValueError(f"Invalid timeframe: {timeframe}")
+        key = (symbol, timeframe)
+        with self._lock:
+            poller = self._pollers.get(key)
+            start = poller is None
+            if start:
+                poller = self._pollers[key] = SymbolPoller(symbol, timeframe, self.buffer_size)
+            poller.subscribers.add(sid)
+            self._by_sid.setdefault(sid, set()).add(key)
+        if poller.last_time is None:
+            # Fill the ring buffer before replaying from it. Only the creator is alone in the
+            # room; otherwise the subscribers waiting for a first poll get their replays
+            self.poll_once(poller, emit=not start)
+
+        # Joining before computing the replay may repeat a candle emitted in between,
+        # never lose one; clients drop closeTimes they already have
+        self.socketio.server.enter_room(sid, poller.room, namespace=self.namespace)
+        with poller.lock:
+            waiting = poller.last_time is None
+            if waiting:  # MT5 had nothing yet: replayed by the first poll that gets candles
+                poller.waiting[sid] = since
+        replay = [] if waiting else self.replay(poller, since)
+        if replay:
+            self._emit(poller, replay, sid)
+        if start:
+            self.scheduler.add(key, poller.step, lambda boundary: self._on_boundary(poller, boundary))
+            self._start_scheduler()
+        return len(replay)
+
+    def replay(self, poller, since=None):
+        """Candles after since (or the last `backfill` ones), oldest first"""
+        history = list(poller.history)
+        if since is None:
+            return history[-self.backfill:] if self.backfill else []
+        since = int(since)
+        if not history or since >= history[0]['closeTime'] - poller.step:
+            return [c for c in history if c['closeTime'] > since]
+
+        # Older than the ring buffer: fetch the span from MT5, bounded by max_replay
+        newest = history[-1]['closeTime']
+        count = min(self.max_replay, (newest - since) // poller.step)
+        candles = self._fetch(poller, count)
+        return [c for c in candles if since < c['closeTime'] <= newest] or \
+            [c for c in history if c['closeTime'] > since]
+
+    def unsubscribe(self, sid, symbol, timeframe):
+        key = (symbol.upper(), timeframe.upper())
+        with self._lock:
+            poller = self._pollers.get(key)
+            if poller is None or sid not in poller.subscribers:
+                return
+            poller.subscribers.discard(sid)
+            poller.waiting.pop(sid, None)
+            self._by_sid.get(sid, set()).discard(key)
+            if not poller.subscribers:
+                poller.active = False
+                del self._pollers[key]
+                self.scheduler.remove(key)
+        try:
+            self.socketio.server.leave_room(sid, poller.room, namespace=self.namespace)
+        except Exception:
+            pass  # already disconnected
+
+    def unsubscribe_all(self, sid):
+        with self._lock:
+            keys = list(self._by_sid.pop(sid, ()))
+        for symbol, timeframe in keys:
+            self.unsubscribe(sid, symbol, timeframe)
+
+    def _emit(self, poller, candles, room):
+        token = resume_token(poller.symbol, poller.timeframe, candles[-1]['closeTime'])
+        # A tuple is sent as two event arguments: handlers taking only the candles still work
+        self.socketio.emit('new_candles', (candles, token), room=room, namespace=self.namespace)
+
+    def _start_scheduler(self):
+        with self._lock:
+            if self._scheduler_started:
+                return
+            self._scheduler_started = True
+        self.socketio.start_background_task(self.scheduler.run)
+
+    def _on_boundary(self, poller, boundary):
+        """Scheduler callback; True once the bar that closed at boundary (unix time) has been seen"""
+        if not poller.active:
+            return True
+        if self.poll_once(poller):
+            self.scheduler.touch((poller.symbol, poller.timeframe))  # bars are flowing, even if late
+        expected = boundary + self.offset_seconds - poller.step  # server open time of the closed bar
+        return poller.last_time is not None and poller.last_time >= expected
+
+    def _fetch_count(self, poller):
+        """Bars to request: everything since the last emitted bar, capped at the buffer size"""
+        if poller.last_time is None:
+            return self.buffer_size
+        now_server = int(self.clock()) + self.offset_seconds
+        missed = (now_server - poller.last_time) // poller.step
+        return int(max(1, min(self.buffer_size, missed)))
+
+    def _fetch(self, poller, count):
+        """The last `count` closed bars of the pair as candle dicts; [] when MT5 is unavailable"""
+        try:
+            with self.session.acquire(PRIORITY_CANDLES) as mt5:
+                if not mt5.symbol_select(poller.symbol, True):
+                    logger.error(f"Symbol {poller.symbol} not found in Market Watch")
+                    return []
+                mt5_timeframe = getattr(mt5, 'TIMEFRAME_' + poller.timeframe.split('_', 1)[1])
+                # start_pos=1 skips the bar that is still forming
+                rates = mt5.copy_rates_from_pos(poller.symbol, mt5_timeframe, 1, int(count))
+        except Mt5ConnectionError:
+            logger.error(f"MT5 unavailable, skipping poll of {poller.symbol} {poller.timeframe}")
+            return []
+        except Exception as e:
+            logger.error(f"Polling error for {poller.symbol} {poller.timeframe}: {str(e)}")
+            return []
+
+        if rates is None or len(rates) == 0:
+            return []
+        return [{
+            'closeTime': close_time - self.offset_seconds,
+            'open': open_,
+            'high': high,
+            'low': low,
+            'close': close,
+            'name': poller.symbol,
+            'period': poller.timeframe
+        } for close_time, open_, high, low, close in zip(
+            rates['time'].tolist(), rates['open'].tolist(), rates['high'].tolist(),
+            rates['low'].tolist(), rates['close'].tolist())]
+
+    def poll_once(self, poller, emit=True):
+        """Fetch the bars closed since the last poll, buffer them and emit them to the poller's room"""
+        with poller.lock:
+            poller.polls += 1
+            candles = self._fetch(poller, self._fetch_count(poller))
+            if poller.last_time is not None:
+                last_close_time = poller.last_time - self.offset_seconds
+                candles = [c for c in candles if c['closeTime'] > last_close_time]
+            if not candles:
+                return []
+
+            first = poller.last_time is None
+            poller.last_time = candles[-1]['closeTime'] + self.offset_seconds
+            poller.history.extend(candles)
+            if first:
+                # A whole buffer was fetched: subscribers waiting for it get their own replays instead
+                waiting, poller.waiting = poller.waiting, {}
+                for sid, since in waiting.items():
+                    replay = self.replay(poller, since)
+                    if replay:
+                        self._emit(poller, replay, sid)
+            elif emit:
+                poller.emitted += len(candles)
+                self._emit(poller, candles, poller.room)
+            return candles
+
+    def status(self):
+        with self._lock:
+            return [{
+                'symbol': p.symbol, 'timeframe': p.timeframe, 'subscribers': len(p.subscribers),
+                'last_time': p.last_time, 'polls': p.polls, 'emitted': p.emitted,
+            } for p in self._pollers.values()]
+
+    def scheduler_status(self):
+        return {'fired': self.scheduler.fired, 'retries': self.scheduler.retries,
+                'next_due': self.scheduler.next_due(), 'idle': self.scheduler.idle()}
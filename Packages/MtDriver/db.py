@@ -0,0 +1,214 @@
+# db.py
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import pooling
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Count / total / max milliseconds per query label"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+
+    def record(self, label, elapsed, error=False):
+        ms = elapsed * 1000
+        with self._lock:
+            entry = self._stats[label]
+            entry['count'] += 1
+            entry['errors'] += error
+            entry['total_ms'] += ms
+            entry['max_ms'] = max(entry['max_ms'], ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                label: dict(entry, avg_ms=entry['total_ms'] / entry['count'] if entry['count'] else 0.0)
+                for label, entry in self._stats.items()
+            }
+
+
+class DbPool:
+    """Pooled MySQL access with parameterized, server-side prepared statements.
+
+    The pool is created on first use, so importing a module that owns a
+    DbPool never needs a running server. Connections are pinged before reuse
+    when they have been idle longer than `ping_after` seconds, and each
+    connection keeps a small LRU of prepared cursors, so a repeated
+    statement is prepared once per connection rather than once per call.
+    Sessions are not reset on check-in because that would drop the
+    prepared statements. Streams (iter_query) run on their own connections,
+    at most `max_streams` at a time, so slow readers never hold pooled ones.
+    """
+
+    def __init__(self, name, config, pool_size=5, checkout_timeout=5.0, ping_after=30.0,
+                 statement_cache_size=32, max_streams=8):
+        self.name = name
+        self.config = config
+        self.pool_size = pool_size
+        self.max_streams = max_streams
+        self.checkout_timeout = checkout_timeout
+        self.ping_after = ping_after
+        self.statement_cache_size = statement_cache_size
+        self.stats = QueryStats()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._last_used = {}
+        self._statements = {}
+        self._returned = threading.Condition()
+        self._returns = 0  # connections checked back in, so a waiter cannot miss one
+        self._streams = threading.BoundedSemaphore(max_streams)
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = pooling.MySQLConnectionPool(
+                    pool_name=self.name, pool_size=self.pool_size, pool_reset_session=False, **self.config)
+            return self._pool
+
+    def _checkout(self):
+        """Pooled connection, waiting up to checkout_timeout for one to be returned"""
+        pool = self._get_pool()
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            returns = self._returns
+            try:
+                return pool.get_connection()
+            except pooling.PoolError:
+                with self._returned:
+                    while self._returns == returns:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise
+                        self._returned.wait(remaining)
+
+    def _checkin(self, cnx):
+        cnx.close()
+        with self._returned:
+            self._returns += 1
+            self._returned.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a healthy connection; it goes back to the pool on exit"""
+        started = time.perf_counter()
+        cnx = self._checkout()
+        try:
+            key = id(cnx._cnx)
+            if time.monotonic() - self._last_used.get(key, 0) > self.ping_after:
+                cnx.ping(reconnect=True, attempts=2, delay=0)
+            session = self._statements.get(key)
+            if session is None or session[0] != cnx.connection_id:
+                # First use or reconnected: prepared statements live in the server session
+                self._statements[key] = (cnx.connection_id, OrderedDict())
+            self.stats.record('checkout', time.perf_counter() - started)
+            yield cnx
+        finally:
+            self._last_used[id(cnx._cnx)] = time.monotonic()
+            self._checkin(cnx)
+
+    def _prepared_cursor(self, cnx, sql):
+        statements = self._statements[id(cnx._cnx)][1]
+        cursor = statements.get(sql)
+        if cursor is not None:
+            statements.move_to_end(sql)
+            return cursor
+        cursor = cnx.cursor(prepared=True)
+        statements[sql] = cursor
+        if len(statements) > self.statement_cache_size:
+            _, evicted = statements.popitem(last=False)
+            evicted.close()
+        return cursor
+
+    def _run(self, label, sql, params, fetch, commit=False):
+        started = time.perf_counter()
+        error = False
+        try:
+            with self.connection() as cnx:
+                cursor = self._prepared_cursor(cnx, sql)
+                try:
+                    cursor.execute(sql, params)
+                    result = fetch(cursor)
+                except mysql.connector.Error:
+                    self._statements[id(cnx._cnx)][1].pop(sql, None)
+                    raise
+                if commit:
+                    cnx.commit()
+                return result
+        except mysql.connector.Error:
+            error = True
+            raise
+        finally:
+            self.stats.record(label or sql.split()[0].upper(), time.perf_counter() - started, error)
+
+    def query(self, sql, params=(), label=None):
+        """All rows of a SELECT"""
+        return self._run(label, sql, params, lambda cursor: cursor.fetchall())
+
+    def query_one(self, sql, params=(), label=None):
+        def fetch(cursor):
+            rows = cursor.fetchall()
+            return rows[0] if rows else None
+        return self._run(label, sql, params, fetch)
+
+    def execute(self, sql, params=(), label=None):
+        """Run a write statement and commit; returns the affected row count"""
+        return self._run(label, sql, params, lambda cursor: cursor.rowcount, commit=True)
+
+    def _open_stream(self):
+        """Connection of its own for one stream, waiting up to checkout_timeout for a stream slot"""
+        if not self._streams.acquire(timeout=self.checkout_timeout):
+            raise pooling.PoolError(f"{self.name}: {self.max_streams} streams already open")
+        try:
+            return mysql.connector.connect(**self.config)
+        except BaseException:
+            self._streams.release()
+            raise
+
+    def iter_query(self, sql, params=(), chunk_size=10000, label=None):
+        """Yield row lists of chunk_size from an unbuffered cursor.
+
+        The rows are pulled from the server as they are consumed, on a
+        dedicated connection that is closed when the generator is exhausted
+        or closed; a client reading slowly keeps it, not a pooled one.
+        """
+        started = time.perf_counter()
+        error = False
+        try:
+            cnx = self._open_stream()
+            try:
+                cursor = cnx.cursor()
+                cursor.execute(sql, params)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        return
+                    yield rows
+            finally:
+                # Abandoned mid-result, dropping the session is cheaper than draining it
+                cnx.disconnect()
+                self._streams.release()
+        except mysql.connector.Error:
+            error = True
+            raise
+        finally:
+            self.stats.record(label or 'stream', time.perf_counter() - started, error)
+
+    def healthy(self):
+        """Round trip through a pooled connection"""
+        try:
+            return self.query_one("SELECT 1", label='health') == (1,)
+        except (mysql.connector.Error, pooling.PoolError) as e:
+            logger.error(f"{self.name} health check failed: {str(e)}")
+            return False
+
+    def metrics(self):
+        return {'pool': self.name, 'pool_size': self.pool_size, 'max_streams': self.max_streams,
+                'queries': self.stats.snapshot()}
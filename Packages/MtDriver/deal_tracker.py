@@ -0,0 +1,123 @@
+# deal_tracker.py
+import json
+import logging
+import os
+import threading
+import time
+
+from mt5_session import PRIORITY_TICK, Mt5ConnectionError
+
+logger = logging.getLogger(__name__)
+
+
+class DealTracker:
+    """Reports each closed deal once, across restarts.
+
+    Every poll asks the session for deals from the watermark (server time,
+    minus `overlap` seconds for deals that show up late) to now, skips the
+    tickets already reported and hands the rest, oldest first, to on_deal.
+    The watermark advances on every successful poll, so quiet periods
+    don't widen the query. The watermark and the tickets reported inside
+    the overlap window are saved to `state_path` after each poll. Without
+    a state file, tracking starts at the current time.
+    """
+
+    def __init__(self, session, on_deal, state_path, offset_seconds=0, interval=10.0, overlap=120,
+                 clock=time.time):
+        self.session = session
+        self.on_deal = on_deal
+        self.state_path = state_path
+        self.offset_seconds = offset_seconds
+        self.interval = interval
+        self.overlap = overlap
+        self.clock = clock
+        self.watermark = None  # server time up to which deals have been fetched
+        self.tickets = {}  # ticket -> deal time, of reported deals newer than watermark - overlap
+        self.reported = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self.load()
+
+    def _now_server(self):
+        return int(self.clock()) + self.offset_seconds
+
+    def load(self):
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                state = json.load(f)
+            self.watermark = int(state['watermark'])
+            self.tickets = {int(ticket): int(t) for ticket, t in state.get('tickets', {}).items()}
+            logger.info(f"Deal tracker resumes at {self.watermark} with {len(self.tickets)} recent tickets")
+        except FileNotFoundError:
+            self.watermark = self._now_server()
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Deal tracker state {self.state_path} unreadable, starting from now: {str(e)}")
+            self.watermark = self._now_server()
+
+    def save(self):
+        """Write the state atomically so a crash never leaves a truncated file"""
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.state_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'watermark': self.watermark, 'tickets': self.tickets}, f)
+        os.replace(tmp, self.state_path)
+
+    def poll_once(self):
+        """Report the closed deals since the watermark; returns how many were new"""
+        date_from = self.watermark - self.overlap
+        date_to = self._now_server()
+        try:
+            with self.session.acquire(PRIORITY_TICK) as mt5:  # not behind range fetches
+                deals = mt5.history_deals_get(date_from, date_to)
+                entry_out = mt5.DEAL_ENTRY_OUT
+        except Mt5ConnectionError as e:
+            logger.error(f"Deal check skipped: {str(e)}")
+            return 0
+
+        if deals is None:
+            return 0  # MT5 error: keep the watermark and retry the same window
+        new = sorted((d for d in deals if d.entry == entry_out and d.ticket not in self.tickets),
+                     key=lambda d: (d.time, d.ticket))
+        for deal in new:
+            try:
+                self.on_deal(deal)
+            except Exception as e:
+                logger.error(f"Deal {deal.ticket} handler failed: {str(e)}", exc_info=True)
+            self.tickets[deal.ticket] = deal.time
+
+        self.watermark = max(self.watermark, date_to)
+        horizon = self.watermark - self.overlap
+        self.tickets = {ticket: t for ticket, t in self.tickets.items() if t >= horizon}
+        self.reported += len(new)
+        try:
+            self.save()
+        except OSError as e:
+            logger.error(f"Saving deal tracker state failed: {str(e)}")
+        if new:
+            logger.info(f"Reported {len(new)} closed deals")
+        return len(new)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='deal-tracker', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Deal check error: {str(e)}", exc_info=True)
+            self._stop.wait(self.interval)
+
+    def status(self):
+        return {'watermark': self.watermark, 'recent_tickets': len(self.tickets), 'reported': self.reported}
@@ -0,0 +1,275 @@
+import math
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Subset of the MetaTrader5 constants used by the driver (values match the real package)
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H4 = 16388
+TIMEFRAME_D1 = 16408
+
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+ORDER_TYPE_BUY_LIMIT = 2
+ORDER_TYPE_SELL_LIMIT = 3
+ORDER_TYPE_BUY_STOP = 4
+ORDER_TYPE_SELL_STOP = 5
+
+TRADE_ACTION_DEAL = 1
+TRADE_ACTION_PENDING = 5
+TRADE_ACTION_REMOVE = 8
+
+ORDER_TIME_GTC = 0
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_FILL = 10030
+
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+DEAL_REASON_CLIENT = 0
+DEAL_REASON_SL = 4
+DEAL_REASON_TP = 5
+
+COPY_TICKS_ALL = -1
+COPY_TICKS_INFO = 1
+COPY_TICKS_TRADE = 2
+
+RES_S_OK = 1
+RES_E_INTERNAL_FAIL_INIT = -10005
+RES_E_INTERNAL_FAIL_CONNECT = -10004
+
+TIMEFRAME_SECONDS = {
+    TIMEFRAME_M1: 60,
+    TIMEFRAME_M5: 300,
+    TIMEFRAME_M15: 900,
+    TIMEFRAME_H1: 3600,
+    TIMEFRAME_H4: 14400,
+    TIMEFRAME_D1: 86400,
+}
+
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8'),
+])
+
+TICKS_DTYPE = np.dtype([
+    ('time', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('volume', '<u8'),
+    ('time_msc', '<i8'), ('flags', '<u4'), ('volume_real', '<f8'),
+])
+
+TerminalInfo = namedtuple('TerminalInfo', ['connected', 'trade_allowed', 'name'])
+SymbolInfo = namedtuple('SymbolInfo', [
+    'name', 'digits', 'point', 'spread', 'trade_stops_level', 'filling_mode',
+    'volume_min', 'volume_max', 'volume_step', 'visible',
+])
+Tick = namedtuple('Tick', ['time', 'bid', 'ask', 'last', 'volume', 'time_msc', 'flags', 'volume_real'])
+OrderSendResult = namedtuple('OrderSendResult', [
+    'retcode', 'deal', 'order', 'volume', 'price', 'bid', 'ask', 'comment', 'request_id',
+])
+TradeDeal = namedtuple('TradeDeal', [
+    'ticket', 'order', 'time', 'time_msc', 'type', 'entry', 'magic', 'position_id', 'reason',
+    'volume', 'price', 'commission', 'swap', 'profit', 'fee', 'symbol', 'comment',
+    'sl', 'tp',
+])
+
+
+def _to_timestamp(value) -> int:
+    """MT5 treats naive datetimes as UTC; accept datetimes or unix seconds"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+
+class FakeMt5:
+    """In-memory stand-in for the MetaTrader5 package.
+
+    Exposes the same functions and constants the driver uses so the session
+    manager and handlers can run on Linux. Prices are a deterministic function
+    of time; `clock` can be replaced to drive time in tests.
+    """
+
+    def __init__(self, symbols=('EURUSD', 'GBPUSD'), clock=time.time, fail_initialize=0, tick_interval_ms=250):
+        for name, value in globals().items():
+            if name.isupper():
+                setattr(self, name, value)
+        self.clock = clock
+        self.fail_initialize = fail_initialize
+        self.tick_interval_ms = tick_interval_ms
+        self.initialized = False
+        self.initialize_calls = 0
+        self.shutdown_calls = 0
+        self.orders = []
+        self.deals = []
+        self._last_error = (RES_S_OK, 'Success')
+        self._next_ticket = 1000
+        self._lock = threading.Lock()
+        self.symbols = {
+            name: SymbolInfo(name, 5, 0.00001, 10, 0, 3, 0.01, 100.0, 0.01, True)
+            for name in symbols
+        }
+
+    # --- connection ---------------------------------------------------------
+
+    def initialize(self, *args, **kwargs):
+        self.initialize_calls += 1
+        if self.fail_initialize > 0:
+            self.fail_initialize -= 1
+            self._last_error = (RES_E_INTERNAL_FAIL_INIT, 'IPC initialize failed')
+            return False
+        self.initialized = True
+        self._last_error = (RES_S_OK, 'Success')
+        return True
+
+    def shutdown(self):
+        self.shutdown_calls += 1
+        self.initialized = False
+        return True
+
+    def drop(self):
+        """Simulate the terminal going away (crash, restart, lost IPC)"""
+        self.initialized = False
+        self._last_error = (RES_E_INTERNAL_FAIL_CONNECT, 'No IPC connection')
+
+    def last_error(self):
+        return self._last_error
+
+    def terminal_info(self):
+        if not self._check():
+            return None
+        return TerminalInfo(True, True, 'FakeMt5')
+
+    def version(self):
+        return (500, 4000, '01 Jan 2025')
+
+    def _check(self) -> bool:
+        if not self.initialized:
+            self._last_error = (RES_E_INTERNAL_FAIL_CONNECT, 'No IPC connection')
+            return False
+        return True
+
+    # --- market data --------------------------------------------------------
+
+    def symbol_select(self, symbol, enable=True):
+        return self._check() and symbol in self.symbols
+
+    def symbol_info(self, symbol):
+        if not self._check():
+            return None
+        return self.symbols.get(symbol)
+
+    def price_at(self, symbol, ts) -> float:
+        base = 1.08 if symbol != 'GBPUSD' else 1.27
+        return round(base + 0.002 * math.sin(ts / 3600.0), 5)
+
+    def symbol_info_tick(self, symbol):
+        if not self._check() or symbol not in self.symbols:
+            return None
+        # The last tick of copy_ticks_from
+        time_msc = int(self.clock() * 1000) // self.tick_interval_ms * self.tick_interval_ms
+        bid = self.price_at(symbol, time_msc / 1000.0)
+        ask = round(bid + self.symbols[symbol].spread * self.symbols[symbol].point, 5)
+        return Tick(time_msc // 1000, bid, ask, 0.0, 0, time_msc, 6, 0.0)
+
+    def copy_ticks_from(self, symbol, date_from, count, flags=COPY_TICKS_ALL):
+        """Ticks at or after date_from, oldest first; one every tick_interval_ms up to the clock"""
+        if not self._check() or symbol not in self.symbols:
+            return None
+        interval = self.tick_interval_ms
+        first = -(-_to_timestamp(date_from) * 1000 // interval)
+        last = int(self.clock() * 1000) // interval
+        times_msc = np.arange(first, min(last + 1, first + int(count)), dtype=np.int64) * interval
+        ticks = np.zeros(len(times_msc), dtype=TICKS_DTYPE)
+        ticks['time_msc'] = times_msc
+        ticks['time'] = times_msc // 1000
+        ticks['bid'] = [self.price_at(symbol, t / 1000.0) for t in times_msc]
+        ticks['ask'] = np.round(ticks['bid'] + self.symbols[symbol].spread * self.symbols[symbol].point, 5)
+        ticks['flags'] = 6  # TICK_FLAG_BID | TICK_FLAG_ASK
+        return ticks
+
+    def _rates(self, symbol, timeframe, start, count):
+        step = TIMEFRAME_SECONDS[timeframe]
+        times = start + np.arange(count, dtype=np.int64) * step
+        rates = np.zeros(count, dtype=RATES_DTYPE)
+        rates['time'] = times
+        opens = np.array([self.price_at(symbol, t) for t in times])
+        closes = np.array([self.price_at(symbol, t + step) for t in times])
+        rates['open'] = opens
+        rates['close'] = closes
+        rates['high'] = np.maximum(opens, closes) + 0.0001
+        rates['low'] = np.minimum(opens, closes) - 0.0001
+        rates['tick_volume'] = 60
+        rates['spread'] = self.symbols[symbol].spread
+        return rates
+
+    def _last_bar_start(self, timeframe) -> int:
+        step = TIMEFRAME_SECONDS[timeframe]
+        return int(self.clock()) // step * step
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        if not self._check() or symbol not in self.symbols:
+            return None
+        step = TIMEFRAME_SECONDS[timeframe]
+        newest = self._last_bar_start(timeframe) - start_pos * step
+        return self._rates(symbol, timeframe, newest - (count - 1) * step, count)
+
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        """Bars opened at or before date_from, oldest first (MT5 semantics)"""
+        if not self._check() or symbol not in self.symbols:
+            return None
+        step = TIMEFRAME_SECONDS[timeframe]
+        newest = min(_to_timestamp(date_from), self._last_bar_start(timeframe)) // step * step
+        return self._rates(symbol, timeframe, newest - (count - 1) * step, count)
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        if not self._check() or symbol not in self.symbols:
+            return None
+        step = TIMEFRAME_SECONDS[timeframe]
+        start = -(-_to_timestamp(date_from) // step) * step
+        end = min(_to_timestamp(date_to), self._last_bar_start(timeframe))
+        count = max(0, (end - start) // step + 1)
+        return self._rates(symbol, timeframe, start, count)
+
+    # --- trading ------------------------------------------------------------
+
+    def order_send(self, request):
+        if not self._check():
+            return None
+        with self._lock:
+            self._next_ticket += 1
+            ticket = self._next_ticket
+        tick = self.symbol_info_tick(request['symbol'])
+        order = dict(request, ticket=ticket, time_setup=int(self.clock()))
+        self.orders.append(order)
+        if request.get('action') == TRADE_ACTION_DEAL:
+            self.deals.append(TradeDeal(
+                ticket, ticket, int(self.clock()), int(self.clock() * 1000), request['type'],
+                DEAL_ENTRY_IN, request.get('magic', 0), ticket, DEAL_REASON_CLIENT,
+                request['volume'], request['price'], 0.0, 0.0, 0.0, 0.0, request['symbol'],
+                request.get('comment', ''), request.get('sl', 0.0), request.get('tp', 0.0),
+            ))
+        return OrderSendResult(
+            TRADE_RETCODE_DONE, ticket, ticket, request.get('volume', 0.0), request.get('price', 0.0),
+            tick.bid if tick else 0.0, tick.ask if tick else 0.0, 'Request executed', ticket,
+        )
+
+    def history_deals_get(self, date_from=None, date_to=None, group=None, position=None):
+        if not self._check():
+            return None
+        if position is not None:
+            return tuple(d for d in self.deals if d.position_id == position)
+        start, end = _to_timestamp(date_from), _to_timestamp(date_to)
+        return tuple(d for d in self.deals if start <= d.time <= end)
@@ -0,0 +1,184 @@
+# log_writer.py
+import gzip
+import importlib
+import os
+import shutil
+from datetime import datetime, time as dt_time, timedelta
+from logging import Handler, Formatter
+from logging.handlers import QueueHandler
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(module)s - %(message)s'
+
+
+def _native(name):
+    """The unpatched stdlib module: under eventlet the writer must still be a real OS thread,
+    otherwise its blocking file writes would stall the hub"""
+    try:
+        from eventlet import patcher
+    except ImportError:
+        return importlib.import_module(name)
+    return patcher.original(name)
+
+
+_threading = _native('threading')
+_queue = _native('queue')
+_STOP = object()
+
+
+class DailyRotatingFileHandler(Handler):
+    """One file per day of `tz`, named <date>.log, written in buffered chunks.
+
+    The day comes from each record's creation time; the next midnight is
+    computed once when a file is opened, so emitting is a comparison, not a
+    timezone conversion. When max_bytes is set, a file reaching it is
+    moved to <date>.1.log.gz (gzip compressed unless compress is False),
+    older parts shifting up to `backup_count`. Nothing is flushed per
+    record; LogWriter flushes once per batch.
+    """
+
+    def __init__(self, log_dir, tz, max_bytes=0, backup_count=5, compress=True, buffer_size=64 * 1024):
+        super().__init__()
+        self.log_dir = log_dir
+        self.tz = tz
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.path = None
+        self.stream = None
+        self.size = 0
+        self.rollover_at = None  # epoch seconds of the next midnight in tz
+        self.setFormatter(Formatter(LOG_FORMAT, datefmt='%Y-%m-%d %H:%M:%S%z'))
+
+    def get_file_name(self, day):
+        return os.path.join(self.log_dir, f"{day.strftime('%Y-%m-%d')}.log")
+
+    def _open(self, created):
+        day = datetime.fromtimestamp(created, self.tz)
+        self.rollover_at = datetime.combine(day.date() + timedelta(days=1), dt_time(), tzinfo=self.tz).timestamp()
+        self.path = self.get_file_name(day)
+        os.makedirs(self.log_dir, exist_ok=True)
+        self.stream = open(self.path, 'ab', buffering=self.buffer_size)
+        self.size = self.stream.tell()
+
+    def emit(self, record):
+        try:
+            if self.stream is None or record.created >= self.rollover_at:
+                self.close_file()
+                self._open(record.created)
+            data = (self.format(record) + '\n').encode('utf-8')
+            if self.max_bytes and self.size and self.size + len(data) > self.max_bytes:
+                self.rotate()
+            self.stream.write(data)
+            self.size += len(data)
+        except Exception as e:
+            print(f"Logging failed: {str(e)}")
+
+    def _part(self, index):
+        suffix = '.log.gz' if self.compress else '.log'
+        return f"{self.path[:-len('.log')]}.{index}{suffix}"
+
+    def rotate(self):
+        """Move the current file to part 1, shifting older parts up and dropping the last"""
+        self.close_file()
+        if self.backup_count > 0:
+            if os.path.exists(self._part(self.backup_count)):
+                os.remove(self._part(self.backup_count))
+            for index in range(self.backup_count - 1, 0, -1):
+                if os.path.exists(self._part(index)):
+                    os.replace(self._part(index), self._part(index + 1))
+            if self.compress:
+                with open(self.path, 'rb') as src, gzip.open(self._part(1), 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self._part(1))
+        else:
+            os.remove(self.path)
+        self.stream = open(self.path, 'ab', buffering=self.buffer_size)
+        self.size = 0
+
+    def flush(self):
+        if self.stream:
+            self.stream.flush()
+
+    def close_file(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+    def close(self):
+        self.close_file()
+        super().close()
+
+
+class _EnqueueHandler(QueueHandler):
+    def __init__(self, writer):
+        super().__init__(writer.queue)
+        self.writer = writer
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except _queue.Full:
+            self.writer.dropped += 1
+
+
+class LogWriter:
+    """Feeds `handlers` from a queue on a background OS thread.
+
+    Loggers get `handler`, which only formats the message and puts the
+    record on the queue, so a slow disk or console never delays the code
+    that logs. The writer takes whatever has queued up (at most
+    `batch_size` records), passes it to each handler that accepts the
+    level and flushes the handlers once per batch. Records arriving while
+    the queue is full are counted in `dropped` instead of blocking.
+    """
+
+    def __init__(self, handlers, queue_size=100000, batch_size=500):
+        self.handlers = list(handlers)
+        self.batch_size = batch_size
+        self.queue = _queue.Queue(queue_size)
+        self.handler = _EnqueueHandler(self)
+        self.dropped = 0
+        self.written = 0
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = _threading.Thread(target=self._run, name='log-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Write what is queued, then close the handlers"""
+        if self._thread is None:
+            return
+        self.queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+        for handler in self.handlers:
+            handler.close()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except _queue.Empty:
+                    break
+            stopping = any(record is _STOP for record in batch)
+            self._write([record for record in batch if record is not _STOP])
+            if stopping:
+                return
+
+    def _write(self, records):
+        for handler in self.handlers:
+            for record in records:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            try:
+                handler.flush()
+            except Exception as e:
+                print(f"Logging failed: {str(e)}")
+        self.written += len(records)
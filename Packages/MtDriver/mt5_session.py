@@ -0,0 +1,320 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# MT5 result codes meaning the IPC link to the terminal is gone (RES_E_INTERNAL_FAIL_*)
+IPC_ERROR_CODES = range(-10005, -10000)
+
+
+# Priority classes of terminal access, most urgent first. Waiting callers are served in
+# this order, so an order never queues behind history fetches that arrived before it
+PRIORITY_ORDER = 0    # order placement / modification and the session's own bookkeeping
+PRIORITY_TICK = 1     # live prices
+PRIORITY_CANDLES = 2  # closed-bar polling of the candle stream
+PRIORITY_HISTORY = 3  # range fetches, one slice per acquisition
+PRIORITY_NAMES = {PRIORITY_ORDER: 'order', PRIORITY_TICK: 'tick', PRIORITY_CANDLES: 'candles',
+                  PRIORITY_HISTORY: 'history'}
+
+
+class PriorityLock:
+    """Re-entrant lock handing itself to the most urgent waiter, FIFO within a priority.
+
+    A holder is never interrupted: long work has to be split into several
+    acquisitions for more urgent callers to get in between.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._waiting = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._owner = None
+        self._depth = 0
+        self._held_since = 0.0
+        self._held_priority = None
+        self._stats = {priority: self._new_stats() for priority in PRIORITY_NAMES}
+
+    @staticmethod
+    def _new_stats():
+        return {'acquired': 0, 'wait_ms': 0.0, 'max_wait_ms': 0.0, 'hold_ms': 0.0, 'max_hold_ms': 0.0}
+
+    def acquire(self, priority=PRIORITY_ORDER):
+        me = threading.get_ident()
+        with self._cond:
+            if self._owner == me:
+                self._depth += 1
+                return True
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            started = time.perf_counter()
+            while self._owner is not None or self._waiting[0] != ticket:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self._owner, self._depth = me, 1
+            self._held_since, self._held_priority = time.perf_counter(), priority
+            stats = self._stats.setdefault(priority, self._new_stats())
+            waited = (self._held_since - started) * 1000
+            stats['acquired'] += 1
+            stats['wait_ms'] += waited
+            stats['max_wait_ms'] = max(stats['max_wait_ms'], waited)
+            # Others may be next in line now that the heap top changed
+            self._cond.notify_all()
+            return True
+
+    def release(self):
+        with self._cond:
+            if self._owner != threading.get_ident():
+                raise RuntimeError("cannot release un-acquired lock")
+            self._depth -= 1
+            if self._depth:
+                return
+            held = (time.perf_counter() - self._held_since) * 1000
+            stats = self._stats[self._held_priority]
+            stats['hold_ms'] += held
+            stats['max_hold_ms'] = max(stats['max_hold_ms'], held)
+            self._owner = None
+            self._cond.notify_all()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def metrics(self):
+        """Queue depth and wait / hold times per priority class"""
+        with self._cond:
+            depth = {}
+            for priority, _ in self._waiting:
+                depth[priority] = depth.get(priority, 0) + 1
+            return {PRIORITY_NAMES.get(priority, str(priority)): dict(
+                stats, queued=depth.get(priority, 0),
+                avg_wait_ms=stats['wait_ms'] / stats['acquired'] if stats['acquired'] else 0.0,
+            ) for priority, stats in self._stats.items()}
+
+
+class Mt5ConnectionError(Exception):
+    """Raised when no connection to the MT5 terminal can be established"""
+
+
+def direct_call(fn, *args, **kwargs):
+    return fn(*args, **kwargs)
+
+
+def eventlet_executor():
+    """Run each MT5 call on eventlet's OS thread pool so the hub keeps serving other green threads.
+
+    MetaTrader5 is a C extension that monkey patching cannot make cooperative;
+    tpool.execute parks the calling green thread until the call returns.
+    """
+    from eventlet import tpool
+    return tpool.execute
+
+
+class Mt5Proxy:
+    """The backend as handlers see it: every function call goes through the session's executor.
+
+    `failed` is set when a call raised or returned None, the only results
+    after which last_error() can hold an IPC error worth a round trip.
+    """
+
+    def __init__(self, backend, executor):
+        self._backend = backend
+        self._executor = executor
+        self.failed = False
+
+    def __getattr__(self, name):
+        value = getattr(self._backend, name)
+        if not callable(value):
+            return value  # TIMEFRAME_*, ORDER_* and other constants
+
+        def call(*args, **kwargs):
+            try:
+                result = self._executor(value, *args, **kwargs)
+            except BaseException:
+                self.failed = True
+                raise
+            if result is None:
+                self.failed = True
+            return result
+        return call
+
+
+def load_backend(name=None):
+    """Return the MT5 API backend selected by name or the MT5_BACKEND env var.
+
+    'mt5' (default) is the real MetaTrader5 package, 'fake' is the in-memory
+    FakeMt5 used for tests and Linux development.
+    """
+    name = (name or os.environ.get('MT5_BACKEND', 'mt5')).lower()
+    if name == 'fake':
+        from fake_mt5 import FakeMt5
+        return FakeMt5()
+    import MetaTrader5
+    return MetaTrader5
+
+
+class Mt5Session:
+    """Owns one long-lived MT5 terminal connection shared by all handlers.
+
+    The terminal is initialized once and kept open. A background health check
+    detects a dropped terminal and reconnects with exponential backoff;
+    handlers use `acquire()` to get the backend under a single lock.
+    Every terminal call, including the session's own, is made through
+    `executor(fn, *args)`: the default calls inline, app.py passes
+    eventlet_executor() so blocking calls run on OS threads.
+    """
+
+    def __init__(self, backend=None, init_kwargs=None, health_interval=5.0,
+                 connect_attempts=3, backoff_initial=0.5, backoff_max=30.0, executor=None):
+        self.backend = backend if backend is not None else load_backend()
+        self.executor = executor or direct_call
+        self.proxy = Mt5Proxy(self.backend, self.executor)
+        self.init_kwargs = init_kwargs or {}
+        self.health_interval = health_interval
+        self.connect_attempts = connect_attempts
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.lock = PriorityLock()
+        self.connected = False
+        self.connects = 0
+        self.drops = 0
+        self._stop = threading.Event()
+        self._health_thread = None
+
+    def start(self):
+        """Connect and start the background health check"""
+        self._stop.clear()
+        if not self.reconnect(self.connect_attempts):
+            logger.error("MT5 session started without a terminal connection")
+        if self._health_thread is None or not self._health_thread.is_alive():
+            self._health_thread = threading.Thread(target=self._health_loop, name='mt5-health', daemon=True)
+            self._health_thread.start()
+        logger.info("MT5 session started")
+
+    def stop(self):
+        """Stop the health check and shut the terminal connection down"""
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join(timeout=self.health_interval + 1)
+            self._health_thread = None
+        with self.lock:
+            if self.connected:
+                self._safe_shutdown()
+            self.connected = False
+        logger.info("MT5 session stopped")
+
+    def _safe_shutdown(self):
+        try:
+            self.executor(self.backend.shutdown)
+        except Exception as e:
+            logger.error(f"MT5 shutdown error: {str(e)}")
+
+    def _try_connect(self) -> bool:
+        """Single initialize attempt; caller must hold the lock"""
+        try:
+            ok = bool(self.executor(self.backend.initialize, **self.init_kwargs))
+        except Exception as e:
+            logger.error(f"MT5 connection error: {str(e)}")
+            ok = False
+        if ok:
+            self.connects += 1
+            logger.info(f"MT5 terminal connected (connect #{self.connects})")
+        else:
+            logger.error(f"MT5 init failed: {self._last_error()}")
+        self.connected = ok
+        return ok
+
+    def _last_error(self):
+        try:
+            return self.executor(self.backend.last_error)
+        except Exception:
+            return None
+
+    def _alive(self) -> bool:
+        """Cheap liveness probe: terminal_info() is None once IPC is lost"""
+        try:
+            return self.executor(self.backend.terminal_info) is not None
+        except Exception:
+            return False
+
+    def mark_disconnected(self):
+        """Flag the connection as dropped so the next access reconnects"""
+        with self.lock:
+            if self.connected:
+                self.drops += 1
+                logger.warning("MT5 terminal connection lost")
+                self._safe_shutdown()
+            self.connected = False
+
+    def reconnect(self, attempts=None) -> bool:
+        """Connect if needed, retrying with exponential backoff.
+
+        The lock is released while backing off so handlers fail fast instead
+        of queueing behind a reconnect loop.
+        """
+        attempts = attempts or self.connect_attempts
+        delay = self.backoff_initial
+        for attempt in range(1, attempts + 1):
+            with self.lock:
+                if self.connected or self._try_connect():
+                    return True
+            if attempt < attempts and not self._stop.wait(delay):
+                delay = min(delay * 2, self.backoff_max)
+        return False
+
+    def _health_loop(self):
+        delay = self.backoff_initial
+        wait = self.health_interval
+        while not self._stop.wait(wait):
+            with self.lock:
+                if self.connected and self._alive():
+                    wait, delay = self.health_interval, self.backoff_initial
+                    continue
+                if self.connected:
+                    self.mark_disconnected()
+                ok = self._try_connect()
+            if ok:
+                wait, delay = self.health_interval, self.backoff_initial
+            else:
+                wait, delay = delay, min(delay * 2, self.backoff_max)
+
+    @contextmanager
+    def acquire(self, priority=PRIORITY_HISTORY):
+        """Yield the connected backend (as a Mt5Proxy) while holding the session lock.
+
+        Waiting callers get the lock in priority order (PRIORITY_*). Fails
+        fast with Mt5ConnectionError while the terminal is disconnected;
+        reconnecting is left to the health check. When one of the caller's
+        calls raised or returned None, last_error() is checked and an IPC
+        error marks the session disconnected.
+        """
+        if not self.connected:
+            raise Mt5ConnectionError("MT5 terminal not connected")
+        self.lock.acquire(priority)
+        try:
+            if not self.connected:
+                raise Mt5ConnectionError("MT5 connection lost")
+            try:
+                yield self.proxy
+            finally:
+                if self.proxy.failed:
+                    self.proxy.failed = False
+                    error = self._last_error()
+                    if error and error[0] in IPC_ERROR_CODES:
+                        self.mark_disconnected()
+        finally:
+            self.lock.release()
+
+    def status(self) -> dict:
+        return {
+            'connected': self.connected,
+            'connects': self.connects,
+            'drops': self.drops,
+            'queue': self.lock.metrics(),
+        }
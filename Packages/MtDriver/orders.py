@@ -0,0 +1,193 @@
+# orders.py
+import logging
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ['symbol', 'volume', 'direction', 'sl', 'tp', 'price']
+MARKET_DEVIATION = 5
+PENDING_DEVIATION = 30
+MAX_MARKET_SLIPPAGE = 0.0002  # |current price - requested price| allowed for market orders
+MAGIC = 12345
+COMMENT = "FBB"
+
+
+class OrderRejected(Exception):
+    """An order that failed validation or was refused by MT5; payload is the JSON error body"""
+
+    def __init__(self, payload, status=400):
+        if isinstance(payload, str):
+            payload = {"error": payload}
+        super().__init__(payload["error"])
+        self.payload = payload
+        self.status = status
+
+
+def parse_order(data):
+    """Required fields of an order request as typed values"""
+    if not isinstance(data, dict):
+        raise OrderRejected("Order must be a JSON object")
+    for field in REQUIRED_FIELDS:
+        if field not in data or data[field] is None:
+            logger.warning(f"Missing field {field} in order request")
+            raise OrderRejected(f"Missing required field: {field}")
+    for field in ('symbol', 'direction'):
+        if not isinstance(data[field], str):
+            raise OrderRejected(f"Invalid {field} - must be a string")
+    order = {'symbol': data['symbol'].upper(), 'direction': data['direction'].upper()}
+    for field in ('volume', 'price', 'sl', 'tp'):
+        try:
+            order[field] = float(data[field])
+        except (TypeError, ValueError):
+            raise OrderRejected(f"Invalid {field} - must be a number")
+    return order
+
+
+def build_market_request(mt5, order, symbol_info, tick):
+    """order_send request of a market order, validated against tick; returns (request, details)"""
+    digits = symbol_info.digits
+    entry_price = round(order['price'], digits)
+    sl = round(order['sl'], digits)
+    tp = round(order['tp'], digits)
+
+    if order['direction'] == "BUY":
+        current_price = tick.ask  # Use ASK price for BUY orders
+        order_type = mt5.ORDER_TYPE_BUY
+        # SL must be BELOW current_price, TP must be ABOVE current_price
+        sl_error = "SL must be below entry price for BUY" if sl >= current_price else None
+        tp_error = "TP must be above entry price for BUY" if tp <= current_price else None
+    elif order['direction'] == "SELL":
+        current_price = tick.bid  # Use BID price for SELL orders
+        order_type = mt5.ORDER_TYPE_SELL
+        # SL must be ABOVE current_price, TP must be BELOW current_price
+        sl_error = "SL must be above entry price for SELL" if sl <= current_price else None
+        tp_error = "TP must be below entry price for SELL" if tp >= current_price else None
+    else:
+        raise OrderRejected("Invalid direction - use BUY/SELL")
+
+    if abs(current_price - entry_price) > MAX_MARKET_SLIPPAGE:
+        raise OrderRejected(f"for market orders current_price - entry_price is {abs(current_price - entry_price)} "
+                            f"wich should be lower than {MAX_MARKET_SLIPPAGE}")
+    if sl_error or tp_error:
+        raise OrderRejected(sl_error or tp_error)
+
+    mt5_request = {
+        "action": mt5.TRADE_ACTION_DEAL,
+        "symbol": order['symbol'],
+        "volume": order['volume'],
+        "type": order_type,
+        "price": current_price,
+        "sl": sl,
+        "tp": tp,
+        "deviation": MARKET_DEVIATION,
+        "type_time": mt5.ORDER_TIME_GTC,
+        "magic": MAGIC,
+        "comment": COMMENT,
+    }
+    details = {"direction": order['direction'], "order_type": order_type, "entry_price": entry_price,
+               "current_price": current_price, "sl": sl, "tp": tp}
+    return mt5_request, details
+
+
+def build_pending_request(mt5, order, symbol_info, tick, min_distance_point, min_stop_distance_point):
+    """order_send request of a limit/stop order, validated against tick; returns (request, details)"""
+    direction = order['direction']
+    digits = symbol_info.digits
+    point = symbol_info.point
+
+    # Determine prices and order type
+    current_price = tick.ask if direction == "BUY" else tick.bid
+    price_diff = order['price'] - current_price
+    min_distance = min_distance_point * point
+    if direction == "BUY":
+        if order['price'] > current_price:
+            order_type = mt5.ORDER_TYPE_BUY_STOP
+            if abs(price_diff) < min_distance:
+                raise OrderRejected(f"Entry price too close to current price (min {min_distance})")
+        else:
+            order_type = mt5.ORDER_TYPE_BUY_LIMIT
+    elif direction == "SELL":
+        if order['price'] < current_price:
+            order_type = mt5.ORDER_TYPE_SELL_STOP
+            if abs(price_diff) < min_distance:
+                raise OrderRejected(f"Entry price too close to current price (min {min_distance})")
+        else:
+            order_type = mt5.ORDER_TYPE_SELL_LIMIT
+    else:
+        raise OrderRejected("Invalid direction - use BUY/SELL")
+
+    # Format prices
+    entry_price = round(order['price'], digits)
+    sl = round(order['sl'], digits)
+    tp = round(order['tp'], digits)
+
+    # Validate stop levels
+    min_stop_distance = min_stop_distance_point * point
+    if direction == "BUY":
+        if sl >= entry_price - min_stop_distance:
+            raise OrderRejected("SL too close to entry price for BUY order")
+        if tp <= entry_price + min_stop_distance:
+            raise OrderRejected("TP too close to entry price for BUY order")
+    else:
+        if sl <= entry_price + min_stop_distance:
+            raise OrderRejected("SL too close to entry price for SELL order")
+        if tp >= entry_price - min_stop_distance:
+            raise OrderRejected("TP too close to entry price for SELL order")
+
+    mt5_request = {
+        "action": mt5.TRADE_ACTION_PENDING,
+        "symbol": order['symbol'],
+        "volume": order['volume'],
+        "type": order_type,
+        "price": entry_price,
+        "sl": sl,
+        "tp": tp,
+        "deviation": PENDING_DEVIATION,
+        "type_time": mt5.ORDER_TIME_GTC,
+        "type_filling": mt5.ORDER_FILLING_RETURN,  # More suitable for pending orders
+    }
+    details = {"direction": direction, "entry_price": entry_price, "sl": sl, "tp": tp}
+    return mt5_request, details
+
+
+def submit(mt5, mt5_request):
+    """order_send; returns the result or raises OrderRejected with the MT5 error"""
+    symbol = mt5_request.get('symbol')
+    result = mt5.order_send(mt5_request)
+    if not result:
+        error = mt5.last_error()
+        logger.error(f"Order failed for {symbol}: {error}")
+        raise OrderRejected({
+            "error": "Order failed - no response from MT5",
+            "code": error[0],
+            "message": error[1]
+        }, 500)
+    logger.info(f"Order executed successfully: {result.order}")
+
+    if result.retcode != mt5.TRADE_RETCODE_DONE:
+        error = mt5.last_error()
+        raise OrderRejected({
+            "error": "Order rejected",
+            "code": error[0],
+            "message": error[1],
+            "comment": result.comment
+        })
+    return result
+
+
+def rollback_request(mt5, mt5_request, result, tick):
+    """Request undoing a submitted order: delete a pending one, close the position of a market one"""
+    if mt5_request['action'] == mt5.TRADE_ACTION_PENDING:
+        return {"action": mt5.TRADE_ACTION_REMOVE, "order": result.order, "comment": COMMENT}
+    buy = mt5_request['type'] == mt5.ORDER_TYPE_BUY
+    return {
+        "action": mt5.TRADE_ACTION_DEAL,
+        "symbol": mt5_request['symbol'],
+        "volume": mt5_request['volume'],
+        "type": mt5.ORDER_TYPE_SELL if buy else mt5.ORDER_TYPE_BUY,
+        "position": result.order,
+        "price": tick.bid if buy else tick.ask,
+        "deviation": MARKET_DEVIATION,
+        "type_time": mt5.ORDER_TIME_GTC,
+        "magic": MAGIC,
+        "comment": COMMENT,
+    }
@@ -0,0 +1,131 @@
+# settings.py
+import logging
+import threading
+from collections import defaultdict
+
+from mysql.connector import Error
+from mysql.connector.pooling import PoolError
+
+logger = logging.getLogger(__name__)
+
+# parseTo values of the `setting` table (SettingParseTo in prisma/schema.prisma)
+PARSERS = {
+    'INT': lambda value: int(float(value)),
+    'BIGINT': int,
+    'FLOAT': float,
+    'BOOLEAN': lambda value: value.strip().lower() in ('1', 'true', 'yes', 'on'),
+    'STRING': str,
+}
+
+
+def parse_setting(value, parse_to):
+    try:
+        return PARSERS.get(parse_to, str)(value)
+    except (TypeError, ValueError):
+        logger.error(f"Setting value {value!r} is not a valid {parse_to}")
+        return value
+
+
+class SettingsCache:
+    """In-memory copy of the `setting` table, reloaded in one query every `ttl` seconds.
+
+    Reads never touch the database once the first load has happened.
+    subscribe(key, callback) calls back with the parsed value right away and
+    again whenever a reload sees it change, so runtime knobs can be edited
+    in the table without restarting the driver.
+    """
+
+    def __init__(self, db, ttl=30.0):
+        self.db = db
+        self.ttl = ttl
+        self._records = {}
+        self._values = {}
+        self._loaded = False
+        self._attempted = False
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(list)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load(self):
+        """Fetch the whole table; returns False (keeping the old values) when the DB is unreachable"""
+        try:
+            rows = self.db.query("SELECT * FROM setting", label='settings')
+        except (Error, PoolError) as e:
+            logger.error(f"Loading settings failed: {str(e)}")
+            return False
+
+        # SELECT * columns: id, settingKey, settingValue, parseTo
+        records = {row[1]: tuple(row) for row in rows}
+        values = {key: parse_setting(record[2], record[3]) for key, record in records.items()}
+        with self._lock:
+            changed = [key for key in values.keys() | self._values.keys()
+                       if values.get(key) != self._values.get(key)]
+            first_load = not self._loaded
+            self._records, self._values, self._loaded = records, values, True
+            callbacks = [(key, callback) for key in changed for callback in self._subscribers.get(key, ())]
+
+        for key in () if first_load else changed:
+            logger.info(f"Setting {key} changed to {values.get(key)!r}")
+        for key, callback in callbacks:
+            self._notify(key, callback, values.get(key))
+        return True
+
+    def _ensure_loaded(self):
+        # Only the first read may hit the DB; after a failed load the refresh thread retries
+        if not self._attempted:
+            self._attempted = True
+            self.load()
+
+    def get(self, key, default=None):
+        """Parsed value of key, default when it is not in the table"""
+        self._ensure_loaded()
+        return self._values.get(key, default)
+
+    def record(self, key):
+        """Raw (id, settingKey, settingValue, parseTo) row, None when missing"""
+        self._ensure_loaded()
+        return self._records.get(key)
+
+    def subscribe(self, key, callback, default=None):
+        """Call callback(value) now and on every change of key; returns an unsubscribe function.
+
+        A key removed from the table is reported as `default`.
+        """
+        def deliver(value):
+            callback(default if value is None else value)
+
+        value = self.get(key)
+        with self._lock:
+            self._subscribers[key].append(deliver)
+        self._notify(key, deliver, value)
+
+        def unsubscribe():
+            with self._lock:
+                if deliver in self._subscribers[key]:
+                    self._subscribers[key].remove(deliver)
+        return unsubscribe
+
+    @staticmethod
+    def _notify(key, callback, value):
+        try:
+            callback(value)
+        except Exception as e:
+            logger.error(f"Setting {key} subscriber failed: {str(e)}")
+
+    def start(self):
+        """Reload every ttl seconds in a background thread"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._refresh_loop, name='settings-refresh', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.ttl + 1)
+            self._thread = None
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.ttl):
+            self.load()
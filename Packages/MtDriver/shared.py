@@ -1,13 +1,12 @@
 # shared.py
+import atexit
 import logging
 import os
-import time
-from logging import Handler, Formatter
-from datetime import datetime
+from logging import Formatter
 from zoneinfo import ZoneInfo
-import MetaTrader5 as mt5
-import mysql.connector
-from mysql.connector import Error
+from db import DbPool
+from settings import SettingsCache
+from log_writer import DailyRotatingFileHandler, LogWriter
 
 target_tz_name = "Europe/Athens"
 # target_tz_name = "Asia/Nicosia"
@@ -19,6 +18,28 @@ target_tz = ZoneInfo(target_tz_name) # +02:00 | +03:00
 # demo_server = "MetaQuotes-Demo"
 
 
+# Database pools, shared by every module of the MtDriver
+DB_POOL_SIZE = 5
+DB_MAX_STREAMS = 8  # concurrent streamed candle responses, each on its own connection
+core_db = DbPool('fbb_core', {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '',
+    'database': 'fbb_core'
+}, pool_size=DB_POOL_SIZE)
+candles_db = DbPool('trading_view_candles', {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '',
+    'database': 'trading_view_candles'
+}, pool_size=DB_POOL_SIZE, max_streams=DB_MAX_STREAMS)
+
+
+# Whole `setting` table, loaded once and refreshed in the background by app.py
+SETTINGS_TTL = 30
+settings = SettingsCache(core_db, ttl=SETTINGS_TTL)
+
+
 def get_setting(key):
     """
     Fetch a record from the 'setting' table where settingKey matches the provided key.
@@ -29,39 +50,7 @@ def get_setting(key):
     Returns:
         tuple: The matching record as a tuple, or None if not found or error occurs
     """
-    try:
-        # Establish database connection
-        connection = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='',
-            database='fbb_core'
-        )
-        
-        # Create cursor to execute queries
-        cursor = connection.cursor()
-        
-        # SQL query with parameterized input to prevent SQL injection
-        query = """SELECT * FROM setting WHERE settingKey = %s"""
-        
-        # Execute the query with the provided key
-        cursor.execute(query, (key,))
-        
-        # Fetch the single record
-        record = cursor.fetchone()
-        
-        return record
-        
-    except Error as e:
-        print(f"Error fetching data from MySQL: {e}")
-        return None
-        
-    finally:
-        # Close database connection in any case
-        if 'connection' in locals() and connection.is_connected():
-            cursor.close()
-            connection.close()
-            print("MySQL connection is closed")
+    return settings.record(key)
 
 
 mt5_login = get_setting("Mt5Login")
@@ -72,93 +61,62 @@ mt5_login = 5034048580
 mt5_password = "*h3nNrEu"
 mt5_server = "MetaQuotes-Demo"
 
+mt5_init_kwargs = {
+    'path': "C:/Program Files/MetaTrader 5/terminal64.exe",
+    'login': mt5_login,
+    'password': mt5_password,
+    'server': mt5_server,
+    'timeout': 5000,
+}
+
+
+# Parquet candle store written by the Inserter scripts (Packages/CandleStore)
+CANDLE_STORE_DIR = "./Data/candle_store"
+# Memory-mapped backtest cache built by Inserter/build_candle_cache.py
+CANDLE_CACHE_DIR = "./Data/candle_cache"
+# Closed-deal watermark of the Telegram channel, so restarts neither repeat nor skip deals
+DEAL_STATE_PATH = "./Data/deal_tracker.json"
+
 
 # Logging configuration
 LOG_DIR = "./Logs/mtDriver"
 os.makedirs(LOG_DIR, exist_ok=True)
 
 
-class DailyRotatingFileHandler(Handler):
-    def __init__(self):
-        super().__init__()
-        self.current_date = None
-        self.file_handler = None
-        self.setFormatter(Formatter(
-            '%(asctime)s - %(levelname)s - %(module)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S%z'
-        ))
-
-    def get_file_name(self):
-        """Get filename based on Europe/Athens date"""
-        now = datetime.now(target_tz)
-        return os.path.join(LOG_DIR, f"{now.strftime('%Y-%m-%d')}.log")
-
-    def emit(self, record):
-        """Handle log emission with timezone-aware rotation"""
-        try:
-            current_date = datetime.now(target_tz).date()
-            
-            if current_date != self.current_date:
-                self.close_file()
-                self.current_date = current_date
-                filename = self.get_file_name()
-                self.file_handler = open(filename, 'a', encoding='utf-8')
-            
-            msg = self.format(record)
-            if self.file_handler:
-                self.file_handler.write(msg + '\n')
-                self.file_handler.flush()
-                
-        except Exception as e:
-            print(f"Logging failed: {str(e)}")
-
-    def close_file(self):
-        if self.file_handler:
-            self.file_handler.close()
-            self.file_handler = None
-
-    def close(self):
-        self.close_file()
-        super().close()
+# Records go through a queue to a background writer, so disk latency stays out of request handlers
+LOG_MAX_BYTES = 50 * 1024 * 1024  # per part of a day's log; full parts are gzipped
+LOG_BACKUP_COUNT = 10
+LOG_QUEUE_SIZE = 100000
+log_writer = None
 
 
 def setup_logging():
     """Configure logging for all modules"""
+    global log_writer
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
 
     # Remove existing handlers
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+    if log_writer is not None:
+        log_writer.stop()
 
-    # Add file handler
-    file_handler = DailyRotatingFileHandler()
+    # File handler, rotated daily in the target timezone and by size
+    file_handler = DailyRotatingFileHandler(LOG_DIR, target_tz, max_bytes=LOG_MAX_BYTES,
+                                            backup_count=LOG_BACKUP_COUNT)
     file_handler.setLevel(logging.INFO)
-    logger.addHandler(file_handler)
 
-    # Add console handler
+    # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(Formatter(
         '%(asctime)s - %(levelname)s - %(module)s - %(message)s'
     ))
-    logger.addHandler(console_handler)
 
-    logging.info("Logging system initialized")
+    # Both are fed by the writer thread; loggers only enqueue
+    log_writer = LogWriter([file_handler, console_handler], queue_size=LOG_QUEUE_SIZE)
+    logger.addHandler(log_writer.handler)
+    log_writer.start()
+    atexit.register(log_writer.stop)
 
-
-def initialize_mt5():
-    for attempt in range(3):
-        try:
-            if mt5.initialize(
-                    path="C:/Program Files/MetaTrader 5/terminal64.exe",
-                    login=mt5_login,
-                    password=mt5_password,
-                    server=mt5_server,
-                    timeout=5000
-            ):
-                return True
-            logging.error(f"MT5 init attempt {attempt+1} failed")
-            time.sleep(1)
-        except Exception as e:
-            logging.error(f"Connection error: {str(e)}")
-    return False
+    logging.info("Logging system initialized")
@@ -0,0 +1,98 @@
+# symbol_cache.py
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from mt5_session import PRIORITY_ORDER, Mt5ConnectionError
+
+logger = logging.getLogger(__name__)
+
+# The symbol_info fields the order path needs; spread is as of the fetch, use a tick for live prices
+SymbolMeta = namedtuple('SymbolMeta', [
+    'name', 'digits', 'point', 'spread', 'trade_stops_level', 'filling_mode',
+    'volume_min', 'volume_max', 'volume_step',
+])
+
+
+class SymbolInfoCache:
+    """Per-symbol symbol_info metadata, kept for `ttl` seconds.
+
+    Digits, point, stops level and volume limits practically never change,
+    so the order handlers and the Telegram channel read them from here
+    instead of making a terminal call each time. Entries are dropped by
+    invalidate() or when the session has reconnected since they were
+    fetched (the terminal may now be logged into another server).
+    """
+
+    def __init__(self, session, ttl=300.0, clock=time.monotonic):
+        self.session = session
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = {}  # symbol -> (meta, fetched_at, session connect number)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, symbol, mt5=None):
+        """SymbolMeta of symbol, None when the terminal doesn't know it.
+
+        Pass mt5 when already inside session.acquire() so a miss is fetched
+        on the same connection.
+        """
+        symbol = symbol.upper()
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None and self._fresh(entry):
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        if mt5 is not None:
+            return self._fetch(mt5, symbol)
+        try:
+            with self.session.acquire(PRIORITY_ORDER) as backend:
+                return self._fetch(backend, symbol)
+        except Mt5ConnectionError as e:
+            logger.error(f"symbol_info for {symbol} unavailable: {str(e)}")
+            return entry[0] if entry is not None else None
+
+    def _fresh(self, entry):
+        _, fetched_at, connects = entry
+        return self.clock() - fetched_at < self.ttl and connects == self.session.connects
+
+    def _fetch(self, mt5, symbol):
+        info = mt5.symbol_info(symbol)
+        if info is None:
+            return None
+        meta = SymbolMeta(*(getattr(info, field) for field in SymbolMeta._fields))
+        with self._lock:
+            self._entries[symbol] = (meta, self.clock(), self.session.connects)
+        return meta
+
+    def warm(self, symbols):
+        """Fetch symbols up front so the first orders don't pay for it; returns the ones found"""
+        found = []
+        try:
+            with self.session.acquire(PRIORITY_ORDER) as mt5:  # orders wait on these symbols
+                for symbol in symbols:
+                    mt5.symbol_select(symbol, True)
+                    if self._fetch(mt5, symbol.upper()) is not None:
+                        found.append(symbol.upper())
+                    else:
+                        logger.warning(f"Cannot warm symbol_info of {symbol}")
+        except Mt5ConnectionError as e:
+            logger.error(f"Symbol cache warm-up skipped: {str(e)}")
+        return found
+
+    def invalidate(self, symbol=None):
+        """Drop one symbol, or everything when symbol is None"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(symbol.upper(), None)
+
+    def status(self):
+        with self._lock:
+            return {'symbols': sorted(self._entries), 'hits': self.hits, 'misses': self.misses, 'ttl': self.ttl}
@@ -0,0 +1,244 @@
+# telegram_sender.py
+import logging
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API = "https://api.telegram.org"
+MAX_MESSAGE_LENGTH = 4096  # Telegram's limit for sendMessage text
+
+
+class TokenBucket:
+    """`rate` tokens per second, at most `capacity` saved up"""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        """Seconds until a token is available, 0 when one is"""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+    def penalize(self, seconds):
+        """Telegram asked to back off (429 retry_after): no tokens until then"""
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class TelegramSender:
+    """Background sendMessage worker for one chat.
+
+    Messages are queued by send() and posted over one keep-alive HTTP
+    session, at most `per_minute` per minute (token bucket with `burst`).
+    Whatever queues up while the worker waits for a token, or within
+    `coalesce_window` seconds of the first message, goes out as a single
+    digest, split between lines at Telegram's 4096 character limit so no
+    Markdown entity is cut in half. Failed posts are retried with
+    exponential backoff; a 429 waits its retry_after. A post whose Markdown
+    Telegram cannot parse is resent as plain text; other invalid requests
+    (4xx) are dropped. The queue keeps at most `max_pending` messages,
+    dropping the oldest beyond that. stop() sends what is still queued
+    before the worker exits, within its timeout.
+    """
+
+    def __init__(self, bot_token, chat_id, api_url=TELEGRAM_API, per_minute=20, burst=3, coalesce_window=1.0,
+                 backoff_initial=1.0, backoff_max=60.0, max_pending=1000, timeout=10, parse_mode='Markdown'):
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.url = f"{api_url}/bot{bot_token}/sendMessage"
+        self.bucket = TokenBucket(per_minute / 60.0, burst)
+        self.coalesce_window = coalesce_window
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.parse_mode = parse_mode
+        self.http = requests.Session()
+        self.http.mount(api_url, HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._pending = deque(maxlen=max_pending)
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._drain_until = 0.0  # monotonic deadline for sending the backlog after stop()
+        self._thread = None
+        self.stats = {'queued': 0, 'sent_messages': 0, 'sent_posts': 0, 'retries': 0, 'dropped': 0}
+
+    def send(self, text):
+        """Queue a message; returns immediately"""
+        if not self.bot_token:
+            logger.debug("Telegram bot token not set, message not sent")
+            return
+        with self._cond:
+            if len(self._pending) == self._pending.maxlen:
+                self.stats['dropped'] += 1
+                logger.warning("Telegram queue full, dropping the oldest message")
+            self._pending.append(text)
+            self.stats['queued'] += 1
+            self._cond.notify()
+        self.start()
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='telegram-sender', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Send what is queued (waiting for at most timeout seconds), then stop the worker"""
+        with self._cond:
+            self._stopped = True
+            self._drain_until = time.monotonic() + timeout
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def _next_batch(self):
+        """Wait for messages, a coalescing window and a token; None once stopped and drained"""
+        with self._cond:
+            while not self._pending and not self._stopped:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            deadline = time.monotonic() + self.coalesce_window
+            while not self._stopped:
+                wait = max(deadline - time.monotonic(), self.bucket.wait_time())
+                if wait <= 0:
+                    break
+                self._cond.wait(wait)
+            messages = list(self._pending)
+            self._pending.clear()
+        return messages
+
+    @staticmethod
+    def split(message, limit=MAX_MESSAGE_LENGTH):
+        """Cut a message into parts of at most limit characters, between lines where possible"""
+        parts, current = [], ''
+        for line in message.split('\n'):
+            while len(line) > limit:  # a single line over the limit has to be cut
+                if current:
+                    parts.append(current)
+                    current = ''
+                parts.append(line[:limit])
+                line = line[limit:]
+            if current and len(current) + 1 + len(line) > limit:
+                parts.append(current)
+                current = line
+            else:
+                current = f"{current}\n{line}" if current else line
+        if current:
+            parts.append(current)
+        return parts
+
+    @classmethod
+    def digest(cls, messages, limit=MAX_MESSAGE_LENGTH):
+        """Join messages into as few posts as fit in limit characters each"""
+        posts, current = [], ''
+        for message in messages:
+            for part in cls.split(message, limit):
+                if current and len(current) + 2 + len(part) > limit:
+                    posts.append(current)
+                    current = ''
+                current = f"{current}\n\n{part}" if current else part
+        if current:
+            posts.append(current)
+        return posts
+
+    def _run(self):
+        while True:
+            messages = self._next_batch()
+            if messages is None:
+                return
+            posts = self.digest(messages)
+            for sent, post in enumerate(posts):
+                delivered = self._deliver(post)
+                if delivered is None:
+                    unsent = len(posts) - sent
+                    self.stats['dropped'] += unsent
+                    logger.warning(f"Telegram sender stopped with {unsent} posts and {self.pending()} messages unsent")
+                    return
+                self.stats['sent_posts' if delivered else 'dropped'] += 1
+            self.stats['sent_messages'] += len(messages)
+            if len(messages) > 1:
+                logger.info(f"Sent {len(messages)} Telegram messages in {len(posts)} posts")
+
+    def _deliver(self, text):
+        """Post text, retrying until Telegram accepts (True) or rejects (False) it; None past the stop() deadline"""
+        delay = self.backoff_initial
+        parse_mode = self.parse_mode
+        while True:
+            wait = self.bucket.wait_time()
+            if wait > 0 and self._sleep(wait):
+                return None
+            self.bucket.take()
+            payload = {'chat_id': self.chat_id, 'text': text}
+            if parse_mode:
+                payload['parse_mode'] = parse_mode
+            try:
+                response = self.http.post(self.url, data=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                logger.error(f"Telegram notification failed: {str(e)}")
+                response = None
+
+            if response is not None and response.ok:
+                logger.info("Telegram message sent successfully")
+                return True
+            if response is not None and response.status_code == 429:
+                retry_after = self._retry_after(response)
+                logger.warning(f"Telegram rate limited, retrying in {retry_after}s")
+                self.bucket.penalize(retry_after)
+            elif response is not None and response.status_code == 400 and parse_mode \
+                    and "can't parse entities" in response.text:
+                logger.warning("Telegram could not parse the message markup, resending as plain text")
+                parse_mode = None
+            elif response is not None and 400 <= response.status_code < 500:
+                logger.error(f"Telegram rejected message ({response.status_code}): {response.text[:200]}")
+                return False
+            else:
+                if response is not None:
+                    logger.error(f"Telegram notification failed: HTTP {response.status_code}")
+                if self._sleep(delay):
+                    return None
+                delay = min(delay * 2, self.backoff_max)
+            self.stats['retries'] += 1
+
+    @staticmethod
+    def _retry_after(response):
+        try:
+            return float(response.json()['parameters']['retry_after'])
+        except (ValueError, KeyError, TypeError):
+            return 1.0
+
+    def _sleep(self, seconds):
+        """Wait; True instead when stop() was called and the wait would outlast its deadline"""
+        deadline = time.monotonic() + seconds
+        with self._cond:
+            while True:
+                if self._stopped and deadline > self._drain_until:
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
@@ -1,69 +1,52 @@
 import logging
-import requests
-import threading
-import time
-from datetime import datetime
-import MetaTrader5 as mt5
-from queue import Queue
 from decimal import Decimal
-from shared import initialize_mt5, target_tz
+from deal_tracker import DealTracker
+from mt5_session import PRIORITY_TICK, Mt5ConnectionError
+from telegram_sender import TelegramSender
 
 logger = logging.getLogger(__name__)
 
 class TelegramChannel:
-    def __init__(self, bot_token: str, chat_id: str):
+    def __init__(self, bot_token: str, chat_id: str, symbol_cache=None, session=None, deal_state_path=None,
+                 offset_seconds=0, messages_per_minute=20):
         self.bot_token = bot_token
         self.chat_id = chat_id
-        self.last_check_time = datetime.now().astimezone(target_tz)
-        self.running = True
-        self.message_queue = Queue()
-        self.failure_count = 0
-        self.circuit_open = False
-        self._start_processing_thread()
-        self.lock = threading.Lock()
+        self.symbol_cache = symbol_cache
+        self.session = session
+        # Closed deals come from the shared MT5 session; the tracker keeps its watermark on disk
+        self.deal_tracker = DealTracker(session, self._process_closed_deal, deal_state_path,
+                                        offset_seconds=offset_seconds) if session is not None else None
+        # Queued, rate limited and coalesced delivery over one pooled connection
+        self.sender = TelegramSender(bot_token, chat_id, per_minute=messages_per_minute)
         logger.info("Telegram channel initialized")
 
-    def _start_processing_thread(self):
-        def processor():
-            while self.running:
-                msg = self.message_queue.get()
-                self._send_message(msg)
-        threading.Thread(target=processor, daemon=True).start()
-
-    def _send_message(self, text: str) -> bool:
-        if self.circuit_open:
-            logger.warning("Circuit breaker open, message not sent")
-            return False
-            
+    def _symbol_info(self, symbol):
+        if self.symbol_cache is not None:
+            return self.symbol_cache.get(symbol)
+        if self.session is None:
+            return None
         try:
-            logger.debug(f"Sending Telegram message: {text}")
-            url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-            payload = {
-                'chat_id': self.chat_id,
-                'text': text,
-                'parse_mode': 'Markdown'
-            }
-            response = requests.post(url, data=payload, timeout=5)
-            response.raise_for_status()
-            self.failure_count = 0
-            logger.info("Telegram message sent successfully")
-            return True
-        except Exception as e:
-            logger.error(f"Telegram notification failed: {str(e)}")
-            self.failure_count += 1
-            if self.failure_count > 5:
-                logger.critical("Activating circuit breaker for Telegram")
-                self.circuit_open = True
-                threading.Timer(300, self._reset_circuit).start()
-            return False
-
-    def _reset_circuit(self):
-        self.circuit_open = False
-        self.failure_count = 0
+            with self.session.acquire(PRIORITY_TICK) as mt5:
+                return mt5.symbol_info(symbol)
+        except Mt5ConnectionError as e:
+            logger.error(f"symbol_info for {symbol} unavailable: {str(e)}")
+            return None
+
+    def _position_open_time(self, position_id):
+        """Time of the deal that opened the position, None when MT5 cannot tell"""
+        try:
+            with self.session.acquire(PRIORITY_TICK) as mt5:
+                deals = mt5.history_deals_get(position=position_id)
+                entry_in = mt5.DEAL_ENTRY_IN
+        except Mt5ConnectionError as e:
+            logger.error(f"Deals of position {position_id} unavailable: {str(e)}")
+            return None
+        times = [d.time for d in deals or () if d.entry == entry_in]
+        return min(times) if times else None
 
     def build_order_message(self, order_type: str, trade_data: dict) -> str:
         try:
-            symbol_info = mt5.symbol_info(trade_data['symbol'])
+            symbol_info = self._symbol_info(trade_data['symbol'])
             digits = symbol_info.digits if symbol_info else 5
             fmt = f"%.{digits}f"
             
@@ -93,59 +76,31 @@ class TelegramChannel:
             'closed': 'Position Closed'
         }
         message = self.build_order_message(event_types[event_type], trade_data)
-        self.message_queue.put(message)
-
-    def check_closed_positions(self):
-        while self.running:
-            with self.lock:
-                try:
-                    # Convert times to UTC timestamps
-                    from_time = self.last_check_time.timestamp()
-                    to_time = datetime.now().astimezone(target_tz).timestamp()
-                    
-                    # Connection retry logic
-                    for _ in range(3):
-                        if initialize_mt5():
-                            break
-                        print("here")
-                        time.sleep(1)
-                    else:
-                        continue
-
-                    # Get deals with UTC timestamps
-                    deals = mt5.history_deals_get(from_time, to_time)
-                    if deals:
-                        logging.info(f"Found {len(deals)} deals to process")
-                        for deal in deals:
-                            if deal.entry == mt5.DEAL_ENTRY_OUT:
-                                self._process_closed_deal(deal)
-                                logging.debug(f"Processed closed deal: {deal.ticket}")
-                        self.last_check_time = datetime.fromtimestamp(to_time)
-
-                    logging.debug("Position check completed successfully")
-
-                except Exception as e:
-                    logging.error(f"Position check error: {str(e)}", exc_info=True)
-                finally:
-                    mt5.shutdown()
-                    time.sleep(10)
-                    
+        self.sender.send(message)
+
     def _process_closed_deal(self, deal):
         try:
+            # Constants come from the session's backend (MetaTrader5 or the fake)
+            mt5 = self.session.backend
+
             # Verify deal type and properties
             if deal.entry != mt5.DEAL_ENTRY_OUT:
                 return
 
             # Get symbol information with error handling
-            symbol_info = mt5.symbol_info(deal.symbol)
+            symbol_info = self._symbol_info(deal.symbol)
             if not symbol_info:
                 logging.error(f"No symbol info for {deal.symbol}")
                 return
 
-            # Calculate position duration in hours/minutes
-            duration_seconds = deal.time_close - deal.time
-            hours, remainder = divmod(duration_seconds, 3600)
-            minutes = remainder // 60
+            # Position duration in hours/minutes: deals have no close time, the exit deal's
+            # own time is the close and the position's DEAL_ENTRY_IN deal the open
+            opened = self._position_open_time(deal.position_id)
+            if opened is not None:
+                hours, remainder = divmod(deal.time - opened, 3600)
+                duration = f"{int(hours)}h {int(remainder // 60)}m"
+            else:
+                duration = 'unknown'
 
             # Calculate precise risk/reward ratio
             entry_price = Decimal(str(deal.price))
@@ -165,7 +120,7 @@ class TelegramChannel:
                 'sl': float(sl_price),
                 'tp': float(tp_price),
                 'direction': 'BUY' if deal.type == mt5.DEAL_TYPE_BUY else 'SELL',
-                'duration': f"{int(hours)}h {int(minutes)}m",
+                'duration': duration,
                 'rr_ratio': f"{rr_ratio}:1"
             }
 
@@ -176,10 +131,12 @@ class TelegramChannel:
             logging.error(f"Deal processing error: {str(e)}", exc_info=True)
 
     def start_monitoring(self):
-        self.monitor_thread = threading.Thread(target=self.check_closed_positions)
-        self.monitor_thread.daemon = True
-        self.monitor_thread.start()
+        if self.deal_tracker is None:
+            logger.warning("No MT5 session given, closed deals are not monitored")
+            return
+        self.deal_tracker.start()
 
     def stop_monitoring(self):
-        self.running = False
-        self.monitor_thread.join()
\ No newline at end of file
+        if self.deal_tracker is not None:
+            self.deal_tracker.stop()
+        self.sender.stop()
\ No newline at end of file
@@ -0,0 +1,269 @@
+# tick_streamer.py
+import logging
+import time
+from threading import Lock
+
+from mt5_session import PRIORITY_TICK, Mt5ConnectionError
+
+logger = logging.getLogger(__name__)
+
+
+def tick_room(symbol):
+    return f"ticks:{symbol}"
+
+
+def bar_room(symbol, seconds):
+    return f"tick_bars:{symbol}:{seconds}"
+
+
+class TickBarAggregator:
+    """Builds bars of `seconds` from bid ticks, aligned in server time like MT5's own bars"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.step_msc = seconds * 1000
+        self.bar = None  # forming bar, times in server msc
+        self.closed_until = None  # end of the last closed bar; later ticks before it are dropped
+
+    def add(self, times_msc, prices):
+        """Feed ticks in time order; returns the bars they closed"""
+        closed = []
+        bar = self.bar
+        for time_msc, price in zip(times_msc, prices):
+            start = time_msc - time_msc % self.step_msc
+            if self.closed_until is not None and start < self.closed_until:
+                continue
+            if bar is None or start != bar['start']:
+                if bar is not None:
+                    closed.append(bar)
+                    self.closed_until = bar['start'] + self.step_msc
+                bar = {'start': start, 'open': price, 'high': price, 'low': price, 'close': price, 'ticks': 0}
+            bar['high'] = max(bar['high'], price)
+            bar['low'] = min(bar['low'], price)
+            bar['close'] = price
+            bar['ticks'] += 1
+        self.bar = bar
+        return closed
+
+    def flush(self, now_msc):
+        """Close the forming bar once server time has passed its end, even if no tick followed"""
+        if self.bar is not None and now_msc >= self.bar['start'] + self.step_msc:
+            bar, self.bar = self.bar, None
+            self.closed_until = bar['start'] + self.step_msc
+            return [bar]
+        return []
+
+
+class TickCursor:
+    """Position in a symbol's tick history.
+
+    copy_ticks_from only takes whole seconds, so each fetch restarts at the
+    second of the last seen tick and drops the ticks already seen at that
+    exact millisecond.
+    """
+
+    def __init__(self, time_msc):
+        self.time_msc = time_msc
+        self.seen_at_msc = 0
+
+    def date_from(self):
+        return self.time_msc // 1000
+
+    def advance(self, ticks):
+        """Drop already seen ticks, move past the rest and return them"""
+        times = ticks['time_msc']
+        skip = int((times < self.time_msc).sum())
+        skip += min(self.seen_at_msc, int((times[skip:] == self.time_msc).sum()))
+        fresh = ticks[skip:]
+        if len(fresh):
+            newest = int(fresh['time_msc'][-1])
+            repeated = int((fresh['time_msc'] == newest).sum())
+            self.seen_at_msc = repeated + (self.seen_at_msc if newest == self.time_msc else 0)
+            self.time_msc = newest
+        return fresh
+
+
+class TickPoller:
+    """Cursor, subscribers and bar aggregators of one symbol"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.cursor = None  # placed on the terminal's last tick by the first poll
+        self.tick_subscribers = set()
+        self.bar_subscribers = {}  # seconds -> set of sids
+        self.aggregators = {}
+        self.polls = 0
+        self.ticks = 0
+        self.emits = 0
+
+    def idle(self):
+        return not self.tick_subscribers and not self.bar_subscribers
+
+
+class TickStreamer:
+    """Socket.IO tick stream fed by copy_ticks_from, one cursor per symbol.
+
+    A single loop polls every subscribed symbol each `interval` seconds and
+    emits what arrived since the last poll as one 'ticks' batch per symbol
+    (at most `max_batch` ticks; the rest follows on the next poll), so the
+    message rate is bounded by the interval rather than the tick rate.
+    Subscribers may instead (or also) ask for bars of `seconds` built on the
+    server from bid ticks; closed bars are emitted as 'tick_bars'.
+    Times sent to clients are UTC milliseconds (bars: closeTime in seconds,
+    the bar open time as for candles).
+    """
+
+    def __init__(self, socketio, session, offset_seconds=0, interval=0.25, max_batch=1000,
+                 bar_seconds=(1, 5, 15, 30, 60), namespace='/', clock=time.time):
+        self.socketio = socketio
+        self.session = session
+        self.offset_seconds = offset_seconds
+        self.interval = interval
+        self.max_batch = max_batch
+        self.bar_seconds = tuple(bar_seconds)
+        self.namespace = namespace
+        self.clock = clock
+        self._pollers = {}
+        self._by_sid = {}
+        self._lock = Lock()
+        self._running = False
+
+    def _now_server_msc(self):
+        return int((self.clock() + self.offset_seconds) * 1000)
+
+    def subscribe(self, sid, symbol, bar_seconds=None):
+        """Stream symbol's ticks to sid, or its bars of bar_seconds when given"""
+        symbol = symbol.upper()
+        if bar_seconds is not None:
+            bar_seconds = int(bar_seconds)
+            if bar_seconds not in self.bar_seconds:
+                raise ValueError(f"Invalid bar size: {bar_seconds}s, expected one of {self.bar_seconds}")
+        with self._lock:
+            poller = self._pollers.get(symbol)
+            if poller is None:
+                poller = self._pollers[symbol] = TickPoller(symbol)
+            if bar_seconds is None:
+                poller.tick_subscribers.add(sid)
+                room = tick_room(symbol)
+            else:
+                poller.bar_subscribers.setdefault(bar_seconds, set()).add(sid)
+                poller.aggregators.setdefault(bar_seconds, TickBarAggregator(bar_seconds))
+                room = bar_room(symbol, bar_seconds)
+            self._by_sid.setdefault(sid, set()).add((symbol, bar_seconds))
+            start = not self._running
+            self._running = True
+        self.socketio.server.enter_room(sid, room, namespace=self.namespace)
+        if start:
+            self.socketio.start_background_task(self._run)
+
+    def unsubscribe(self, sid, symbol, bar_seconds=None):
+        symbol = symbol.upper()
+        with self._lock:
+            poller = self._pollers.get(symbol)
+            if poller is None:
+                return
+            if bar_seconds is None:
+                poller.tick_subscribers.discard(sid)
+                room = tick_room(symbol)
+            else:
+                sids = poller.bar_subscribers.get(bar_seconds, set())
+                sids.discard(sid)
+                if not sids:
+                    poller.bar_subscribers.pop(bar_seconds, None)
+                    poller.aggregators.pop(bar_seconds, None)
+                room = bar_room(symbol, bar_seconds)
+            self._by_sid.get(sid, set()).discard((symbol, bar_seconds))
+            if poller.idle():
+                del self._pollers[symbol]
+        try:
+            self.socketio.server.leave_room(sid, room, namespace=self.namespace)
+        except Exception:
+            pass  # already disconnected
+
+    def unsubscribe_all(self, sid):
+        with self._lock:
+            subscriptions = list(self._by_sid.pop(sid, ()))
+        for symbol, bar_seconds in subscriptions:
+            self.unsubscribe(sid, symbol, bar_seconds)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                pollers = list(self._pollers.values())
+                if not pollers:
+                    self._running = False
+                    return
+            for poller in pollers:
+                self.poll_once(poller)
+            self.socketio.sleep(self.interval)
+
+    def _fetch(self, poller):
+        try:
+            with self.session.acquire(PRIORITY_TICK) as mt5:
+                if poller.cursor is None:
+                    # No backfill: start at the last tick, so clients get the current price first
+                    last = mt5.symbol_info_tick(poller.symbol)
+                    if last is None:
+                        logger.error(f"No tick for {poller.symbol}")
+                        return None
+                    poller.cursor = TickCursor(int(last.time_msc))
+                ticks = mt5.copy_ticks_from(poller.symbol, poller.cursor.date_from(), self.max_batch,
+                                            mt5.COPY_TICKS_ALL)
+        except Mt5ConnectionError:
+            logger.error(f"MT5 unavailable, skipping tick poll of {poller.symbol}")
+            return None
+        except Exception as e:
+            logger.error(f"Tick polling error for {poller.symbol}: {str(e)}")
+            return None
+        if ticks is None or len(ticks) == 0:
+            return None
+        return poller.cursor.advance(ticks)
+
+    def poll_once(self, poller):
+        """Fetch the ticks since the cursor and emit them (and any bars they closed)"""
+        poller.polls += 1
+        ticks = self._fetch(poller)
+        offset_msc = self.offset_seconds * 1000
+        if ticks is not None and len(ticks):
+            poller.ticks += len(ticks)
+            times_msc = ticks['time_msc']
+            if poller.tick_subscribers:
+                self._emit('ticks', {
+                    'symbol': poller.symbol,
+                    'time': (times_msc - offset_msc).tolist(),
+                    'bid': ticks['bid'].tolist(),
+                    'ask': ticks['ask'].tolist(),
+                }, tick_room(poller.symbol), poller)
+        else:
+            times_msc = None
+
+        now_msc = self._now_server_msc()
+        for seconds, aggregator in list(poller.aggregators.items()):
+            closed = aggregator.add(times_msc.tolist(), ticks['bid'].tolist()) if times_msc is not None else []
+            closed += aggregator.flush(now_msc)
+            if closed:
+                self._emit('tick_bars', {
+                    'symbol': poller.symbol,
+                    'seconds': seconds,
+                    'bars': [{
+                        'closeTime': (bar['start'] - offset_msc) // 1000,
+                        'open': bar['open'],
+                        'high': bar['high'],
+                        'low': bar['low'],
+                        'close': bar['close'],
+                        'ticks': bar['ticks'],
+                    } for bar in closed],
+                }, bar_room(poller.symbol, seconds), poller)
+        return ticks
+
+    def _emit(self, event, payload, room, poller):
+        poller.emits += 1
+        self.socketio.emit(event, payload, room=room, namespace=self.namespace)
+
+    def status(self):
+        with self._lock:
+            return [{
+                'symbol': p.symbol, 'tick_subscribers': len(p.tick_subscribers),
+                'bar_subscribers': {seconds: len(sids) for seconds, sids in p.bar_subscribers.items()},
+                'cursor_msc': p.cursor and p.cursor.time_msc, 'polls': p.polls, 'ticks': p.ticks, 'emits': p.emits,
+            } for p in self._pollers.values()]
@@ -6,6 +6,35 @@ import fs from "fs";
 import moment from "moment";
 import { generateSignalReports } from '@tradingBot/Features/Core/ReportMaker.ts';
 
+// Columnar candle payload of the MtDriver (see MtDriver/candle_encoding.py)
+const PACKED_CANDLES = "application/x-candles-packed";
+
+function decodePackedCandles(buffer: ArrayBuffer) {
+    const headerLength = new DataView(buffer).getUint32(0, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)));
+    const columns: Record<string, ArrayLike<number | bigint>> = {};
+    let offset = 4 + headerLength;
+    for (const [name, dtype] of header.columns) {
+        columns[name] = dtype === "<i8"
+            ? new BigInt64Array(buffer, offset, header.count)
+            : new Float64Array(buffer, offset, header.count);
+        offset += header.count * 8;
+    }
+    const candles = new Array(header.count);
+    for (let i = 0; i < header.count; i++) {
+        candles[i] = {
+            closeTime: Number(columns.closeTime[i]),
+            open: columns.open[i],
+            high: columns.high[i],
+            low: columns.low[i],
+            close: columns.close[i],
+            period: header.period,
+            name: header.name
+        };
+    }
+    return { candles };
+}
+
 export default async (generalStore: GeneralStore) => {
     try {
         const startTime = new Date().getTime();
@@ -39,7 +68,7 @@ export default async (generalStore: GeneralStore) => {
             const fromdb = 1;
             const candlesReq: any = await fetch("http://127.0.0.1:5000/get_candles_in", {
                 method: "POST",
-                headers: { 'Content-Type': 'application/json' },
+                headers: { 'Content-Type': 'application/json', 'Accept': PACKED_CANDLES },
                 body: JSON.stringify({
                     fromdb: fromdb,
                     symbol: currency.name,
@@ -48,7 +77,9 @@ export default async (generalStore: GeneralStore) => {
                 })
             });
 
-            let temp = await candlesReq.json();
+            let temp = candlesReq.headers.get("Content-Type")?.startsWith(PACKED_CANDLES)
+                ? decodePackedCandles(await candlesReq.arrayBuffer())
+                : await candlesReq.json();
             if (temp && temp.candles && temp.candles.length > 0) {
                 console.log(temp.candles[0])
                 candlesInRange = [...candlesInRange, ...temp.candles];
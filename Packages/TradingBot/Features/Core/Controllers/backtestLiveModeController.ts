@@ -97,19 +97,23 @@ async function runCandleStreamFlow(generalStore: GeneralStore, model: Function)
     const socket = io('http://127.0.0.1:5000', { transports: ['websocket'], reconnection: true });
 
     const currencies = await generalStore.state.Prisma.currency.findMany();
+    // Last resume token per pair; sent back on reconnect so only the missed candles are replayed
+    const resumeTokens: Record<string, any> = {};
     socket.on('connect', () => {
         console.log('Connected!');
         logger.info(`socket connected: ${currencies.map(c => c.name)} in PERIOD_M1`);
 
         socket.emit('start_candle_stream', {
-            subscriptions: currencies.map(c => ({ symbol: c.name, timeframe: "PERIOD_M1" }))
+            subscriptions: currencies.map(c =>
+                resumeTokens[`${c.name}_PERIOD_M1`] ?? { symbol: c.name, timeframe: "PERIOD_M1" })
         });
     });
 
-    socket.on('new_candles', async (candles) => {
+    socket.on('new_candles', async (candles, token) => {
         console.log(`${candles[0]["closeTime"]}: New ${candles[0]["period"]} candle for ${candles[0]["name"]}:`);
         await initRunMode();
         await generalStore.state.Candle.processCandles(candles, model);
+        if (token) resumeTokens[`${token.symbol}_${token.timeframe}`] = token;
     });
 
     socket.on('error', (error) => {
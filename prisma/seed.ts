@@ -21,6 +21,8 @@ async function setSettings() {
       { settingKey: "Mt5Login", settingValue: "5034048580", parseTo: "STRING" },
       { settingKey: "Mt5Password", settingValue: "*h3nNrEu", parseTo: "STRING" },
       { settingKey: "Mt5Server", settingValue: "MetaQuotes-Demo", parseTo: "STRING" },
+      { settingKey: "MtMinDistancePoint", settingValue: "2", parseTo: "INT" },
+      { settingKey: "MtMinStopDistancePoint", settingValue: "10", parseTo: "INT" },
 
       {
         settingKey: "SignalStopLossError",